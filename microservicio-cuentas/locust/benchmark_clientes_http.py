@@ -0,0 +1,228 @@
+"""
+Benchmark: RPS máximo por núcleo de cada cliente HTTP de Locust
+Levanta un servidor stub local (gevent, varios procesos con SO_REUSEPORT) que
+responde como el microservicio de cuentas con respuestas fijas, y ejecuta cada
+escenario del locustfile sin tiempo de espera, una vez por cliente
+(requests / fast), cada uno en su propio proceso de un solo núcleo.
+
+El resultado principal es RPS por segundo de CPU del proceso generador: si la
+prueba real contra el servicio da bastante menos RPS por núcleo que este
+techo, el cuello de botella es el servicio y no el generador de carga.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+PUERTO = 18089
+
+# Segundos de carga antes de empezar a medir (conexiones abiertas, usuarios lanzados)
+CALENTAMIENTO = 3
+
+# Respuesta fija por (método, sufijo de ruta); lo demás responde 200 con []
+RESPUESTAS = {
+    ("POST", "/retiro"): (200, {"saldo": 9000.0}),
+    ("POST", "/deposito"): (200, {"saldo": 11000.0}),
+    ("PUT", ""): (200, {"saldo": 10000.0}),
+    # El servicio real responde 204 al eliminar
+    ("DELETE", ""): (204, None)
+}
+
+RAZONES = {200: "OK", 201: "Created", 204: "No Content"}
+
+
+def _respuesta(metodo, ruta):
+    if metodo == "POST" and ruta == "/cuentas":
+        estado, cuerpo = 201, {"id": str(uuid.uuid4()), "saldo": 10000.0}
+    else:
+        estado, cuerpo = next(
+            (r for (m, sufijo), r in RESPUESTAS.items() if m == metodo and ruta.endswith(sufijo)),
+            (200, [])
+        )
+    datos = b"" if cuerpo is None else json.dumps(cuerpo).encode()
+    cabecera = (
+        f"HTTP/1.1 {estado} {RAZONES[estado]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(datos)}\r\n\r\n"
+    )
+    return cabecera.encode() + datos
+
+
+def _atender(conexion, direccion):
+    """HTTP/1.1 keep-alive mínimo: leer cabeceras + cuerpo y responder"""
+    buffer = b""
+    try:
+        while True:
+            while b"\r\n\r\n" not in buffer:
+                datos = conexion.recv(65536)
+                if not datos:
+                    return
+                buffer += datos
+            cabeceras, buffer = buffer.split(b"\r\n\r\n", 1)
+            lineas = cabeceras.decode("latin-1").split("\r\n")
+            metodo, ruta = lineas[0].split(" ")[:2]
+            largo = 0
+            for linea in lineas[1:]:
+                nombre, _, valor = linea.partition(":")
+                if nombre.strip().lower() == "content-length":
+                    largo = int(valor)
+            while len(buffer) < largo:
+                datos = conexion.recv(65536)
+                if not datos:
+                    return
+                buffer += datos
+            buffer = buffer[largo:]
+            conexion.sendall(_respuesta(metodo, ruta.split("?")[0]))
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        conexion.close()
+
+
+def servir(puerto):
+    """Proceso servidor: comparte el puerto con los demás procesos vía SO_REUSEPORT"""
+    from gevent import monkey
+    monkey.patch_all()
+    from gevent.server import StreamServer
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("127.0.0.1", puerto))
+    sock.listen(4096)
+    StreamServer(sock, _atender).serve_forever()
+
+
+def medir(cliente, escenario, usuarios, duracion, host):
+    """
+    Proceso generador: un runner local de Locust con la variante pedida del
+    locustfile y espera cero entre tareas. Imprime el resultado como JSON.
+    """
+    import gevent
+    from locust import constant
+    from locust.env import Environment
+
+    import locustfile
+
+    base = locustfile.VARIANTES_HTTP[cliente][escenario]
+    clase = type(base.__name__, (base,), {"wait_time": constant(0), "host": host})
+
+    env = Environment(user_classes=[clase])
+    runner = env.create_local_runner()
+    runner.start(usuarios, spawn_rate=usuarios)
+    gevent.sleep(CALENTAMIENTO)
+
+    env.stats.reset_all()
+    cpu_inicio, inicio = time.process_time(), time.perf_counter()
+    gevent.sleep(duracion)
+    cpu = time.process_time() - cpu_inicio
+    segundos = time.perf_counter() - inicio
+    total = env.stats.total
+    solicitudes, fallos = total.num_requests, total.num_failures
+    p95 = total.get_response_time_percentile(0.95)
+    runner.quit()
+
+    print(json.dumps({
+        "cliente": cliente,
+        "escenario": escenario,
+        "usuarios": usuarios,
+        "solicitudes": solicitudes,
+        "fallos": fallos,
+        "segundos": round(segundos, 2),
+        "cpu_segundos": round(cpu, 2),
+        "rps": round(solicitudes / segundos, 1),
+        "rps_por_nucleo": round(solicitudes / cpu, 1) if cpu else None,
+        "uso_cpu": round(cpu / segundos, 2),
+        "p95_ms": p95
+    }))
+
+
+def _esperar_puerto(puerto, limite=10):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RPS por núcleo: HttpUser vs FastHttpUser")
+    parser.add_argument("--clientes", nargs="+", default=["requests", "fast"], choices=["requests", "fast"])
+    parser.add_argument("--escenario", default="cuentas", choices=["cuentas", "eliminacion_masiva"])
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--duracion", type=float, default=20, help="Segundos medidos por cliente")
+    parser.add_argument("--procesos-servidor", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Procesos del servidor stub (debe sobrar capacidad respecto al generador)")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    # Modos internos de los subprocesos
+    parser.add_argument("--servir", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--medir", choices=["requests", "fast"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir:
+        servir(args.puerto)
+        return 0
+    host = f"http://127.0.0.1:{args.puerto}"
+    if args.medir:
+        medir(args.medir, args.escenario, args.usuarios, args.duracion, host)
+        return 0
+
+    script = os.path.abspath(__file__)
+    servidores = [
+        subprocess.Popen([sys.executable, script, "--servir", "--puerto", str(args.puerto)])
+        for _ in range(args.procesos_servidor)
+    ]
+    resultados = []
+    try:
+        if not _esperar_puerto(args.puerto):
+            print("❌ El servidor stub no arrancó")
+            return 1
+        for cliente in args.clientes:
+            salida = subprocess.run(
+                [sys.executable, script, "--medir", cliente, "--escenario", args.escenario,
+                 "--usuarios", str(args.usuarios), "--duracion", str(args.duracion),
+                 "--puerto", str(args.puerto)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            resultados.append(json.loads(salida.strip().splitlines()[-1]))
+    finally:
+        for servidor in servidores:
+            servidor.terminate()
+        for servidor in servidores:
+            servidor.wait()
+
+    print("=" * 80)
+    print(f"BENCHMARK CLIENTES HTTP (escenario {args.escenario}, {args.usuarios} usuarios, "
+          f"{args.duracion:.0f}s, stub con {args.procesos_servidor} procesos)")
+    print("=" * 80)
+    print(f"{'Cliente':<10}{'RPS':>10}{'RPS/núcleo':>13}{'CPU':>7}{'P95 ms':>9}{'Fallos':>9}")
+    for r in resultados:
+        print(f"{r['cliente']:<10}{r['rps']:>10.1f}{r['rps_por_nucleo'] or 0:>13.1f}"
+              f"{r['uso_cpu']:>7.0%}{r['p95_ms']:>9.0f}{r['fallos']:>9d}")
+    if any(r["uso_cpu"] < 0.9 for r in resultados):
+        print("⚠️  Algún generador no llegó al 90% de CPU: el stub o los usuarios lo limitan, "
+              "subir --usuarios o --procesos-servidor")
+
+    os.makedirs("locust/reportes", exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    archivo = f"locust/reportes/benchmark_clientes_http_{timestamp}.json"
+    with open(archivo, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "procesos_servidor": args.procesos_servidor,
+            "resultados": resultados
+        }, f, indent=2)
+    print(f"\n✅ Resultados guardados en: {archivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
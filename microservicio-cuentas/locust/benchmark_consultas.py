@@ -0,0 +1,365 @@
+"""
+Benchmark de Planes de Consulta a Distintas Escalas
+Para cada tamaño de --tamanos genera (o reutiliza) un dataset con
+generar_dataset.py, lo carga en la base de benchmark y ejecuta las consultas
+que hacen CuentasService (las que genera TypeORM) y validar_inconsistencias.py.
+Por consulta registra:
+- latencia (mediana, p95 y mínimo de --repeticiones ejecuciones, leyendo
+  todo el resultado)
+- filas devueltas y filas examinadas (suma de los contadores Handler_read_*
+  de la sesión)
+- el plan de EXPLAIN ANALYZE (MySQL 8.0.18+), marcando escaneos completos de
+  tabla (Table scan), de índice completo (Index scan), ordenamientos
+  (Sort / filesort) y tablas temporales
+
+Con --candidatos repite la medición después de agregar INDICES_CANDIDATOS
+(índices compuestos que se están evaluando) y los elimina al terminar, así
+cada tamaño queda con la comparación base / candidatos.
+
+Las consultas del validador se miden por página (LIMIT TAMANO_LOTE, la
+primera del recorrido keyset), que es lo que cuesta cada ida a la base.
+
+El resultado se guarda en locust/reportes/benchmark_consultas_YYYYMMDD_HHMMSS.json.
+
+Uso:
+    cd locust
+    python benchmark_consultas.py --tamanos 10000 100000 1000000
+    python benchmark_consultas.py --tamanos 10000000 --candidatos --repeticiones 3
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import mysql.connector
+import numpy as np
+
+from generar_dataset import (
+    AUDITORIA_POR_CUENTA, DIRECTORIO_DATASETS, FIN_FECHAS, INDICES, SPAN_FECHAS,
+    cargar, conectar_bench, crear_indices, generar, id_socio, leer_metadatos, numero_cuenta
+)
+from motor_validacion import COLUMNAS, CLAVES_RECORRIDO
+from validar_inconsistencias import DIRECTORIO_REPORTES, TAMANO_LOTE
+
+TAMANOS = (10_000, 100_000, 1_000_000)
+
+# Columnas que TypeORM selecciona para la entidad Cuenta
+COLUMNAS_ENTIDAD = (
+    "id, socio_id, numeroCuenta, saldo, estado, tipoCuenta, "
+    "fecha_creacion, fecha_actualizacion, activo"
+)
+
+# Índices compuestos en evaluación (se crean y eliminan en la fase "candidatos")
+INDICES_CANDIDATOS = {
+    "cuentas": {
+        # buscarCuentasPorSocio: filtro y ORDER BY fechaCreacion DESC sin Sort
+        "idx_cand_socio_activo_fecha": ("socio_id", "activo", "fecha_creacion"),
+        # Duplicados del validador: GROUP BY numeroCuenta de las activas sin temporal
+        "idx_cand_activo_numero": ("activo", "numeroCuenta"),
+        # Saldos negativos: rango en lugar de recorrer la tabla por id
+        "idx_cand_saldo": ("saldo",),
+    },
+    "auditoria_cuentas": {
+        # Cadena de auditoría: filtro por acción con el orden del recorrido
+        "idx_cand_accion_cuenta_fecha": ("accion", "cuenta_id", "fecha", "id"),
+    },
+}
+
+# (nombre, origen, SQL, claves del contexto para los parámetros)
+CONSULTAS = (
+    ("cuenta por numeroCuenta", "CuentasService.crearCuenta / actualizarCuenta",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE numeroCuenta = %s AND activo = 1 LIMIT 1",
+     ("numero",)),
+    ("cuenta por id", "CuentasService.obtenerCuenta / operaciones",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE id = %s AND activo = 1 LIMIT 1",
+     ("id",)),
+    ("cuentas del socio más grande", "CuentasService.buscarCuentasPorSocio",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE socio_id = %s AND activo = 1 "
+     f"ORDER BY fecha_creacion DESC",
+     ("socio_frecuente",)),
+    ("cuentas de un socio al azar", "CuentasService.buscarCuentasPorSocio",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE socio_id = %s AND activo = 1 "
+     f"ORDER BY fecha_creacion DESC",
+     ("socio",)),
+    ("todas las cuentas activas", "CuentasService.obtenerTodasCuentas",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE activo = 1 AND estado = 'ACTIVA'",
+     ()),
+    ("listado: primera página", "CuentasService.obtenerPaginaCuentas",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE activo = 1 AND estado = 'ACTIVA' "
+     f"ORDER BY fecha_creacion ASC, id ASC LIMIT 101",
+     ()),
+    ("listado: página intermedia", "CuentasService.obtenerPaginaCuentas",
+     f"SELECT {COLUMNAS_ENTIDAD} FROM cuentas WHERE activo = 1 AND estado = 'ACTIVA' "
+     f"AND (fecha_creacion > %s OR (fecha_creacion = %s AND id > %s)) "
+     f"ORDER BY fecha_creacion ASC, id ASC LIMIT 101",
+     ("fecha_cursor", "fecha_cursor", "id_cursor")),
+    ("saldos negativos (página)", "verificar_saldos_negativos",
+     f"SELECT id, numeroCuenta, saldo, estado, activo FROM cuentas WHERE saldo < 0 "
+     f"ORDER BY id LIMIT {TAMANO_LOTE}",
+     ()),
+    ("estados inconsistentes (página)", "verificar_estado_inconsistente",
+     f"SELECT id, numeroCuenta, estado, activo FROM cuentas "
+     f"WHERE ((estado = 'ACTIVA' AND activo = 0) OR (estado IN ('CANCELADA', 'SUSPENDIDA') AND activo = 1)) "
+     f"ORDER BY id LIMIT {TAMANO_LOTE}",
+     ()),
+    ("números duplicados (página)", "verificar_numeros_duplicados",
+     f"SELECT numeroCuenta, COUNT(*) AS total FROM cuentas WHERE activo = 1 "
+     f"GROUP BY numeroCuenta HAVING COUNT(*) > 1 ORDER BY numeroCuenta LIMIT {TAMANO_LOTE}",
+     ()),
+    ("una pasada (página)", "validar_en_una_pasada",
+     f"SELECT {', '.join(COLUMNAS)} FROM cuentas ORDER BY {', '.join(CLAVES_RECORRIDO)} LIMIT {TAMANO_LOTE}",
+     ()),
+    ("incremental: cambios (página)", "validar_incremental",
+     f"SELECT {', '.join(COLUMNAS)}, fecha_actualizacion FROM cuentas WHERE fecha_actualizacion >= %s "
+     f"ORDER BY fecha_actualizacion, id LIMIT {TAMANO_LOTE}",
+     ("desde_incremental",)),
+    ("estadísticas: total", "generar_estadisticas",
+     "SELECT COUNT(*) AS total FROM cuentas", ()),
+    ("estadísticas: activas", "generar_estadisticas",
+     "SELECT COUNT(*) AS total FROM cuentas WHERE activo = 1", ()),
+    ("estadísticas: por estado", "generar_estadisticas",
+     "SELECT estado, COUNT(*) AS total FROM cuentas GROUP BY estado", ()),
+    ("estadísticas: saldo total", "generar_estadisticas",
+     "SELECT SUM(saldo) AS total FROM cuentas WHERE activo = 1", ()),
+    ("auditoría: cadena (página)", "verificar_cadena_auditoria",
+     f"SELECT id, cuenta_id, fecha, descripcion FROM auditoria_cuentas "
+     f"WHERE accion = 'ACTUALIZACION_SALDO' AND cuenta_id IS NOT NULL "
+     f"ORDER BY cuenta_id, fecha, id LIMIT {TAMANO_LOTE}",
+     ()),
+)
+
+# Marcas del plan de EXPLAIN ANALYZE (formato TREE)
+PATRONES_PLAN = {
+    "TABLE_SCAN": re.compile(r"Table scan on (\w+)"),
+    "INDEX_SCAN": re.compile(r"Index scan on (\w+) using (\w+)"),
+    "FILESORT": re.compile(r"-> Sort\b|filesort"),
+    "TEMPORAL": re.compile(r"temporary table", re.IGNORECASE),
+}
+ESCANEOS_COMPLETOS = ("TABLE_SCAN", "INDEX_SCAN")
+
+FILAS_POR_LECTURA = 10_000
+
+
+def marcas_plan(plan):
+    """Marcas presentes en el texto de EXPLAIN ANALYZE (vacío si no hay plan)"""
+    if not plan:
+        return []
+    return [marca for marca, patron in PATRONES_PLAN.items() if patron.search(plan)]
+
+
+def leer_handlers(cursor):
+    """Suma de Handler_read_* de la sesión (filas que el motor leyó)"""
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return sum(int(valor) for _, valor in cursor.fetchall())
+
+
+def ejecutar(cursor, sql, params):
+    """Ejecutar leyendo todo el resultado; devuelve (milisegundos, filas)"""
+    inicio = time.perf_counter()
+    cursor.execute(sql, params)
+    filas = 0
+    while True:
+        lectura = cursor.fetchmany(FILAS_POR_LECTURA)
+        if not lectura:
+            break
+        filas += len(lectura)
+    return (time.perf_counter() - inicio) * 1000, filas
+
+
+def explicar(cursor, sql, params):
+    """Texto de EXPLAIN ANALYZE, o None si el servidor no lo soporta"""
+    try:
+        cursor.execute(f"EXPLAIN ANALYZE {sql}", params)
+        return "\n".join(str(fila[0]) for fila in cursor.fetchall())
+    except mysql.connector.Error:
+        return None
+
+
+def crear_contexto(conexion, cuentas, semilla):
+    """Parámetros de las consultas, tomados del dataset cargado"""
+    cursor = conexion.cursor()
+    rng = np.random.default_rng(semilla)
+    numero = numero_cuenta(int(rng.integers(cuentas)))
+    cursor.execute("SELECT id, socio_id FROM cuentas WHERE numeroCuenta = %s", (numero,))
+    id_cuenta, socio = cursor.fetchone()
+    cursor.execute("SELECT MAX(fecha_actualizacion) FROM cuentas")
+    (ultima,) = cursor.fetchone()
+    cursor.close()
+    return {
+        "numero": numero,
+        "id": id_cuenta,
+        "socio": socio,
+        "socio_frecuente": id_socio(0, semilla),
+        # Mitad del rango de fechas: la página del medio del listado
+        "fecha_cursor": datetime.fromtimestamp(FIN_FECHAS - SPAN_FECHAS // 2, timezone.utc).replace(tzinfo=None),
+        "id_cursor": "",
+        # Último día de cambios, como una validación incremental frecuente
+        "desde_incremental": ultima - timedelta(days=1),
+    }
+
+
+def medir_consultas(conexion, contexto, repeticiones):
+    """Medir todas las CONSULTAS; devuelve una lista de resultados por consulta"""
+    cursor = conexion.cursor(raw=True)
+    estado = conexion.cursor()
+    # Lo que suman dos lecturas seguidas de los contadores (sin consulta en medio)
+    primera = leer_handlers(estado)
+    ajuste = leer_handlers(estado) - primera
+    resultados = []
+    for nombre, origen, sql, claves in CONSULTAS:
+        params = tuple(contexto[clave] for clave in claves)
+        antes = leer_handlers(estado)
+        milisegundos, filas = ejecutar(cursor, sql, params)
+        examinadas = leer_handlers(estado) - antes - ajuste
+        tiempos = [milisegundos] + [ejecutar(cursor, sql, params)[0] for _ in range(repeticiones - 1)]
+        plan = explicar(estado, sql, params)
+        marcas = marcas_plan(plan)
+        resultado = {
+            "consulta": nombre,
+            "origen": origen,
+            "sql": sql,
+            "mediana_ms": round(float(np.median(tiempos)), 3),
+            "p95_ms": round(float(np.percentile(tiempos, 95)), 3),
+            "min_ms": round(min(tiempos), 3),
+            "filas": filas,
+            "filas_examinadas": max(examinadas, 0),
+            "marcas": marcas,
+            "escaneo_completo": any(marca in ESCANEOS_COMPLETOS for marca in marcas),
+            "plan": plan,
+        }
+        resultados.append(resultado)
+        alerta = "⚠️" if resultado["escaneo_completo"] else "  "
+        print(f"  {alerta} {nombre:<34}{resultado['mediana_ms']:>11.2f} ms"
+              f"{filas:>11}{resultado['filas_examinadas']:>13}  {' '.join(marcas)}")
+    cursor.close()
+    estado.close()
+    return resultados
+
+
+def eliminar_indices(cursor, indices):
+    for tabla, definiciones in indices.items():
+        cursor.execute(f"ALTER TABLE {tabla} " + ", ".join(f"DROP INDEX {nombre}" for nombre in definiciones))
+
+
+def preparar_dataset(cuentas, semilla, auditoria_por_cuenta):
+    """Directorio con los CSV del tamaño pedido; se regeneran solo si cambian los parámetros"""
+    directorio = os.path.join(DIRECTORIO_DATASETS, str(cuentas))
+    metadatos = leer_metadatos(directorio)
+    vigente = metadatos is not None and (
+        metadatos["cuentas"], metadatos["semilla"], metadatos["auditoria_por_cuenta"]
+    ) == (cuentas, semilla, auditoria_por_cuenta)
+    if vigente:
+        print(f"♻️  Reutilizando el dataset de {directorio}")
+        return directorio, metadatos
+    print(f"🎲 Generando {cuentas} cuentas en {directorio}")
+    return directorio, generar(cuentas, directorio, semilla, auditoria_por_cuenta)
+
+
+def medir_tamano(cuentas, args):
+    """Generar, cargar y medir un tamaño (fases base y, opcionalmente, candidatos)"""
+    carga = None
+    if args.sin_cargar:
+        metadatos = leer_metadatos(os.path.join(DIRECTORIO_DATASETS, str(cuentas)))
+        if metadatos is None:
+            raise RuntimeError(f"No hay dataset de {cuentas} cuentas en {DIRECTORIO_DATASETS}")
+    else:
+        directorio, metadatos = preparar_dataset(cuentas, args.semilla, args.auditoria_por_cuenta)
+        print(f"📥 Cargando {cuentas} cuentas y {metadatos['auditoria']} filas de auditoría")
+        carga = cargar(directorio)
+
+    conexion = conectar_bench()
+    cursor = conexion.cursor()
+    cursor.execute("SET time_zone = '+00:00'")
+    cursor.close()
+    contexto = crear_contexto(conexion, cuentas, args.semilla)
+
+    fases = {}
+    encabezado = f"     {'consulta':<34}{'mediana':>14}{'filas':>11}{'examinadas':>13}  marcas"
+    print(f"\n📊 {cuentas} cuentas — índices base ({', '.join(INDICES['cuentas'])})")
+    print(encabezado)
+    fases["base"] = medir_consultas(conexion, contexto, args.repeticiones)
+
+    if args.candidatos:
+        cursor = conexion.cursor()
+        crear_indices(cursor, INDICES_CANDIDATOS)
+        cursor.execute(f"ANALYZE TABLE {', '.join(INDICES_CANDIDATOS)}")
+        cursor.fetchall()
+        try:
+            print(f"\n📊 {cuentas} cuentas — con candidatos "
+                  f"({', '.join(n for d in INDICES_CANDIDATOS.values() for n in d)})")
+            print(encabezado)
+            fases["candidatos"] = medir_consultas(conexion, contexto, args.repeticiones)
+        finally:
+            eliminar_indices(cursor, INDICES_CANDIDATOS)
+            cursor.close()
+    conexion.close()
+
+    return {
+        "cuentas": cuentas,
+        "auditoria": metadatos["auditoria"],
+        "socios": metadatos["socios"],
+        "carga_segundos": carga,
+        "fases": fases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia y planes de las consultas de cuentas a distintas escalas")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS),
+                        help="Cantidades de cuentas a medir (de 10k a 50M)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--auditoria-por-cuenta", type=float, default=AUDITORIA_POR_CUENTA)
+    parser.add_argument("--candidatos", action="store_true",
+                        help="Medir también con INDICES_CANDIDATOS")
+    parser.add_argument("--sin-cargar", action="store_true",
+                        help="Usar las tablas ya cargadas (un solo tamaño, el del último dataset cargado)")
+    args = parser.parse_args()
+    if args.repeticiones <= 0 or any(tamano <= 0 for tamano in args.tamanos):
+        parser.error("--repeticiones y --tamanos deben ser positivos")
+    if args.sin_cargar and len(args.tamanos) != 1:
+        parser.error("--sin-cargar mide las tablas actuales: indicar un solo tamaño")
+
+    print("=" * 80)
+    print(f"BENCHMARK DE CONSULTAS ({', '.join(str(t) for t in args.tamanos)} cuentas, "
+          f"mediana de {args.repeticiones})")
+    print("=" * 80)
+    try:
+        tamanos = [medir_tamano(cuentas, args) for cuentas in sorted(args.tamanos)]
+    except (mysql.connector.Error, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    escaneos = sorted({
+        consulta["consulta"]
+        for tamano in tamanos for consulta in tamano["fases"]["base"] if consulta["escaneo_completo"]
+    })
+    print("=" * 80)
+    if escaneos:
+        print(f"⚠️  Escaneos completos con los índices base: {len(escaneos)} consultas")
+        for nombre in escaneos:
+            print(f"  - {nombre}")
+    else:
+        print("✅ Ninguna consulta recorre una tabla o índice completo")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+    archivo = f"{DIRECTORIO_REPORTES}/benchmark_consultas_{timestamp}.json"
+    with open(archivo, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "semilla": args.semilla,
+            "repeticiones": args.repeticiones,
+            "indices_base": INDICES,
+            "indices_candidatos": INDICES_CANDIDATOS if args.candidatos else None,
+            "tamanos": tamanos,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"✅ Reporte guardado en: {archivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Benchmark: validación clásica vs motor de una sola pasada
+Siembra una tabla cuentas con N filas (1M por defecto) en una base de datos
+aparte y mide el tiempo de:
+- Clásico: 3 consultas verificar_* + 4 consultas de generar_estadisticas
+- Una pasada: un único recorrido con motor_validacion.MotorValidacion
+- Paralelo (con --workers): el mismo recorrido repartido en shards
+Además comprueba que todos los modos producen los mismos hallazgos y
+estadísticas (el paralelo, además, en el mismo orden que el serial).
+
+La tabla de benchmark tiene un índice NO único en numeroCuenta para que la
+regla de duplicados tenga casos que encontrar.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+import uuid
+
+import mysql.connector
+
+from validar_inconsistencias import ValidadorInconsistencias, TAMANO_LOTE, WORKERS, TAMANO_SHARD
+
+# Usuario con permiso para crear la base de datos de benchmark
+BENCH_DB_CONFIG = {
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'root',
+    'password': 'root123',
+    'database': 'cooperativa_bench'
+}
+
+ESQUEMA_CUENTAS = """
+CREATE TABLE cuentas (
+    id VARCHAR(36) PRIMARY KEY,
+    socio_id VARCHAR(36) NOT NULL,
+    numeroCuenta VARCHAR(20) NOT NULL,
+    saldo DECIMAL(15,2) DEFAULT 0.00,
+    estado ENUM('ACTIVA', 'SUSPENDIDA', 'CANCELADA') DEFAULT 'ACTIVA',
+    tipoCuenta VARCHAR(50) NOT NULL,
+    fecha_creacion DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+    fecha_actualizacion DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    activo BOOLEAN DEFAULT true,
+    INDEX idx_cuentas_numero (numeroCuenta),
+    INDEX idx_cuentas_activo (activo),
+    INDEX idx_cuentas_estado (estado)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+def sembrar(filas, lote, semilla):
+    """Crear la BD de benchmark y llenar cuentas con datos reproducibles"""
+    config = dict(BENCH_DB_CONFIG)
+    database = config.pop('database')
+    conexion = mysql.connector.connect(**config)
+    cursor = conexion.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+    cursor.execute(f"USE {database}")
+    cursor.execute("DROP TABLE IF EXISTS cuentas")
+    cursor.execute(ESQUEMA_CUENTAS)
+
+    rnd = random.Random(semilla)
+    insert = """
+        INSERT INTO cuentas (id, socio_id, numeroCuenta, saldo, estado, tipoCuenta, activo)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    inicio = time.perf_counter()
+    valores = []
+    for i in range(filas):
+        # ~1% saldos negativos, ~2% estados inconsistentes, ~0.1% números repetidos
+        saldo = round(rnd.uniform(-500, 0), 2) if rnd.random() < 0.01 else round(rnd.uniform(0, 20000), 2)
+        estado = rnd.choices(['ACTIVA', 'SUSPENDIDA', 'CANCELADA'], weights=[85, 5, 10])[0]
+        activo = 1 if estado == 'ACTIVA' else 0
+        if rnd.random() < 0.02:
+            activo = 1 - activo
+        numero = f"B-{rnd.randrange(i) if i and rnd.random() < 0.001 else i:012d}"
+        valores.append((
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            numero, saldo, estado,
+            rnd.choice(['AHORRO', 'CORRIENTE', 'PLAZO_FIJO']),
+            activo
+        ))
+        if len(valores) == lote:
+            cursor.executemany(insert, valores)
+            conexion.commit()
+            valores = []
+    if valores:
+        cursor.executemany(insert, valores)
+        conexion.commit()
+
+    cursor.execute("ANALYZE TABLE cuentas")
+    cursor.fetchall()
+    cursor.close()
+    conexion.close()
+    print(f"✅ {filas} filas sembradas en {time.perf_counter() - inicio:.1f}s")
+
+
+def ejecutar(modo, tamano_lote, workers=WORKERS, tamano_shard=TAMANO_SHARD):
+    """Ejecutar un modo y devolver (segundos, hallazgos, estadísticas)"""
+    validador = ValidadorInconsistencias(
+        tamano_lote=tamano_lote,
+        una_pasada=modo != "clasico",
+        paralelo=modo == "paralelo",
+        workers=workers,
+        tamano_shard=tamano_shard,
+        db_config=BENCH_DB_CONFIG
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not validador.conectar():
+            raise RuntimeError("No se pudo conectar a la BD de benchmark")
+        try:
+            inicio = time.perf_counter()
+            if modo == "paralelo":
+                validador.validar_en_paralelo()
+            elif modo == "una_pasada":
+                validador.validar_en_una_pasada()
+            else:
+                validador.verificar_saldos_negativos()
+                validador.verificar_estado_inconsistente()
+                validador.verificar_numeros_duplicados()
+                validador.generar_estadisticas()
+            segundos = time.perf_counter() - inicio
+        finally:
+            validador.cursor.close()
+            validador.conexion.close()
+
+    hallazgos = [json.dumps(h, sort_keys=True, default=str) for h in validador.inconsistencias]
+    return segundos, hallazgos, validador.estadisticas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validación clásica vs una pasada")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--lote-insercion", type=int, default=10_000)
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE,
+                        help="Filas por página en la paginación keyset")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Si es > 0, mide también el modo paralelo con ese número de workers")
+    parser.add_argument("--tamano-shard", type=int, default=TAMANO_SHARD)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sin-sembrar", action="store_true",
+                        help="Reutilizar la tabla sembrada en una ejecución anterior")
+    args = parser.parse_args()
+
+    if not args.sin_sembrar:
+        sembrar(args.filas, args.lote_insercion, args.semilla)
+
+    modos = ["clasico", "una_pasada"] + (["paralelo"] if args.workers > 0 else [])
+    tiempos = {modo: [] for modo in modos}
+    resultados = {}
+    for _ in range(args.repeticiones):
+        for modo in modos:
+            segundos, hallazgos, estadisticas = ejecutar(
+                modo, args.tamano_lote, args.workers, args.tamano_shard
+            )
+            tiempos[modo].append(segundos)
+            resultados[modo] = (hallazgos, estadisticas)
+
+    etiquetas = {
+        "clasico": "Clásico (7 consultas)",
+        "una_pasada": "Una pasada (motor)",
+        "paralelo": f"Paralelo ({args.workers} workers)"
+    }
+    base = min(tiempos["clasico"])
+    print("=" * 80)
+    print(f"BENCHMARK VALIDACIÓN ({args.filas} filas, mejor de {args.repeticiones})")
+    print("=" * 80)
+    for modo in modos:
+        mejor = min(tiempos[modo])
+        print(f"{etiquetas[modo]:<25}{mejor:8.2f}s  ({base / mejor:5.2f}x)")
+    print(f"{'Hallazgos':<25}{len(resultados['una_pasada'][0]):8d}")
+
+    exito = True
+    clasico, motor = resultados["clasico"], resultados["una_pasada"]
+    if (sorted(clasico[0]), clasico[1]) != (sorted(motor[0]), motor[1]):
+        print("❌ Clásico y una pasada NO coinciden en hallazgos o estadísticas")
+        exito = False
+    if "paralelo" in resultados and resultados["paralelo"] != motor:
+        print("❌ El modo paralelo NO coincide exactamente con el recorrido serial")
+        exito = False
+    if exito:
+        print("✅ Hallazgos y estadísticas idénticos en todos los modos")
+    return 0 if exito else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
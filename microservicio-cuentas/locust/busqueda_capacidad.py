@@ -0,0 +1,218 @@
+"""
+Búsqueda Automática de Capacidad (LoadTestShape)
+Sube la concurrencia por escalones hasta que algún endpoint viola el SLO y
+luego hace búsqueda binaria entre el último escalón que cumplía y el primero
+que falló. En cada punto mide una ventana propia (no el acumulado de la
+prueba) de p95, p99 y tasa de fallos por endpoint, p. ej.
+POST /cuentas/[id]/retiro o GET /cuentas/socio/[id].
+
+El punto de quiebre (máxima concurrencia que cumple el SLO) y todas las
+mediciones se guardan en locust/reportes/capacidad_YYYYMMDD_HHMMSS.json.
+
+Uso (el shape se carga junto al locustfile):
+    locust -f locust/locustfile.py,locust/busqueda_capacidad.py \\
+      --host=http://localhost:3000 --headless --slo-p95 300 --slo-p99 800
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+from locust import LoadTestShape, events
+from locust.stats import calculate_response_time_percentile, diff_response_time_dicts
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_REPORTES = "locust/reportes"
+
+
+@events.init_command_line_parser.add_listener
+def on_parser(parser):
+    grupo = parser.add_argument_group("Búsqueda de capacidad")
+    grupo.add_argument("--slo-p95", type=float, default=500, help="p95 máximo por endpoint (ms)")
+    grupo.add_argument("--slo-p99", type=float, default=1000, help="p99 máximo por endpoint (ms)")
+    grupo.add_argument("--slo-fallos", type=float, default=0.01, help="Tasa de fallos máxima por endpoint (0-1)")
+    grupo.add_argument("--paso-usuarios", type=int, default=50, help="Usuarios que se suman por escalón")
+    grupo.add_argument("--max-usuarios", type=int, default=5000, help="Tope de la búsqueda")
+    grupo.add_argument("--precision-usuarios", type=int, default=10,
+                       help="La bisección termina cuando el intervalo es menor que esto")
+    grupo.add_argument("--tasa-spawn", type=float, default=50, help="Usuarios por segundo al cambiar de punto")
+    grupo.add_argument("--calentamiento", type=float, default=10,
+                       help="Segundos entre alcanzar los usuarios y empezar a medir")
+    grupo.add_argument("--ventana", type=float, default=30, help="Segundos medidos en cada punto")
+    grupo.add_argument("--min-solicitudes", type=int, default=20,
+                       help="Solicitudes mínimas de un endpoint en la ventana para evaluarlo")
+
+
+def medir_ventana(inicial, final, min_solicitudes):
+    """
+    Métricas por endpoint entre dos instantáneas de stats.entries:
+    {clave: (num_requests, num_failures, response_times)}
+    """
+    endpoints = {}
+    for clave, (solicitudes, fallos, tiempos) in final.items():
+        solicitudes_0, fallos_0, tiempos_0 = inicial.get(clave, (0, 0, {}))
+        solicitudes -= solicitudes_0
+        fallos -= fallos_0
+        if solicitudes < min_solicitudes:
+            continue
+        delta = diff_response_time_dicts(tiempos, tiempos_0)
+        endpoints[clave] = {
+            "solicitudes": solicitudes,
+            "tasa_fallos": round(fallos / solicitudes, 4),
+            "p95_ms": calculate_response_time_percentile(delta, solicitudes, 0.95),
+            "p99_ms": calculate_response_time_percentile(delta, solicitudes, 0.99)
+        }
+    return endpoints
+
+
+def violaciones(endpoints, slo):
+    """Lista de textos con cada endpoint que no cumple el SLO"""
+    resultado = []
+    for clave, m in sorted(endpoints.items()):
+        if m["p95_ms"] > slo["p95_ms"]:
+            resultado.append(f"{clave}: p95 {m['p95_ms']}ms > {slo['p95_ms']:g}ms")
+        if m["p99_ms"] > slo["p99_ms"]:
+            resultado.append(f"{clave}: p99 {m['p99_ms']}ms > {slo['p99_ms']:g}ms")
+        if m["tasa_fallos"] > slo["tasa_fallos"]:
+            resultado.append(f"{clave}: fallos {m['tasa_fallos']:.2%} > {slo['tasa_fallos']:.2%}")
+    return resultado
+
+
+class BusquedaCapacidad(LoadTestShape):
+    """
+    Fases: 'escalones' (suma --paso-usuarios mientras se cumpla el SLO),
+    'biseccion' (entre el último punto bueno y el primero malo) y 'fin'.
+    Cada punto pasa por: lanzar usuarios -> calentamiento -> ventana medida.
+    """
+
+    # Tiempo máximo esperando a que el runner alcance los usuarios pedidos
+    ESPERA_MAX_SPAWN = 120
+
+    def reset_time(self):
+        super().reset_time()
+        self.fase = "escalones"
+        self.usuarios = 0
+        self.ultimo_ok = 0
+        self.primer_fallo = None
+        self.mediciones = []
+        self.guardado = False
+        self._iniciar_punto(None)
+
+    def _opcion(self, nombre):
+        return getattr(self.runner.environment.parsed_options, nombre)
+
+    @property
+    def slo(self):
+        return {
+            "p95_ms": self._opcion("slo_p95"),
+            "p99_ms": self._opcion("slo_p99"),
+            "tasa_fallos": self._opcion("slo_fallos")
+        }
+
+    def _iniciar_punto(self, usuarios):
+        self.usuarios = usuarios
+        self._inicio_punto = self._inicio_calentamiento = self.get_run_time()
+        self._inicio_ventana = None
+        self._instantanea = None
+
+    def _instantanea_stats(self):
+        return {
+            f"{entrada.method} {entrada.name}": (
+                entrada.num_requests, entrada.num_failures, dict(entrada.response_times)
+            )
+            for entrada in self.runner.stats.entries.values()
+        }
+
+    def tick(self):
+        if self.fase == "fin":
+            return None
+        if self.usuarios is None:
+            self._iniciar_punto(self._opcion("paso_usuarios"))
+
+        ahora = self.get_run_time()
+        tasa = self._opcion("tasa_spawn")
+        if self._inicio_ventana is None:
+            listo = self.get_current_user_count() == self.usuarios
+            if not listo and ahora - self._inicio_punto < self.ESPERA_MAX_SPAWN:
+                self._inicio_calentamiento = ahora
+                return self.usuarios, tasa
+            if ahora - self._inicio_calentamiento >= self._opcion("calentamiento"):
+                self._inicio_ventana = ahora
+                self._instantanea = self._instantanea_stats()
+            return self.usuarios, tasa
+
+        if ahora - self._inicio_ventana < self._opcion("ventana"):
+            return self.usuarios, tasa
+
+        siguiente = self._evaluar_punto(ahora)
+        if siguiente is None:
+            self.fase = "fin"
+            self.guardar()
+            return None
+        self._iniciar_punto(siguiente)
+        return self.usuarios, tasa
+
+    def _evaluar_punto(self, ahora):
+        """Registrar la medición del punto actual y devolver el próximo (None = fin)"""
+        endpoints = medir_ventana(
+            self._instantanea, self._instantanea_stats(), self._opcion("min_solicitudes")
+        )
+        problemas = violaciones(endpoints, self.slo) if endpoints else ["sin solicitudes en la ventana"]
+        cumple = not problemas
+        self.mediciones.append({
+            "fase": self.fase,
+            "usuarios": self.usuarios,
+            "segundos_ventana": round(ahora - self._inicio_ventana, 1),
+            "cumple_slo": cumple,
+            "violaciones": problemas,
+            "endpoints": endpoints
+        })
+        logger.info(
+            f"📈 Capacidad: {self.usuarios} usuarios ({self.fase}) -> "
+            f"{'cumple SLO' if cumple else 'viola SLO: ' + '; '.join(problemas)}"
+        )
+
+        if cumple:
+            self.ultimo_ok = max(self.ultimo_ok, self.usuarios)
+        else:
+            self.primer_fallo = self.usuarios if self.primer_fallo is None else min(self.primer_fallo, self.usuarios)
+
+        if self.fase == "escalones":
+            if cumple:
+                siguiente = self.usuarios + self._opcion("paso_usuarios")
+                return siguiente if siguiente <= self._opcion("max_usuarios") else None
+            self.fase = "biseccion"
+
+        if self.primer_fallo - self.ultimo_ok <= self._opcion("precision_usuarios"):
+            return None
+        return (self.ultimo_ok + self.primer_fallo) // 2
+
+    def reporte(self):
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "slo": self.slo,
+            "capacidad_usuarios": self.ultimo_ok,
+            "primer_fallo_usuarios": self.primer_fallo,
+            "busqueda_completa": self.fase == "fin",
+            "mediciones": self.mediciones
+        }
+
+    def guardar(self):
+        """Escribir capacidad_YYYYMMDD_HHMMSS.json (una vez por prueba)"""
+        if self.guardado:
+            return
+        self.guardado = True
+        os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+        archivo = f"{DIRECTORIO_REPORTES}/capacidad_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(archivo, "w") as f:
+            json.dump(self.reporte(), f, indent=2)
+        logger.info(f"✅ Capacidad: {self.ultimo_ok} usuarios cumplen el SLO. Reporte en: {archivo}")
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    """Si la prueba se detiene antes (--run-time, Ctrl+C) guardar lo medido"""
+    shape = environment.shape_class
+    if isinstance(shape, BusquedaCapacidad) and getattr(shape, "mediciones", None):
+        shape.guardar()
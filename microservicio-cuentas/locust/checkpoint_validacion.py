@@ -0,0 +1,135 @@
+"""
+Checkpoint de la Validación Incremental
+Archivo SQLite local que guarda entre ejecuciones:
+- La marca de agua: último fecha_actualizacion procesado
+- Los agregados acumulados (total, activas, por estado, saldo total y
+  hallazgos abiertos por tipo)
+- Una instantánea por cuenta (estado, activo, saldo, tipos de hallazgo) con la
+  que se resta la contribución anterior de una fila cuando vuelve a cambiar
+- Los números de cuenta con duplicados abiertos, que se vuelven a comprobar en
+  cada ejecución aunque sus filas no cambien
+
+La instantánea vive en disco, así que la memoria no depende del tamaño de la
+tabla: solo se consultan las filas de la página que se está procesando.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+RUTA_CHECKPOINT = "locust/reportes/checkpoint_validacion.sqlite3"
+
+
+class CheckpointValidacion:
+    def __init__(self, ruta=RUTA_CHECKPOINT):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)"
+        )
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS instantanea (
+                id TEXT PRIMARY KEY,
+                estado TEXT NOT NULL,
+                activo INTEGER NOT NULL,
+                saldo TEXT NOT NULL,
+                tipos TEXT NOT NULL
+            )
+        """)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS duplicados (numero_cuenta TEXT PRIMARY KEY)"
+        )
+
+    def reiniciar(self):
+        """Descartar marca de agua, agregados e instantánea (reconstrucción completa)"""
+        self.conexion.execute("DELETE FROM meta")
+        self.conexion.execute("DELETE FROM instantanea")
+        self.conexion.execute("DELETE FROM duplicados")
+        self.conexion.commit()
+
+    def _leer_meta(self, clave):
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _escribir_meta(self, clave, valor):
+        self.conexion.execute(
+            "INSERT INTO meta (clave, valor) VALUES (?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+            (clave, valor)
+        )
+
+    @property
+    def marca_agua(self):
+        valor = self._leer_meta("marca_agua")
+        return datetime.fromisoformat(valor) if valor else None
+
+    @marca_agua.setter
+    def marca_agua(self, fecha):
+        self._escribir_meta("marca_agua", fecha.isoformat())
+
+    @property
+    def agregados(self):
+        valor = self._leer_meta("agregados")
+        if valor is None:
+            return {
+                "total": 0,
+                "activas": 0,
+                "por_estado": {},
+                "saldo_total": Decimal("0"),
+                "abiertas_por_tipo": {}
+            }
+        agregados = json.loads(valor)
+        agregados["saldo_total"] = Decimal(agregados["saldo_total"])
+        return agregados
+
+    @agregados.setter
+    def agregados(self, agregados):
+        self._escribir_meta("agregados", json.dumps(
+            dict(agregados, saldo_total=str(agregados["saldo_total"]))
+        ))
+
+    def anteriores(self, ids):
+        """Instantánea guardada de las cuentas indicadas: {id: (estado, activo, saldo, tipos)}"""
+        resultado = {}
+        ids = list(ids)
+        # SQLite limita los parámetros por consulta
+        for inicio in range(0, len(ids), 500):
+            trozo = ids[inicio:inicio + 500]
+            marcadores = ", ".join("?" * len(trozo))
+            for id_, estado, activo, saldo, tipos in self.conexion.execute(
+                f"SELECT id, estado, activo, saldo, tipos FROM instantanea WHERE id IN ({marcadores})",
+                trozo
+            ):
+                resultado[id_] = (estado, activo, Decimal(saldo), tipos.split(",") if tipos else [])
+        return resultado
+
+    def guardar_filas(self, filas):
+        """Actualizar la instantánea con [(id, estado, activo, saldo, [tipos])]"""
+        self.conexion.executemany(
+            "INSERT INTO instantanea (id, estado, activo, saldo, tipos) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET estado = excluded.estado, activo = excluded.activo, "
+            "saldo = excluded.saldo, tipos = excluded.tipos",
+            [(id_, estado, activo, str(saldo), ",".join(tipos)) for id_, estado, activo, saldo, tipos in filas]
+        )
+
+    @property
+    def duplicados(self):
+        """Números de cuenta con duplicados abiertos en la última ejecución"""
+        return {fila[0] for fila in self.conexion.execute("SELECT numero_cuenta FROM duplicados")}
+
+    @duplicados.setter
+    def duplicados(self, numeros):
+        self.conexion.execute("DELETE FROM duplicados")
+        self.conexion.executemany(
+            "INSERT INTO duplicados (numero_cuenta) VALUES (?)", [(numero,) for numero in numeros]
+        )
+
+    def confirmar(self):
+        self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.close()
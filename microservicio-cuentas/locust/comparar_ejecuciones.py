@@ -0,0 +1,437 @@
+"""
+Comparación de Ejecuciones (pre/post) con Presupuesto de Regresión
+Guarda cada ejecución de Locust en una base SQLite local y compara dos de
+ellas por endpoint, con intervalos de confianza, en lugar de hacer diff de
+reportes HTML y llenar la tabla a mano.
+
+Por ejecución se importan:
+- <prefijo>_stats.csv y <prefijo>_stats_history.csv (locust --csv <prefijo>;
+  con --csv-full-history el historial trae cada endpoint, no solo Aggregated)
+- inconsistencias_*.json del locustfile y validacion_bd_*.json del validador
+
+Intervalos de confianza: método de medias por lotes sobre el historial (se
+descarta el calentamiento, el resto se parte en lotes consecutivos y la media
+de cada lote se trata como una observación casi independiente). La diferencia
+entre ejecuciones usa Welch con la t de Student.
+
+Uso:
+    python locust/comparar_ejecuciones.py importar pre --csv locust/reportes/pre
+    python locust/comparar_ejecuciones.py importar post --csv locust/reportes/post
+    python locust/comparar_ejecuciones.py comparar pre post
+    python locust/comparar_ejecuciones.py listar
+"""
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+DIRECTORIO_REPORTES = "locust/reportes"
+RUTA_RESULTADOS = "locust/reportes/resultados.sqlite3"
+RUTA_PRESUPUESTO = "locust/presupuesto_regresion.json"
+
+# Lotes del método de medias por lotes y segundos iniciales que se descartan
+LOTES = 10
+CALENTAMIENTO = 30
+
+# t de Student al 97.5% (IC bilateral del 95%) por grados de libertad
+T_975 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+    15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 22: 2.074,
+    24: 2.064, 26: 2.056, 28: 2.048, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980
+}
+
+# Métricas comparadas (columnas de historial/endpoints) -> clave del presupuesto
+METRICAS = {
+    "rps": "rps_caida_max_pct",
+    "p95_ms": "p95_aumento_max_pct",
+    "p99_ms": "p99_aumento_max_pct"
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY,
+    etiqueta TEXT UNIQUE NOT NULL,
+    importada TEXT NOT NULL,
+    csv_prefijo TEXT,
+    inconsistencias INTEGER,
+    inconsistencias_por_tipo TEXT,
+    validacion_bd INTEGER,
+    validacion_bd_por_tipo TEXT
+);
+CREATE TABLE IF NOT EXISTS endpoints (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    solicitudes INTEGER,
+    fallos INTEGER,
+    rps REAL,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    PRIMARY KEY (ejecucion_id, endpoint)
+);
+CREATE TABLE IF NOT EXISTS historial (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id) ON DELETE CASCADE,
+    segundo INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    usuarios INTEGER,
+    rps REAL,
+    p95_ms REAL,
+    p99_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_historial_ejecucion ON historial (ejecucion_id, endpoint, segundo);
+"""
+
+
+def t_student(grados):
+    """t al 97.5% interpolada linealmente en la tabla (1.96 para muchos grados)"""
+    if grados < 1:
+        return float("nan")
+    claves = sorted(T_975)
+    if grados >= claves[-1]:
+        return 1.96
+    for menor, mayor in zip(claves, claves[1:]):
+        if menor <= grados <= mayor:
+            fraccion = (grados - menor) / (mayor - menor)
+            return T_975[menor] + fraccion * (T_975[mayor] - T_975[menor])
+    return T_975[claves[0]]
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _endpoint(fila):
+    """'POST /cuentas/[id]/retiro' o 'Aggregated'"""
+    return f"{fila['Type']} {fila['Name']}".strip() if fila["Type"] else fila["Name"]
+
+
+def _ultimo_reporte(patron):
+    archivos = sorted(glob.glob(os.path.join(DIRECTORIO_REPORTES, patron)))
+    return archivos[-1] if archivos else None
+
+
+def conectar(ruta=RUTA_RESULTADOS):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("PRAGMA foreign_keys = ON")
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+def importar(conexion, etiqueta, prefijo, archivo_inconsistencias=None, archivo_validacion=None):
+    """Guardar una ejecución (reemplaza la que tenga la misma etiqueta)"""
+    inconsistencias = validacion = None
+    if archivo_inconsistencias:
+        with open(archivo_inconsistencias, encoding="utf-8") as f:
+            inconsistencias = json.load(f)
+    if archivo_validacion:
+        with open(archivo_validacion, encoding="utf-8") as f:
+            validacion = json.load(f)
+
+    conexion.execute("DELETE FROM ejecuciones WHERE etiqueta = ?", (etiqueta,))
+    cursor = conexion.execute(
+        "INSERT INTO ejecuciones (etiqueta, importada, csv_prefijo, inconsistencias, "
+        "inconsistencias_por_tipo, validacion_bd, validacion_bd_por_tipo) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            etiqueta, datetime.now().isoformat(), prefijo,
+            inconsistencias["total_inconsistencias"] if inconsistencias else None,
+            json.dumps(inconsistencias["por_tipo"]) if inconsistencias else None,
+            validacion["total_inconsistencias"] if validacion else None,
+            json.dumps(validacion["inconsistencias_por_tipo"]) if validacion else None
+        )
+    )
+    ejecucion_id = cursor.lastrowid
+
+    with open(f"{prefijo}_stats.csv", newline="", encoding="utf-8") as f:
+        conexion.executemany(
+            "INSERT INTO endpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    ejecucion_id, _endpoint(fila),
+                    int(fila["Request Count"]), int(fila["Failure Count"]),
+                    _numero(fila["Requests/s"]), _numero(fila["50%"]),
+                    _numero(fila["95%"]), _numero(fila["99%"])
+                )
+                for fila in csv.DictReader(f)
+            ]
+        )
+
+    historial = f"{prefijo}_stats_history.csv"
+    filas_historial = 0
+    if os.path.exists(historial):
+        with open(historial, newline="", encoding="utf-8") as f:
+            filas = [
+                (
+                    ejecucion_id, int(fila["Timestamp"]), _endpoint(fila),
+                    int(fila["User Count"]), _numero(fila["Requests/s"]),
+                    _numero(fila["95%"]), _numero(fila["99%"])
+                )
+                for fila in csv.DictReader(f)
+            ]
+        conexion.executemany("INSERT INTO historial VALUES (?, ?, ?, ?, ?, ?, ?)", filas)
+        filas_historial = len(filas)
+
+    conexion.commit()
+    return ejecucion_id, filas_historial
+
+
+def medias_por_lotes(valores, lotes=LOTES):
+    """Media, desviación estándar de las medias de lote y número de lotes"""
+    if len(valores) < 2 * lotes:
+        lotes = len(valores) // 2
+    if lotes < 2:
+        return None
+    tamano = len(valores) // lotes
+    medias = [sum(valores[i * tamano:(i + 1) * tamano]) / tamano for i in range(lotes)]
+    media = sum(medias) / lotes
+    varianza = sum((m - media) ** 2 for m in medias) / (lotes - 1)
+    return media, math.sqrt(varianza), lotes
+
+
+def serie(conexion, ejecucion_id, endpoint, columna, calentamiento):
+    """Valores del historial tras el calentamiento, con usuarios > 0"""
+    filas = conexion.execute(
+        f"SELECT segundo, {columna} FROM historial "
+        "WHERE ejecucion_id = ? AND endpoint = ? AND usuarios > 0 ORDER BY segundo",
+        (ejecucion_id, endpoint)
+    ).fetchall()
+    if not filas:
+        return []
+    inicio = filas[0][0] + calentamiento
+    return [valor for segundo, valor in filas if segundo >= inicio and valor is not None]
+
+
+def diferencia(base, nueva):
+    """Diferencia de medias con IC 95% de Welch: (delta, bajo, alto) o None"""
+    if base is None or nueva is None:
+        return None
+    (m1, s1, n1), (m2, s2, n2) = base, nueva
+    v1, v2 = s1 ** 2 / n1, s2 ** 2 / n2
+    error = math.sqrt(v1 + v2)
+    if error == 0:
+        return m2 - m1, m2 - m1, m2 - m1
+    grados = (v1 + v2) ** 2 / ((v1 ** 2 / (n1 - 1) if n1 > 1 else 0) + (v2 ** 2 / (n2 - 1) if n2 > 1 else 0))
+    margen = t_student(grados) * error
+    delta = m2 - m1
+    return delta, delta - margen, delta + margen
+
+
+def _ejecucion(conexion, etiqueta):
+    fila = conexion.execute(
+        "SELECT id, inconsistencias, inconsistencias_por_tipo, validacion_bd FROM ejecuciones WHERE etiqueta = ?",
+        (etiqueta,)
+    ).fetchone()
+    if fila is None:
+        raise SystemExit(f"❌ No existe la ejecución '{etiqueta}' (usar: importar {etiqueta} --csv ...)")
+    return fila
+
+
+def comparar(conexion, etiqueta_base, etiqueta_nueva, calentamiento=CALENTAMIENTO, lotes=LOTES):
+    """Comparación por endpoint: métricas finales, IC de cada una y de su diferencia"""
+    base, nueva = _ejecucion(conexion, etiqueta_base), _ejecucion(conexion, etiqueta_nueva)
+    totales = {
+        ejecucion_id: {
+            endpoint: {"solicitudes": solicitudes, "fallos": fallos, "rps": rps, "p95_ms": p95, "p99_ms": p99}
+            for endpoint, solicitudes, fallos, rps, p95, p99 in conexion.execute(
+                "SELECT endpoint, solicitudes, fallos, rps, p95_ms, p99_ms FROM endpoints WHERE ejecucion_id = ?",
+                (ejecucion_id,)
+            )
+        }
+        for ejecucion_id in (base[0], nueva[0])
+    }
+
+    endpoints = {}
+    for endpoint in sorted(set(totales[base[0]]) & set(totales[nueva[0]])):
+        t_base, t_nueva = totales[base[0]][endpoint], totales[nueva[0]][endpoint]
+        resultado = {
+            "tasa_fallos": (
+                t_base["fallos"] / t_base["solicitudes"] if t_base["solicitudes"] else 0.0,
+                t_nueva["fallos"] / t_nueva["solicitudes"] if t_nueva["solicitudes"] else 0.0
+            )
+        }
+        for metrica in METRICAS:
+            lote_base = medias_por_lotes(serie(conexion, base[0], endpoint, metrica, calentamiento), lotes)
+            lote_nueva = medias_por_lotes(serie(conexion, nueva[0], endpoint, metrica, calentamiento), lotes)
+            if lote_base and lote_nueva:
+                valor_base, valor_nueva = lote_base[0], lote_nueva[0]
+            else:
+                # Sin historial del endpoint: solo la estimación puntual de stats.csv
+                valor_base, valor_nueva = t_base[metrica], t_nueva[metrica]
+            resultado[metrica] = {
+                "base": valor_base,
+                "nueva": valor_nueva,
+                "delta_ic95": diferencia(lote_base, lote_nueva)
+            }
+        endpoints[endpoint] = resultado
+
+    return {
+        "base": etiqueta_base,
+        "nueva": etiqueta_nueva,
+        "endpoints": endpoints,
+        "inconsistencias": (base[1], nueva[1]),
+        "validacion_bd": (base[3], nueva[3])
+    }
+
+
+def _pct(delta, base):
+    return 100.0 * delta / base if base else float("inf") if delta else 0.0
+
+
+def evaluar_presupuesto(comparacion, presupuesto):
+    """
+    Lista de regresiones que superan el presupuesto. Con IC se exige además
+    que la diferencia sea significativa (el IC no incluye el 0); sin IC se usa
+    la estimación puntual.
+    """
+    regresiones = []
+    for endpoint, resultado in comparacion["endpoints"].items():
+        limites = dict(presupuesto)
+        limites.update(presupuesto.get("endpoints", {}).get(endpoint, {}))
+
+        for metrica, clave in METRICAS.items():
+            if clave not in limites:
+                continue
+            datos = resultado[metrica]
+            if datos["base"] is None or datos["nueva"] is None:
+                continue
+            # Más RPS es mejor; más latencia es peor
+            empeora = datos["base"] - datos["nueva"] if metrica == "rps" else datos["nueva"] - datos["base"]
+            if _pct(empeora, datos["base"]) <= limites[clave]:
+                continue
+            ic = datos["delta_ic95"]
+            if ic is not None and ic[1] <= 0 <= ic[2]:
+                # La diferencia no es significativa
+                continue
+            regresiones.append(
+                f"{endpoint}: {metrica} {datos['base']:.1f} -> {datos['nueva']:.1f} "
+                f"({_pct(empeora, datos['base']):+.1f}% peor, límite {limites[clave]}%)"
+            )
+
+        if "tasa_fallos_aumento_max" in limites:
+            antes, despues = resultado["tasa_fallos"]
+            if despues - antes > limites["tasa_fallos_aumento_max"]:
+                regresiones.append(
+                    f"{endpoint}: tasa de fallos {antes:.2%} -> {despues:.2%} "
+                    f"(límite +{limites['tasa_fallos_aumento_max']:.2%})"
+                )
+
+    for campo in ("inconsistencias", "validacion_bd"):
+        clave = f"{campo}_aumento_max"
+        antes, despues = comparacion[campo]
+        if clave in presupuesto and antes is not None and despues is not None:
+            if despues - antes > presupuesto[clave]:
+                regresiones.append(f"{campo}: {antes} -> {despues} (límite +{presupuesto[clave]})")
+    return regresiones
+
+
+def _formato_ic(datos):
+    ic = datos["delta_ic95"]
+    if ic is None:
+        return "sin IC"
+    return f"[{ic[1]:+.1f}, {ic[2]:+.1f}]"
+
+
+def imprimir_comparacion(comparacion):
+    print("=" * 100)
+    print(f"COMPARACIÓN {comparacion['base']} -> {comparacion['nueva']} (Δ con IC 95% por medias por lotes)")
+    print("=" * 100)
+    for endpoint, resultado in comparacion["endpoints"].items():
+        print(f"\n{endpoint}")
+        for metrica in METRICAS:
+            datos = resultado[metrica]
+            if datos["base"] is None or datos["nueva"] is None:
+                continue
+            delta = datos["nueva"] - datos["base"]
+            print(f"  {metrica:<8}{datos['base']:>10.1f} -> {datos['nueva']:>10.1f}"
+                  f"   Δ {delta:+9.1f} ({_pct(delta, datos['base']):+6.1f}%)  IC95 {_formato_ic(datos)}")
+        antes, despues = resultado["tasa_fallos"]
+        print(f"  {'fallos':<8}{antes:>10.2%} -> {despues:>10.2%}")
+    print()
+    for titulo, campo in (("Inconsistencias (Locust)", "inconsistencias"), ("Inconsistencias (BD)", "validacion_bd")):
+        antes, despues = ("-" if v is None else v for v in comparacion[campo])
+        print(f"{titulo + ':':<26}{antes} -> {despues}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar ejecuciones de Locust con presupuesto de regresión")
+    parser.add_argument("--bd", default=RUTA_RESULTADOS, help="Base SQLite de resultados")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_importar = sub.add_parser("importar", help="Guardar una ejecución")
+    p_importar.add_argument("etiqueta")
+    p_importar.add_argument("--csv", required=True, help="Prefijo usado en locust --csv")
+    p_importar.add_argument("--inconsistencias", help="inconsistencias_*.json (por defecto el más reciente)")
+    p_importar.add_argument("--validacion", help="validacion_bd_*.json (por defecto el más reciente)")
+    p_importar.add_argument("--sin-reportes", action="store_true",
+                            help="No asociar reportes JSON de inconsistencias")
+
+    p_comparar = sub.add_parser("comparar", help="Comparar dos ejecuciones")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nueva")
+    p_comparar.add_argument("--presupuesto", default=RUTA_PRESUPUESTO)
+    p_comparar.add_argument("--calentamiento", type=int, default=CALENTAMIENTO,
+                            help="Segundos iniciales del historial que se descartan")
+    p_comparar.add_argument("--lotes", type=int, default=LOTES)
+    p_comparar.add_argument("--json", help="Guardar la comparación en este archivo")
+
+    sub.add_parser("listar", help="Listar ejecuciones guardadas")
+    args = parser.parse_args()
+
+    conexion = conectar(args.bd)
+    try:
+        if args.comando == "importar":
+            inconsistencias = validacion = None
+            if not args.sin_reportes:
+                inconsistencias = args.inconsistencias or _ultimo_reporte("inconsistencias_*.json")
+                validacion = args.validacion or _ultimo_reporte("validacion_bd_*.json")
+            _, filas = importar(conexion, args.etiqueta, args.csv, inconsistencias, validacion)
+            print(f"✅ Ejecución '{args.etiqueta}' importada ({filas} filas de historial)")
+            print(f"   Inconsistencias: {inconsistencias or '-'}")
+            print(f"   Validación BD:   {validacion or '-'}")
+            if not filas:
+                print("⚠️  Sin stats_history: no habrá intervalos de confianza")
+            return 0
+
+        if args.comando == "listar":
+            for etiqueta, importada, inconsistencias, validacion in conexion.execute(
+                "SELECT etiqueta, importada, inconsistencias, validacion_bd FROM ejecuciones ORDER BY id"
+            ):
+                print(f"{etiqueta:<20}{importada:<28}inconsistencias={inconsistencias} validacion_bd={validacion}")
+            return 0
+
+        comparacion = comparar(conexion, args.base, args.nueva, args.calentamiento, args.lotes)
+        imprimir_comparacion(comparacion)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(comparacion, f, indent=2, ensure_ascii=False)
+
+        if not os.path.exists(args.presupuesto):
+            print(f"\n⚠️  Sin presupuesto ({args.presupuesto}): no se evalúan regresiones")
+            return 0
+        with open(args.presupuesto, encoding="utf-8") as f:
+            presupuesto = json.load(f)
+        regresiones = evaluar_presupuesto(comparacion, presupuesto)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones fuera de presupuesto:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            return 1
+        print("\n✅ Dentro del presupuesto de regresión")
+        return 0
+    finally:
+        conexion.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
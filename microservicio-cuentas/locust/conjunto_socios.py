@@ -0,0 +1,126 @@
+"""
+Conjunto de Ids de Socios para la verificación de cuentas huérfanas
+Los socios viven en otra base (PostgreSQL del microservicio socios), así que
+no hay JOIN posible con cuentas. Los ids se leen por lotes, desde esa base o
+desde un archivo exportado, a un arreglo NumPy ordenado de UUIDs en binario
+(16 bytes por socio: 10M socios ≈ 160 MB, sin objetos Python por id), y cada
+lote de cuentas.socio_id se busca en él con searchsorted (vectorizado,
+O(log n) por cuenta y resultado exacto).
+"""
+import gzip
+import uuid
+
+import numpy as np
+
+# Configuración de la base de socios (ver socios/src/main/resources/application.properties)
+SOCIOS_DB_CONFIG = {
+    'host': 'localhost',
+    'port': 5433,
+    'user': 'postgres',
+    'password': 'postgres',
+    'dbname': 'cooperativa_socios'
+}
+
+# Ids por lote al leer socios
+LOTE_SOCIOS = 100000
+
+# Capacidad inicial del arreglo si no se conoce el total
+CAPACIDAD_INICIAL = 1 << 20
+
+TIPO_ID = "S16"
+
+
+def uuid_a_bytes(valor):
+    """UUID (objeto o texto) -> 16 bytes; None si no es un UUID válido"""
+    if isinstance(valor, uuid.UUID):
+        return valor.bytes
+    try:
+        return uuid.UUID(str(valor).strip()).bytes
+    except ValueError:
+        return None
+
+
+def leer_socios_postgres(config=None, lote=LOTE_SOCIOS):
+    """
+    (total, lotes de ids) desde PostgreSQL con un cursor del lado del
+    servidor, así solo hay un lote en memoria. Necesita psycopg (v3).
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("Se necesita psycopg para leer la base de socios: pip install 'psycopg[binary]'")
+
+    conexion = psycopg.connect(**(config or SOCIOS_DB_CONFIG))
+    total = conexion.execute("SELECT COUNT(*) FROM socios").fetchone()[0]
+
+    def lotes():
+        try:
+            with conexion.cursor(name="socios_ids") as cursor:
+                cursor.itersize = lote
+                cursor.execute("SELECT id FROM socios")
+                while True:
+                    filas = cursor.fetchmany(lote)
+                    if not filas:
+                        return
+                    yield [fila[0] for fila in filas]
+        finally:
+            conexion.close()
+
+    return total, lotes()
+
+
+def leer_socios_archivo(ruta, lote=LOTE_SOCIOS):
+    """
+    (None, lotes de ids) desde un archivo con un id por línea (.gz opcional),
+    p. ej. exportado con: \\copy (SELECT id FROM socios) TO 'socios.txt'
+    """
+    def lotes():
+        abrir = gzip.open if ruta.endswith(".gz") else open
+        with abrir(ruta, "rt", encoding="utf-8") as f:
+            actual = []
+            for linea in f:
+                if linea.strip():
+                    actual.append(linea)
+                if len(actual) >= lote:
+                    yield actual
+                    actual = []
+            if actual:
+                yield actual
+
+    return None, lotes()
+
+
+class ConjuntoIds:
+    """Ids de 16 bytes ordenados; contiene() busca un lote completo de una vez"""
+
+    def __init__(self, total=None, lotes=()):
+        self.ids = np.empty(total or CAPACIDAD_INICIAL, dtype=TIPO_ID)
+        self.invalidos = 0
+        n = 0
+        for lote in lotes:
+            binarios = [b for b in map(uuid_a_bytes, lote) if b is not None]
+            self.invalidos += len(lote) - len(binarios)
+            if n + len(binarios) > len(self.ids):
+                self.ids = np.resize(self.ids, max(2 * len(self.ids), n + len(binarios)))
+            self.ids[n:n + len(binarios)] = binarios
+            n += len(binarios)
+        self.ids = self.ids[:n]
+        self.ids.sort(kind="stable")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def bytes_usados(self):
+        return self.ids.nbytes
+
+    def contiene(self, valores):
+        """Arreglo booleano: qué valores (UUID o texto) están en el conjunto"""
+        binarios = [uuid_a_bytes(valor) for valor in valores]
+        validos = np.array([b is not None for b in binarios], dtype=bool)
+        consulta = np.array([b or b"" for b in binarios], dtype=TIPO_ID)
+        if not len(self.ids):
+            return np.zeros(len(valores), dtype=bool)
+        posiciones = np.searchsorted(self.ids, consulta)
+        encontrados = self.ids[np.minimum(posiciones, len(self.ids) - 1)] == consulta
+        return validos & encontrados
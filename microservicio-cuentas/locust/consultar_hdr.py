@@ -0,0 +1,65 @@
+"""
+Consultar percentiles de los histogramas HDR guardados por el locustfile
+Uso:
+    python locust/consultar_hdr.py locust/reportes/hdr_20260127_234530.json
+    python locust/consultar_hdr.py locust/reportes/hdr_*.json -p 50 99 99.9 99.99
+    python locust/consultar_hdr.py hdr_a.json --endpoint "POST /cuentas/[id]/retiro"
+
+Con varios archivos los histogramas del mismo endpoint se suman sin pérdida.
+"""
+import argparse
+import json
+import sys
+
+from histogramas_hdr import cargar, histograma_vacio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentiles de histogramas HDR por endpoint")
+    parser.add_argument("archivos", nargs="+", help="Archivos hdr_*.json")
+    parser.add_argument("-p", "--percentiles", nargs="+", type=float, default=[50, 95, 99, 99.9])
+    parser.add_argument("--endpoint", action="append", help="Filtrar por endpoint (se puede repetir)")
+    parser.add_argument("--total", action="store_true", help="Agregar una fila con todos los endpoints")
+    parser.add_argument("--json", action="store_true", help="Salida JSON en lugar de tabla")
+    args = parser.parse_args()
+
+    histogramas = cargar(args.archivos)
+    if args.endpoint:
+        histogramas = {clave: h for clave, h in histogramas.items() if clave in args.endpoint}
+    if not histogramas:
+        print("❌ No hay endpoints que mostrar")
+        return 1
+    if args.total:
+        total = histograma_vacio()
+        for histograma in histogramas.values():
+            total.add(histograma)
+        histogramas["TOTAL"] = total
+
+    # Valores en ms (los histogramas registran microsegundos)
+    filas = {
+        clave: {
+            "solicitudes": h.get_total_count(),
+            "min_ms": h.get_min_value() / 1000,
+            "media_ms": round(h.get_mean_value() / 1000, 3),
+            "max_ms": h.get_max_value() / 1000,
+            **{f"p{p:g}_ms": h.get_value_at_percentile(p) / 1000 for p in args.percentiles}
+        }
+        for clave, h in histogramas.items()
+    }
+
+    if args.json:
+        print(json.dumps(filas, indent=2, ensure_ascii=False))
+        return 0
+
+    columnas = ["solicitudes", "min_ms", "media_ms"] + [f"p{p:g}_ms" for p in args.percentiles] + ["max_ms"]
+    ancho = max(len(clave) for clave in filas) + 2
+    print(f"{'Endpoint':<{ancho}}" + "".join(f"{c:>13}" for c in columnas))
+    for clave, fila in filas.items():
+        print(f"{clave:<{ancho}}" + "".join(
+            f"{fila[c]:>13d}" if c == "solicitudes" else f"{fila[c]:>13.3f}" for c in columnas
+        ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
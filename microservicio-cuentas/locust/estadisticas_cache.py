@@ -0,0 +1,94 @@
+"""
+Contadores de la caché de lecturas del servicio durante una prueba
+El servicio expone aciertos, fallos y expulsiones en GET /cuentas/cache/estadisticas
+(acumulados desde que arrancó el proceso). Se leen al empezar y al terminar
+la prueba y se restan, junto con los contadores globales de MySQL
+(Com_select e Innodb_rows_read), para ver la tasa de aciertos de esta prueba
+y cuánta carga de lectura dejó de llegar a la base.
+
+Los contadores de MySQL son de todo el servidor: incluyen las consultas del
+monitor de invariantes y de cualquier otro cliente. Para comparar con y sin
+caché conviene correr la misma prueba con CUENTAS_CACHE_TAMANO=0.
+"""
+import requests
+import mysql.connector
+
+from validar_inconsistencias import DB_CONFIG
+
+RUTA_ESTADISTICAS = "/cuentas/cache/estadisticas"
+
+# Contadores que se restan entre inicio y fin (el resto se toma del final)
+CONTADORES_CACHE = (
+    "aciertos", "fallos", "coalescidas", "expulsiones", "expiradas", "invalidaciones", "descartadas"
+)
+VARIABLES_MYSQL = ("Com_select", "Innodb_rows_read")
+
+
+def leer_estadisticas_cache(host, timeout=5):
+    """Contadores del servicio; None si el endpoint no existe o no responde"""
+    try:
+        respuesta = requests.get(host.rstrip("/") + RUTA_ESTADISTICAS, timeout=timeout)
+        if respuesta.status_code != 200:
+            return None
+        return respuesta.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def leer_estado_mysql(db_config=None):
+    """SHOW GLOBAL STATUS de VARIABLES_MYSQL; None si no hay conexión"""
+    try:
+        conexion = mysql.connector.connect(**(db_config or DB_CONFIG))
+    except mysql.connector.Error:
+        return None
+    try:
+        cursor = conexion.cursor()
+        marcadores = ", ".join(["%s"] * len(VARIABLES_MYSQL))
+        cursor.execute(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({marcadores})", VARIABLES_MYSQL)
+        return {nombre: int(valor) for nombre, valor in cursor.fetchall()}
+    finally:
+        conexion.close()
+
+
+class MedicionCache:
+    """Lecturas al inicio y al final de la prueba y su diferencia"""
+
+    def __init__(self, host, db_config=None):
+        self.host = host
+        self.db_config = db_config
+        self.inicio = None
+        self.inicio_mysql = None
+
+    def iniciar(self):
+        self.inicio = leer_estadisticas_cache(self.host)
+        self.inicio_mysql = leer_estado_mysql(self.db_config)
+        return self.inicio is not None
+
+    def resumen(self, duracion_s=None):
+        """Diferencias desde iniciar(); None si el servicio no expone la caché"""
+        fin = leer_estadisticas_cache(self.host)
+        if fin is None:
+            return None
+        fin_mysql = leer_estado_mysql(self.db_config)
+        inicio = self.inicio or {}
+        delta = {clave: fin.get(clave, 0) - inicio.get(clave, 0) for clave in CONTADORES_CACHE}
+        lecturas = delta["aciertos"] + delta["fallos"]
+        resultado = {
+            "habilitada": fin.get("habilitada", False),
+            "capacidad": fin.get("capacidad"),
+            "ttl_ms": fin.get("ttlMs"),
+            "tamano_final": fin.get("tamano"),
+            **delta,
+            "lecturas": lecturas,
+            "tasa_aciertos": round(delta["aciertos"] / lecturas, 4) if lecturas else None,
+            # Cada fallo no coalescido es una consulta a MySQL; cada acierto, una que se evitó
+            "consultas_evitadas": delta["aciertos"] + delta["coalescidas"],
+        }
+        if fin_mysql and self.inicio_mysql:
+            mysql_delta = {nombre: fin_mysql[nombre] - self.inicio_mysql.get(nombre, 0) for nombre in fin_mysql}
+            resultado["mysql"] = mysql_delta
+            if duracion_s:
+                resultado["mysql_por_segundo"] = {
+                    nombre: round(valor / duracion_s, 2) for nombre, valor in mysql_delta.items()
+                }
+        return resultado
@@ -0,0 +1,411 @@
+"""
+Generador de Datos Sintéticos a Gran Escala (cuentas + auditoria_cuentas)
+Escribe N cuentas (de 10k a 50M) y su auditoría a CSV con NumPy, por bloques
+y sin bucles por fila, y las carga con LOAD DATA LOCAL INFILE en la base de
+benchmark (BENCH_DB_CONFIG de benchmark_una_pasada.py).
+
+Distribuciones (sesgadas, como en producción):
+- socio_id: N / CUENTAS_POR_SOCIO socios; el socio de cada cuenta es
+  floor(socios * u^SESGO_SOCIOS), así unos pocos socios concentran muchas
+  cuentas (el primero, ~1/sqrt(socios) del total)
+- estado: 85% ACTIVA, 5% SUSPENDIDA, 10% CANCELADA; activo = ACTIVA, con un
+  2% invertido (estados inconsistentes para el validador)
+- saldo: log-normal (mediana ~3000), 1% negativo
+- tipoCuenta: 60% AHORRO, 30% CORRIENTE, 10% PLAZO_FIJO
+- fecha_creacion: últimos 5 años, más densa cerca del final
+- auditoría: cambios de saldo por cuenta ~ Poisson con media
+  --auditoria-por-cuenta y peso de cola pesada (cuentas "calientes"); cada
+  cadena "Saldo actualizado de X a Y" es continua y termina en el saldo de
+  la cuenta, como la escribe el trigger
+
+Todos los campos tienen ancho fijo: cada bloque es una matriz de bytes que se
+escribe de una vez. Los enums van como índice y las fechas como epoch; LOAD
+DATA los convierte con SET. Cada bloque usa su propio generador
+(semilla, bloque): la misma semilla produce los mismos archivos.
+
+Los números de cuenta son GEN-000000000000, GEN-000000000001, ... (se pueden
+borrar con reiniciar_datos.py --prefijos GEN-).
+
+Uso:
+    cd locust
+    python generar_dataset.py --cuentas 1000000
+    python generar_dataset.py --cuentas 50000000 --sin-cargar   # solo CSV
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import mysql.connector
+import numpy as np
+
+from benchmark_una_pasada import BENCH_DB_CONFIG
+
+DIRECTORIO_DATASETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets")
+
+TAMANO_BLOQUE = 1_000_000
+CUENTAS_POR_SOCIO = 3
+SESGO_SOCIOS = 2.0
+AUDITORIA_POR_CUENTA = 2.0
+
+ESTADOS = ("ACTIVA", "SUSPENDIDA", "CANCELADA")
+PESOS_ESTADOS = (0.85, 0.05, 0.10)
+TIPOS_CUENTA = ("AHORRO", "CORRIENTE", "PLAZO_FIJO")
+PESOS_TIPOS = (0.60, 0.30, 0.10)
+FRACCION_NEGATIVOS = 0.01
+FRACCION_INCONSISTENTES = 0.02
+
+# Fechas entre FIN_FECHAS - SPAN_FECHAS y FIN_FECHAS (epoch UTC, fijo para reproducir)
+FIN_FECHAS = 1767225600  # 2026-01-01
+SPAN_FECHAS = 5 * 365 * 86400
+
+PREFIJO_NUMERO = "GEN-"
+DIGITOS_NUMERO = 12
+# Saldo en centavos: signo ('0' o '-'), 10 enteros, punto, 2 decimales
+MAX_CENTAVOS = 10 ** 12 - 1
+
+ESQUEMA_CUENTAS = """
+CREATE TABLE cuentas (
+    id VARCHAR(36) PRIMARY KEY,
+    socio_id VARCHAR(36) NOT NULL,
+    numeroCuenta VARCHAR(20) NOT NULL,
+    saldo DECIMAL(15,2) DEFAULT 0.00,
+    estado ENUM('ACTIVA', 'SUSPENDIDA', 'CANCELADA') DEFAULT 'ACTIVA',
+    tipoCuenta VARCHAR(50) NOT NULL,
+    fecha_creacion DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+    fecha_actualizacion DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    activo TINYINT DEFAULT 1,
+    UNIQUE KEY uq_cuentas_numero (numeroCuenta)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+ESQUEMA_AUDITORIA = """
+CREATE TABLE auditoria_cuentas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    cuenta_id VARCHAR(36),
+    accion VARCHAR(50) NOT NULL,
+    descripcion TEXT,
+    usuario VARCHAR(100),
+    ip_address VARCHAR(45),
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (cuenta_id) REFERENCES cuentas(id) ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Índices secundarios de mysql-init/01-init.sql y de la entidad; se crean
+# después de la carga (un ALTER por tabla es mucho más rápido que mantenerlos
+# fila a fila durante LOAD DATA)
+INDICES = {
+    "cuentas": {
+        "idx_cuentas_socio_id": ("socio_id",),
+        "idx_cuentas_activo": ("activo",),
+        "idx_cuentas_estado": ("estado",),
+        "idx_cuentas_fecha_actualizacion": ("fecha_actualizacion",),
+        "idx_cuentas_listado": ("activo", "estado", "fecha_creacion", "id"),
+    },
+    "auditoria_cuentas": {
+        "idx_auditoria_cuenta_fecha": ("cuenta_id", "fecha", "id"),
+    },
+}
+
+CARGA_CUENTAS = f"""
+LOAD DATA LOCAL INFILE %s INTO TABLE cuentas
+FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\n'
+(id, socio_id, numeroCuenta, saldo, @estado, @tipo, @creacion, @actualizacion, activo)
+SET estado = ELT(@estado + 1, {", ".join(f"'{e}'" for e in ESTADOS)}),
+    tipoCuenta = ELT(@tipo + 1, {", ".join(f"'{t}'" for t in TIPOS_CUENTA)}),
+    fecha_creacion = FROM_UNIXTIME(@creacion),
+    fecha_actualizacion = FROM_UNIXTIME(@actualizacion)
+"""
+
+# Mismo texto que el trigger after_cuenta_update (CONCAT de dos DECIMAL(15,2))
+CARGA_AUDITORIA = """
+LOAD DATA LOCAL INFILE %s INTO TABLE auditoria_cuentas
+FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\n'
+(cuenta_id, @desde, @hasta, @fecha)
+SET accion = 'ACTUALIZACION_SALDO',
+    descripcion = CONCAT('Saldo actualizado de ', CAST(@desde AS DECIMAL(15,2)),
+                         ' a ', CAST(@hasta AS DECIMAL(15,2))),
+    fecha = FROM_UNIXTIME(@fecha)
+"""
+
+ALFABETO = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+COMA = ord(",")
+GUION = ord("-")
+PUNTO = ord(".")
+SALTO = ord("\n")
+
+
+def _digitos(valores, ancho, base=10):
+    """Enteros no negativos -> matriz (n, ancho) de ASCII con ceros a la izquierda"""
+    valores = np.asarray(valores, dtype=np.uint64).copy()
+    salida = np.empty((len(valores), ancho), dtype=np.uint8)
+    base = np.uint64(base)
+    for posicion in range(ancho - 1, -1, -1):
+        valores, resto = np.divmod(valores, base)
+        salida[:, posicion] = ALFABETO[resto]
+    return salida
+
+
+def _constante(n, texto):
+    return np.tile(np.frombuffer(texto.encode("ascii"), dtype=np.uint8), (n, 1))
+
+
+def _uuid(octetos):
+    """Matriz (n, 16) de bytes -> (n, 36) ASCII de un UUID v4"""
+    octetos = octetos.copy()
+    octetos[:, 6] = (octetos[:, 6] & 0x0F) | 0x40
+    octetos[:, 8] = (octetos[:, 8] & 0x3F) | 0x80
+    hexa = ALFABETO[np.stack([octetos >> 4, octetos & 0x0F], axis=2).reshape(len(octetos), 32)]
+    guion = np.full((len(octetos), 1), GUION, dtype=np.uint8)
+    return np.hstack([hexa[:, :8], guion, hexa[:, 8:12], guion, hexa[:, 12:16], guion,
+                      hexa[:, 16:20], guion, hexa[:, 20:]])
+
+
+def _mezclar(valores):
+    """Finalizador de splitmix64: biyección de uint64 con buena dispersión"""
+    with np.errstate(over="ignore"):
+        z = valores + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _uuid_socios(indices, semilla):
+    """UUID determinista de cada índice de socio (distintos índices -> distintos UUID)"""
+    indices = np.asarray(indices, dtype=np.uint64)
+    alto = _mezclar(indices)
+    bajo = _mezclar(indices ^ np.uint64(semilla & 0xFFFFFFFFFFFFFFFF))
+    octetos = np.stack([alto, bajo], axis=1).astype(">u8").view(np.uint8).reshape(len(indices), 16)
+    return _uuid(octetos)
+
+
+def id_socio(indice, semilla):
+    """UUID (str) del socio 'indice'; el 0 es el que más cuentas tiene"""
+    return _uuid_socios([indice], semilla)[0].tobytes().decode("ascii")
+
+
+def numero_cuenta(indice):
+    return f"{PREFIJO_NUMERO}{indice:0{DIGITOS_NUMERO}d}"
+
+
+def socios_para(cuentas):
+    return max(1, cuentas // CUENTAS_POR_SOCIO)
+
+
+def _saldo(centavos):
+    """Centavos (int64) -> (n, 14) ASCII: signo ('0' o '-'), 10 enteros, punto, 2 decimales"""
+    absolutos = np.minimum(np.abs(centavos), MAX_CENTAVOS)
+    signo = np.where(centavos < 0, GUION, ord("0")).astype(np.uint8)[:, None]
+    enteros = _digitos(absolutos // 100, 10)
+    decimales = _digitos(absolutos % 100, 2)
+    punto = np.full((len(centavos), 1), PUNTO, dtype=np.uint8)
+    return np.hstack([signo, enteros, punto, decimales])
+
+
+def _filas(columnas):
+    """Unir columnas (n, ancho) con comas y salto de línea -> bytes del bloque"""
+    n = len(columnas[0])
+    coma = np.full((n, 1), COMA, dtype=np.uint8)
+    partes = []
+    for columna in columnas:
+        partes += [columna, coma]
+    partes[-1] = np.full((n, 1), SALTO, dtype=np.uint8)
+    return np.hstack(partes).tobytes()
+
+
+def generar_bloque(bloque, inicio, n, total, semilla, auditoria_por_cuenta=AUDITORIA_POR_CUENTA):
+    """
+    Cuentas [inicio, inicio + n) y su auditoría.
+    Devuelve (bytes del CSV de cuentas, bytes del CSV de auditoría, filas de auditoría).
+    """
+    rng = np.random.default_rng([semilla, bloque])
+    ids = _uuid(rng.integers(0, 256, size=(n, 16), dtype=np.uint8))
+
+    socios = (socios_para(total) * rng.random(n) ** SESGO_SOCIOS).astype(np.uint64)
+    numeros = np.hstack([_constante(n, PREFIJO_NUMERO),
+                         _digitos(np.arange(inicio, inicio + n), DIGITOS_NUMERO)])
+
+    centavos = np.rint(rng.lognormal(mean=8.0, sigma=1.5, size=n) * 100).astype(np.int64)
+    negativos = rng.random(n) < FRACCION_NEGATIVOS
+    centavos[negativos] = -rng.integers(1, 50_000, size=int(negativos.sum()))
+
+    estados = rng.choice(len(ESTADOS), size=n, p=PESOS_ESTADOS)
+    activos = (estados == 0) ^ (rng.random(n) < FRACCION_INCONSISTENTES)
+    tipos = rng.choice(len(TIPOS_CUENTA), size=n, p=PESOS_TIPOS)
+
+    creacion = FIN_FECHAS - (SPAN_FECHAS * rng.random(n) ** 2).astype(np.int64)
+    actualizacion = creacion + ((FIN_FECHAS - creacion) * rng.random(n)).astype(np.int64)
+
+    cuentas = _filas([
+        ids, _uuid_socios(socios, semilla), numeros, _saldo(centavos),
+        _digitos(estados, 1), _digitos(tipos, 1),
+        _digitos(creacion, 10), _digitos(actualizacion, 10),
+        _digitos(activos, 1),
+    ])
+
+    # Auditoría: Poisson con peso de cola pesada (media 1) por cuenta
+    peso = rng.pareto(2.5, n) * 1.5
+    conteos = rng.poisson(auditoria_por_cuenta * peso)
+    cuenta = np.repeat(np.arange(n), conteos)
+    m = len(cuenta)
+    if not m:
+        return cuentas, b"", 0
+    fechas = creacion[cuenta] + ((actualizacion[cuenta] - creacion[cuenta]) * rng.random(m)).astype(np.int64)
+    orden = np.lexsort((fechas, cuenta))
+    cuenta, fechas = cuenta[orden], fechas[orden]
+
+    # Cadena continua: cada 'desde' es el 'hasta' anterior; el último 'hasta' es el saldo
+    ultima = np.ones(m, dtype=bool)
+    ultima[:-1] = cuenta[1:] != cuenta[:-1]
+    primera = np.ones(m, dtype=bool)
+    primera[1:] = cuenta[1:] != cuenta[:-1]
+    hasta = np.rint(rng.lognormal(mean=8.0, sigma=1.5, size=m) * 100).astype(np.int64)
+    hasta[ultima] = np.clip(centavos[cuenta[ultima]], -MAX_CENTAVOS, MAX_CENTAVOS)
+    desde = np.roll(hasta, 1)
+    desde[primera] = np.rint(rng.lognormal(mean=8.0, sigma=1.5, size=int(primera.sum())) * 100)
+
+    auditoria = _filas([ids[cuenta], _saldo(desde), _saldo(hasta), _digitos(fechas, 10)])
+    return cuentas, auditoria, m
+
+
+def generar(cuentas, directorio=DIRECTORIO_DATASETS, semilla=42,
+            auditoria_por_cuenta=AUDITORIA_POR_CUENTA, tamano_bloque=TAMANO_BLOQUE):
+    """Escribir cuentas.csv, auditoria.csv y dataset.json en 'directorio'"""
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    filas_auditoria = 0
+    with open(os.path.join(directorio, "cuentas.csv"), "wb") as f_cuentas, \
+            open(os.path.join(directorio, "auditoria.csv"), "wb") as f_auditoria:
+        for bloque, desde in enumerate(range(0, cuentas, tamano_bloque)):
+            n = min(tamano_bloque, cuentas - desde)
+            datos_cuentas, datos_auditoria, m = generar_bloque(
+                bloque, desde, n, cuentas, semilla, auditoria_por_cuenta
+            )
+            f_cuentas.write(datos_cuentas)
+            f_auditoria.write(datos_auditoria)
+            filas_auditoria += m
+            print(f"  📝 {desde + n}/{cuentas} cuentas")
+
+    metadatos = {
+        "cuentas": cuentas,
+        "auditoria": filas_auditoria,
+        "socios": socios_para(cuentas),
+        "semilla": semilla,
+        "auditoria_por_cuenta": auditoria_por_cuenta,
+        "tamano_bloque": tamano_bloque,
+        "segundos_generacion": round(time.perf_counter() - inicio, 2),
+    }
+    with open(os.path.join(directorio, "dataset.json"), "w") as f:
+        json.dump(metadatos, f, indent=2)
+    return metadatos
+
+
+def leer_metadatos(directorio=DIRECTORIO_DATASETS):
+    try:
+        with open(os.path.join(directorio, "dataset.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def conectar_bench(con_base=True):
+    """Conexión a la base de benchmark (la crea si no existe) con LOCAL INFILE habilitado"""
+    config = dict(BENCH_DB_CONFIG)
+    database = config.pop("database")
+    conexion = mysql.connector.connect(**config, allow_local_infile=True)
+    if con_base:
+        cursor = conexion.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        cursor.execute(f"USE {database}")
+        cursor.close()
+    return conexion
+
+
+def crear_indices(cursor, indices=INDICES):
+    for tabla, definiciones in indices.items():
+        cursor.execute(f"ALTER TABLE {tabla} " + ", ".join(
+            f"ADD INDEX {nombre} ({', '.join(columnas)})" for nombre, columnas in definiciones.items()
+        ))
+
+
+def cargar(directorio=DIRECTORIO_DATASETS):
+    """
+    Recrear cuentas y auditoria_cuentas en la base de benchmark, cargar los
+    CSV y crear los índices secundarios. Devuelve los segundos de cada paso.
+    """
+    conexion = conectar_bench()
+    cursor = conexion.cursor()
+    tiempos = {}
+
+    def medir(nombre, *sentencias):
+        inicio = time.perf_counter()
+        for sql, params in sentencias:
+            cursor.execute(sql, params)
+            if cursor.with_rows:
+                cursor.fetchall()
+        conexion.commit()
+        tiempos[nombre] = round(time.perf_counter() - inicio, 2)
+        print(f"  ⏱️ {nombre}: {tiempos[nombre]}s")
+
+    # La sesión en UTC: FROM_UNIXTIME da las mismas fechas en cualquier servidor
+    cursor.execute("SET time_zone = '+00:00'")
+    cursor.execute("SET foreign_key_checks = 0")
+    cursor.execute("SET unique_checks = 0")
+    cursor.execute("DROP TABLE IF EXISTS auditoria_cuentas")
+    cursor.execute("DROP TABLE IF EXISTS cuentas")
+    cursor.execute(ESQUEMA_CUENTAS)
+    cursor.execute(ESQUEMA_AUDITORIA)
+    medir("cargar_cuentas", (CARGA_CUENTAS, (os.path.join(directorio, "cuentas.csv"),)))
+    medir("cargar_auditoria", (CARGA_AUDITORIA, (os.path.join(directorio, "auditoria.csv"),)))
+    inicio = time.perf_counter()
+    crear_indices(cursor)
+    tiempos["crear_indices"] = round(time.perf_counter() - inicio, 2)
+    print(f"  ⏱️ crear_indices: {tiempos['crear_indices']}s")
+    medir("analizar", ("ANALYZE TABLE cuentas, auditoria_cuentas", ()))
+    cursor.execute("SET foreign_key_checks = 1")
+    cursor.execute("SET unique_checks = 1")
+    cursor.close()
+    conexion.close()
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar y cargar cuentas y auditoría sintéticas")
+    parser.add_argument("--cuentas", type=int, default=100_000)
+    parser.add_argument("--auditoria-por-cuenta", type=float, default=AUDITORIA_POR_CUENTA,
+                        help="Media de cambios de saldo auditados por cuenta")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE,
+                        help="Cuentas generadas en memoria a la vez")
+    parser.add_argument("--directorio", default=DIRECTORIO_DATASETS)
+    parser.add_argument("--sin-cargar", action="store_true", help="Solo escribir los CSV")
+    parser.add_argument("--solo-cargar", action="store_true",
+                        help="Cargar los CSV ya generados en --directorio")
+    args = parser.parse_args()
+    if args.cuentas <= 0 or args.tamano_bloque <= 0:
+        parser.error("--cuentas y --tamano-bloque deben ser positivos")
+
+    if not args.solo_cargar:
+        print(f"🎲 Generando {args.cuentas} cuentas (semilla {args.semilla}) en {args.directorio}")
+        metadatos = generar(args.cuentas, args.directorio, args.semilla,
+                            args.auditoria_por_cuenta, args.tamano_bloque)
+        print(f"✅ {metadatos['cuentas']} cuentas y {metadatos['auditoria']} filas de auditoría "
+              f"en {metadatos['segundos_generacion']}s")
+    if args.sin_cargar:
+        return 0
+
+    print(f"📥 Cargando en {BENCH_DB_CONFIG['database']}")
+    try:
+        tiempos = cargar(args.directorio)
+    except mysql.connector.Error as e:
+        print(f"❌ Error cargando el dataset: {e}")
+        print("   LOAD DATA LOCAL requiere local_infile=ON en el servidor (SET GLOBAL local_infile = 1)")
+        return 1
+    print(f"✅ Carga completa en {round(sum(tiempos.values()), 2)}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Histogramas HDR de Latencia por Endpoint (Locust)
+Los percentiles de Locust salen de buckets redondeados que pierden precisión
+justo en la cola (donde aparece la contención de realizarRetiro). Aquí cada
+solicitud se registra en un HdrHistogram por endpoint, con la clave
+"<método> <name>" (los mismos name= del locustfile):
+
+- Memoria fija por endpoint (el arreglo de contadores no crece con las
+  solicitudes): de 1 µs a 60 s con 3 dígitos significativos
+- Los workers envían al master el histograma codificado de cada intervalo y
+  el master lo suma sin pérdida (decode_and_add)
+- Al terminar se escribe locust/reportes/hdr_YYYYMMDD_HHMMSS.json con cada
+  histograma en el formato comprimido base64 estándar de HdrHistogram
+"""
+import json
+import os
+from datetime import datetime
+
+from hdrh.histogram import HdrHistogram
+
+# Rango registrable en microsegundos; lo que supera el máximo se registra como máximo
+MIN_US = 1
+MAX_US = 60_000_000
+DIGITOS_SIGNIFICATIVOS = 3
+
+# Tipo de mensaje worker -> master
+MENSAJE_HDR = "histogramas_hdr"
+
+
+def histograma_vacio():
+    return HdrHistogram(MIN_US, MAX_US, DIGITOS_SIGNIFICATIVOS)
+
+
+class HistogramasHdr:
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.acumulados = {}
+
+    def registrar(self, metodo, nombre, tiempo_ms):
+        """Registrar una solicitud (listener de events.request)"""
+        clave = f"{metodo} {nombre}"
+        histograma = self.acumulados.get(clave)
+        if histograma is None:
+            histograma = self.acumulados[clave] = histograma_vacio()
+        histograma.record_value(min(max(int(tiempo_ms * 1000), MIN_US), MAX_US))
+
+    def extraer_delta(self):
+        """
+        Worker: histogramas codificados de lo registrado desde la última
+        llamada; cada histograma se reinicia (reset, sin reservar memoria
+        nueva) porque el acumulado de la prueba vive en el master
+        """
+        delta = {}
+        for clave, histograma in self.acumulados.items():
+            if histograma.get_total_count():
+                delta[clave] = histograma.encode().decode("ascii")
+                histograma.reset()
+        return delta or None
+
+    def combinar(self, delta):
+        """Master: sumar sin pérdida los histogramas recibidos de un worker"""
+        for clave, codificado in delta.items():
+            histograma = self.acumulados.get(clave)
+            if histograma is None:
+                histograma = self.acumulados[clave] = histograma_vacio()
+            histograma.decode_and_add(codificado)
+
+    def guardar(self, directorio="locust/reportes", timestamp=None):
+        """Escribir hdr_<timestamp>.json y devolver su ruta (None si no hay datos)"""
+        if not self.acumulados:
+            return None
+        os.makedirs(directorio, exist_ok=True)
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        archivo = f"{directorio}/hdr_{timestamp}.json"
+        with open(archivo, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "unidad": "us",
+                "digitos_significativos": DIGITOS_SIGNIFICATIVOS,
+                "endpoints": {
+                    clave: {
+                        "total": histograma.get_total_count(),
+                        "hdr": histograma.encode().decode("ascii")
+                    }
+                    for clave, histograma in sorted(self.acumulados.items())
+                }
+            }, f, indent=2)
+        return archivo
+
+
+def cargar(archivos):
+    """Leer uno o más hdr_*.json y sumar los histogramas por endpoint"""
+    histogramas = {}
+    for archivo in archivos:
+        with open(archivo) as f:
+            datos = json.load(f)
+        for clave, endpoint in datos["endpoints"].items():
+            histograma = histogramas.get(clave)
+            if histograma is None:
+                histograma = histogramas[clave] = histograma_vacio()
+            histograma.decode_and_add(endpoint["hdr"])
+    return histogramas
@@ -0,0 +1,143 @@
+"""
+Libro de Operaciones del Cliente (Locust)
+Registra cada operación que el servicio confirmó (saldo inicial, depósitos,
+retiros y saldo devuelto) en arreglos compactos de tipo array, y al final de
+la prueba concilia con NumPy el saldo esperado de cada cuenta contra el saldo
+real en MySQL.
+
+Si el servicio pierde actualizaciones (dos findOne + save concurrentes sobre
+la misma cuenta), el saldo real se aparta del esperado: esa deriva es la
+medida de las actualizaciones perdidas.
+"""
+from array import array
+
+import mysql.connector
+import numpy as np
+
+from validar_inconsistencias import DB_CONFIG
+
+# Diferencia mínima (en unidades monetarias) que se considera deriva
+TOLERANCIA = 0.005
+
+# Cuentas por consulta al leer los saldos reales
+LOTE_CONSULTA = 1000
+
+
+class LibroOperaciones:
+    """Libro por cuenta; registrar() solo hace una búsqueda en dict y 3 appends"""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vaciar el libro (nuevo conjunto de cuentas)"""
+        self._slots = {}
+        self.cuentas = []
+        self.saldo_inicial = array('d')
+        self._slot = array('q')
+        self._monto = array('d')
+        self._saldo_devuelto = array('d')
+        self._neto_pendiente = 0.0
+
+    def __len__(self):
+        return len(self._monto)
+
+    def _slot_de(self, cuenta_id, saldo_inicial=0.0):
+        slot = self._slots.get(cuenta_id)
+        if slot is None:
+            slot = self._slots[cuenta_id] = len(self.cuentas)
+            self.cuentas.append(cuenta_id)
+            self.saldo_inicial.append(saldo_inicial)
+        return slot
+
+    def abrir_cuenta(self, cuenta_id, saldo_inicial):
+        """Registrar una cuenta con su saldo de partida"""
+        self.saldo_inicial[self._slot_de(cuenta_id, saldo_inicial)] = saldo_inicial
+
+    def registrar(self, cuenta_id, monto, saldo_devuelto):
+        """Operación confirmada: monto > 0 depósito, monto < 0 retiro"""
+        self._slot.append(self._slot_de(cuenta_id))
+        self._monto.append(monto)
+        self._saldo_devuelto.append(np.nan if saldo_devuelto is None else saldo_devuelto)
+        self._neto_pendiente += monto
+
+    def extraer_neto(self):
+        """Suma de montos confirmados desde la última llamada (monitor en vivo)"""
+        neto, self._neto_pendiente = self._neto_pendiente, 0.0
+        return neto
+
+    def resumen(self):
+        """
+        Totales por cuenta como arreglos NumPy alineados con self.cuentas:
+        saldo_inicial, neto (suma de montos), operaciones y último saldo devuelto
+        """
+        n = len(self.cuentas)
+        slots = np.frombuffer(self._slot, dtype=np.int64) if len(self._slot) else np.empty(0, np.int64)
+        montos = np.frombuffer(self._monto, dtype=np.float64) if len(self._monto) else np.empty(0)
+        devueltos = np.frombuffer(self._saldo_devuelto, dtype=np.float64) if len(self._monto) else np.empty(0)
+
+        ultimo_devuelto = np.full(n, np.nan)
+        # Con índices repetidos queda el último valor: las operaciones están en orden
+        ultimo_devuelto[slots] = devueltos
+        return {
+            "cuentas": list(self.cuentas),
+            "saldo_inicial": np.array(self.saldo_inicial, dtype=np.float64),
+            "neto": np.bincount(slots, weights=montos, minlength=n),
+            "operaciones": np.bincount(slots, minlength=n),
+            "ultimo_devuelto": ultimo_devuelto
+        }
+
+
+def obtener_saldos_reales(cuentas, db_config=None):
+    """Saldo actual en MySQL de cada cuenta (NaN si ya no existe)"""
+    saldos = np.full(len(cuentas), np.nan)
+    posicion = {cuenta_id: i for i, cuenta_id in enumerate(cuentas)}
+    conexion = mysql.connector.connect(**(db_config or DB_CONFIG))
+    try:
+        cursor = conexion.cursor()
+        for inicio in range(0, len(cuentas), LOTE_CONSULTA):
+            lote = cuentas[inicio:inicio + LOTE_CONSULTA]
+            marcadores = ", ".join(["%s"] * len(lote))
+            cursor.execute(f"SELECT id, saldo FROM cuentas WHERE id IN ({marcadores})", tuple(lote))
+            for cuenta_id, saldo in cursor.fetchall():
+                saldos[posicion[cuenta_id]] = float(saldo)
+        cursor.close()
+    finally:
+        conexion.close()
+    return saldos
+
+
+def _a_json(valor):
+    """float serializable (None en lugar de NaN)"""
+    return None if np.isnan(valor) else float(valor)
+
+
+def conciliar(resumen, saldos_reales):
+    """
+    Comparar saldo esperado (inicial + neto) con el real, vectorizado.
+    Devuelve el resumen global y el detalle de las cuentas con deriva.
+    """
+    esperado = resumen["saldo_inicial"] + resumen["neto"]
+    deriva = saldos_reales - esperado
+    con_deriva = np.flatnonzero(~np.isnan(deriva) & (np.abs(deriva) > TOLERANCIA))
+
+    return {
+        "cuentas": len(resumen["cuentas"]),
+        "operaciones": int(resumen["operaciones"].sum()),
+        "cuentas_sin_saldo_real": int(np.isnan(saldos_reales).sum()),
+        "cuentas_con_deriva": int(con_deriva.size),
+        "deriva_total": round(float(np.nansum(deriva)), 2),
+        "deriva_absoluta_total": round(float(np.nansum(np.abs(deriva))), 2),
+        "detalles": [
+            {
+                "cuenta_id": resumen["cuentas"][i],
+                "saldo_inicial": float(resumen["saldo_inicial"][i]),
+                "operaciones": int(resumen["operaciones"][i]),
+                "saldo_esperado": round(float(esperado[i]), 2),
+                "saldo_real": float(saldos_reales[i]),
+                "ultimo_saldo_devuelto": _a_json(resumen["ultimo_devuelto"][i]),
+                "deriva": round(float(deriva[i]), 2)
+            }
+            for i in con_deriva
+        ]
+    }
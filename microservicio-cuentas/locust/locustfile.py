@@ -2,26 +2,86 @@
 Script Locust para Pruebas de Carga - Microservicio Cuentas
 Simula 100 usuarios concurrentes realizando operaciones y detecta inconsistencias
 """
-from locust import HttpUser, task, between, events
+from locust import User, HttpUser, FastHttpUser, task, between, constant, events
+from locust.exception import StopUser
+from locust.runners import MasterRunner, WorkerRunner
+import gevent
+import numpy as np
 import random
 import json
 import logging
+import math
+import sys
+import time
 from datetime import datetime
 
+from libro_operaciones import LibroOperaciones, conciliar, obtener_saldos_reales
+from registro_inconsistencias import (
+    RegistroInconsistencias, INTERVALO_ENVIO, MENSAJE_DELTA, MENSAJE_CIERRE, ESPERA_FINAL
+)
+from pool_cuentas import PoolCuentas, sembrar_pool, particionar, SALDO_INICIAL, MENSAJE_POOL
+from histogramas_hdr import HistogramasHdr, MENSAJE_HDR
+from server_timing import TiemposServidor, MENSAJE_SERVER_TIMING
+from patrones_acceso import CuentasCompartidas, crear_patron, concentracion
+from monitor_invariantes import MonitorInvariantes
+from estadisticas_cache import MedicionCache
+from traza import generar_traza
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Variables globales para tracking
-inconsistencias = []
-cuentas_creadas = []
-saldos_inconsistentes = []
+# Segundos de espera entre tareas de OperacionesCuentas; --grabar-traza usa
+# la misma espera para que la traza ofrezca la carga de CuentasUser
+ESPERA = (1, 3)
+
+# Registro acotado de inconsistencias; en modo distribuido el master combina
+# los deltas que le envían los workers
+registro = RegistroInconsistencias()
+
+# Libro de operaciones confirmadas por cuenta (detección de actualizaciones perdidas)
+libro = LibroOperaciones()
+
+# Cuentas pre-sembradas (--cuentas-pool N) que los usuarios toman en on_start
+pool = PoolCuentas()
+
+# Histograma HDR de latencia por endpoint (clave "<método> <name>")
+histogramas = HistogramasHdr()
+
+# Desglose bd/app/red de cada solicitud según la cabecera Server-Timing del servicio
+tiempos_servidor = TiemposServidor()
+
+# Escenario de contención: cuentas que todos los usuarios comparten
+# (--cuentas-contencion N) y su libro, que se concilia en el master
+compartidas = CuentasCompartidas()
+libro_contencion = LibroOperaciones()
+
+# Cuentas sembradas en esta prueba ({"prefijo", "cuentas"}), ámbito del monitor
+siembra = {}
+
+# Monitor de invariantes en vivo (--monitor-invariantes N), solo master/local
+monitor = None
+monitor_greenlet = None
 
+# Contadores de la caché del servicio y de MySQL al iniciar la prueba (master/local)
+medicion_cache = None
 
-class CuentasUser(HttpUser):
-    """Usuario que simula operaciones concurrentes en el microservicio de cuentas"""
+# Diferencia de saldo que se tolera al comparar un GET con el último saldo
+# confirmado (centavos de redondeo de DECIMAL(15,2))
+TOLERANCIA_SALDO = 0.01
+
+
+class OperacionesCuentas(User):
+    """
+    Usuario que simula operaciones concurrentes en el microservicio de cuentas.
+    Las tareas solo usan self.client, así que sirven tanto para HttpUser
+    (requests) como para FastHttpUser (geventhttpclient).
+    """
+    
+    abstract = True
+    escenario = "cuentas"
     
-    wait_time = between(1, 3)  # Espera entre 1-3 segundos entre tareas
+    wait_time = between(*ESPERA)  # Espera entre 1-3 segundos entre tareas
     
     def on_start(self):
         """Ejecutado al inicio de cada usuario - crear cuenta de prueba"""
@@ -29,8 +89,21 @@ class CuentasUser(HttpUser):
         self.numero_cuenta = f"TEST-{random.randint(100000, 999999)}"
         self.socio_id = f"{random.randint(1, 100)}"
         
-        # Crear cuenta inicial
-        self.crear_cuenta_inicial()
+        # Tomar una cuenta del pool; sin pool, crear cuenta inicial
+        cuenta = pool.arrendar()
+        self.cuenta_del_pool = cuenta is not None
+        if self.cuenta_del_pool:
+            self.cuenta_id, self.numero_cuenta = cuenta
+            self.saldo_inicial = pool.saldo_inicial
+            libro.abrir_cuenta(self.cuenta_id, self.saldo_inicial)
+            self.confirmar_saldo(self.saldo_inicial)
+        else:
+            self.crear_cuenta_inicial()
+    
+    def on_stop(self):
+        """Devolver al pool la cuenta si no fue eliminada"""
+        if self.cuenta_del_pool and self.cuenta_id:
+            pool.devolver(self.cuenta_id, self.numero_cuenta)
     
     def crear_cuenta_inicial(self):
         """Crear cuenta con saldo inicial para pruebas"""
@@ -46,23 +119,37 @@ class CuentasUser(HttpUser):
                 data = response.json()
                 self.cuenta_id = data.get("id")
                 self.saldo_inicial = data.get("saldo", 10000.0)
-                cuentas_creadas.append({
-                    "id": self.cuenta_id,
-                    "numero": self.numero_cuenta,
-                    "saldo_inicial": self.saldo_inicial
-                })
+                libro.abrir_cuenta(self.cuenta_id, self.saldo_inicial)
+                self.confirmar_saldo(self.saldo_inicial)
+                registro.cuenta_creada()
                 response.success()
                 logger.info(f"Cuenta creada: {self.cuenta_id}")
             else:
                 response.failure(f"Error creando cuenta: {response.status_code}")
     
+    def confirmar_saldo(self, saldo):
+        """
+        Último saldo que confirmó el servicio para la cuenta del usuario (y el
+        anterior). La cuenta es solo de este usuario, así que un GET posterior
+        debe devolverlo; None cuando se desconoce (p. ej. tras un error).
+        """
+        self.saldo_previo = getattr(self, "saldo_conocido", None)
+        try:
+            self.saldo_conocido = float(saldo)
+        except (TypeError, ValueError):
+            self.saldo_conocido = None
+    
+    def olvidar_saldo(self):
+        self.saldo_previo = self.saldo_conocido = None
+    
     @task(3)
     def realizar_retiro_concurrente(self):
         """Retiros concurrentes para detectar race conditions"""
         if not self.cuenta_id:
             return
         
-        monto = random.uniform(100, 500)
+        # Redondeado a centavos, igual que DECIMAL(15,2), para poder conciliar
+        monto = round(random.uniform(100, 500), 2)
         
         with self.client.post(
             f"/cuentas/{self.cuenta_id}/retiro",
@@ -73,10 +160,11 @@ class CuentasUser(HttpUser):
             if response.status_code == 200:
                 data = response.json()
                 nuevo_saldo = data.get("saldo")
+                libro.registrar(self.cuenta_id, -monto, nuevo_saldo)
                 
                 # Validar que el saldo no sea negativo
                 if nuevo_saldo < 0:
-                    inconsistencias.append({
+                    registro.agregar({
                         "tipo": "SALDO_NEGATIVO",
                         "cuenta_id": self.cuenta_id,
                         "saldo": nuevo_saldo,
@@ -87,10 +175,12 @@ class CuentasUser(HttpUser):
                     response.failure(f"Saldo negativo: {nuevo_saldo}")
                 else:
                     response.success()
+                self.confirmar_saldo(nuevo_saldo)
             elif response.status_code == 409:
                 # Saldo insuficiente es esperado
                 response.success()
             else:
+                self.olvidar_saldo()
                 response.failure(f"Error en retiro: {response.status_code}")
     
     @task(3)
@@ -99,7 +189,7 @@ class CuentasUser(HttpUser):
         if not self.cuenta_id:
             return
         
-        monto = random.uniform(200, 800)
+        monto = round(random.uniform(200, 800), 2)
         
         with self.client.post(
             f"/cuentas/{self.cuenta_id}/deposito",
@@ -108,13 +198,21 @@ class CuentasUser(HttpUser):
             name="/cuentas/[id]/deposito"
         ) as response:
             if response.status_code == 200:
+                nuevo_saldo = response.json().get("saldo")
+                libro.registrar(self.cuenta_id, monto, nuevo_saldo)
+                self.confirmar_saldo(nuevo_saldo)
                 response.success()
             else:
+                self.olvidar_saldo()
                 response.failure(f"Error en depósito: {response.status_code}")
     
     @task(2)
     def obtener_cuenta(self):
-        """Obtener información de cuenta"""
+        """
+        Obtener información de cuenta. Con la caché de lecturas del servicio,
+        un GET que devuelve el saldo anterior a la última operación confirmada
+        es una lectura obsoleta (invalidación perdida o tardía).
+        """
         if not self.cuenta_id:
             return
         
@@ -124,10 +222,34 @@ class CuentasUser(HttpUser):
             name="/cuentas/[id]"
         ) as response:
             if response.status_code == 200:
-                response.success()
+                saldo = response.json().get("saldo")
+                if self.es_lectura_obsoleta(saldo):
+                    registro.agregar({
+                        "tipo": "LECTURA_OBSOLETA",
+                        "cuenta_id": self.cuenta_id,
+                        "saldo_leido": saldo,
+                        "saldo_confirmado": self.saldo_conocido,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    logger.error(
+                        f"⚠️ INCONSISTENCIA: Lectura obsoleta de {self.cuenta_id}: "
+                        f"{saldo} (confirmado {self.saldo_conocido})"
+                    )
+                    response.failure(f"Lectura obsoleta: {saldo} en lugar de {self.saldo_conocido}")
+                else:
+                    response.success()
             else:
                 response.failure(f"Error obteniendo cuenta: {response.status_code}")
     
+    def es_lectura_obsoleta(self, saldo):
+        """El saldo leído coincide con el previo y no con el último confirmado"""
+        if self.saldo_conocido is None or self.saldo_previo is None or not isinstance(saldo, (int, float)):
+            return False
+        return (
+            abs(saldo - self.saldo_conocido) > TOLERANCIA_SALDO
+            and abs(saldo - self.saldo_previo) <= TOLERANCIA_SALDO
+        )
+    
     @task(1)
     def actualizar_cuenta_concurrente(self):
         """Actualizaciones concurrentes para detectar conflictos"""
@@ -178,7 +300,7 @@ class CuentasUser(HttpUser):
                     self.cuenta_id = None
                 elif response.status_code == 404:
                     # Ya fue eliminada - posible race condition
-                    inconsistencias.append({
+                    registro.agregar({
                         "tipo": "ELIMINACION_DUPLICADA",
                         "cuenta_id": self.cuenta_id,
                         "timestamp": datetime.now().isoformat()
@@ -210,27 +332,716 @@ class CuentasUser(HttpUser):
                 response.failure(f"Error listando por socio: {response.status_code}")
 
 
+def operacion_traza(rnd, estado):
+    """
+    Modelo de CuentasUser para grabar trazas (traza.generar_traza): elige la
+    tarea con los mismos pesos (OperacionesCuentas.tasks) y devuelve la
+    solicitud que haría, con los mismos montos. Después de eliminar su cuenta
+    el usuario solo lista cuentas, como en Locust.
+    """
+    if not estado:
+        estado["socio"] = rnd.randint(1, 100)
+        estado["eliminada"] = False
+    tarea = rnd.choice(OperacionesCuentas.tasks).__name__
+    if tarea == "listar_cuentas":
+        return ("GET", "/cuentas", 0)
+    if tarea == "listar_cuentas_por_socio":
+        return ("GET", "/cuentas/socio/[id]", estado["socio"])
+    if estado["eliminada"]:
+        return None
+    if tarea == "realizar_retiro_concurrente":
+        return ("POST", "/cuentas/[id]/retiro", round(round(rnd.uniform(100, 500), 2) * 100))
+    if tarea == "realizar_deposito_concurrente":
+        return ("POST", "/cuentas/[id]/deposito", round(round(rnd.uniform(200, 800), 2) * 100))
+    if tarea == "obtener_cuenta":
+        return ("GET", "/cuentas/[id]", 0)
+    if tarea == "actualizar_cuenta_concurrente":
+        return ("PUT", "/cuentas/[id]", estado["socio"])
+    if tarea == "eliminar_cuenta_concurrente" and rnd.random() > 0.8:
+        estado["eliminada"] = True
+        return ("DELETE", "/cuentas/[id]", 0)
+    return None
+
+
+def grabar_traza(environment):
+    """
+    --grabar-traza ARCHIVO: en lugar de ejecutar la prueba, escribir la traza
+    de operaciones que generarían --users usuarios de CuentasUser durante
+    --run-time (con --spawn-rate), con la semilla --semilla-traza, y salir.
+    La traza se reproduce en lazo abierto con reproducir_traza.py.
+    """
+    opciones = environment.parsed_options
+    if not opciones.run_time:
+        logger.error("--grabar-traza necesita --run-time")
+        sys.exit(1)
+    inicio = time.perf_counter()
+    registros = generar_traza(
+        opciones.grabar_traza,
+        operacion_traza,
+        opciones.num_users or 1,
+        opciones.run_time,
+        opciones.semilla_traza,
+        espera=ESPERA,
+        tasa_spawn=opciones.spawn_rate
+    )
+    logger.info(
+        f"🎞️ Traza guardada en {opciones.grabar_traza}: {registros} operaciones de "
+        f"{opciones.num_users or 1} usuarios en {opciones.run_time}s "
+        f"(semilla {opciones.semilla_traza}, {time.perf_counter() - inicio:.1f}s)"
+    )
+    sys.exit(0)
+
+
+def conciliar_libro():
+    """
+    Comparar el saldo esperado por el libro con el saldo real en MySQL.
+    Cada cuenta con deriva se registra como inconsistencia DERIVA_SALDO y el
+    resumen de la conciliación se suma al registro (en modo distribuido cada
+    worker concilia sus propias cuentas y el master suma los resúmenes)
+    """
+    if not libro.cuentas:
+        return
+    
+    try:
+        resumen = libro.resumen()
+        resultado = conciliar(resumen, obtener_saldos_reales(resumen["cuentas"]))
+    except Exception as e:
+        logger.error(f"No se pudo conciliar el libro de operaciones: {e}")
+        return
+    
+    for detalle in resultado["detalles"]:
+        registro.agregar({
+            "tipo": "DERIVA_SALDO",
+            "cuenta_id": detalle["cuenta_id"],
+            "saldo_esperado": detalle["saldo_esperado"],
+            "saldo_real": detalle["saldo_real"],
+            "deriva": detalle["deriva"],
+            "timestamp": datetime.now().isoformat()
+        })
+    registro.registrar_libro(resultado)
+    
+    logger.info(
+        f"📒 Libro: {resultado['operaciones']} operaciones en {resultado['cuentas']} cuentas, "
+        f"{resultado['cuentas_con_deriva']} con deriva (total {resultado['deriva_total']})"
+    )
+
+
+def conciliar_contencion():
+    """
+    Master/local: conciliar las cuentas compartidas con el neto que sumaron
+    todos los workers. Devuelve el resultado de conciliar() o None.
+    """
+    if not registro.contencion:
+        return None
+    
+    cuentas = list(registro.contencion)
+    neto, operaciones = (np.array(columna) for columna in zip(*registro.contencion.values()))
+    resumen = {
+        "cuentas": cuentas,
+        "saldo_inicial": np.full(len(cuentas), SALDO_INICIAL),
+        "neto": neto,
+        "operaciones": operaciones.astype(np.int64),
+        "ultimo_devuelto": np.full(len(cuentas), np.nan)
+    }
+    try:
+        resultado = conciliar(resumen, obtener_saldos_reales(cuentas))
+    except Exception as e:
+        logger.error(f"No se pudo conciliar las cuentas compartidas: {e}")
+        return None
+    
+    for detalle in resultado["detalles"]:
+        registro.agregar({
+            "tipo": "DERIVA_SALDO",
+            "escenario": "contencion",
+            "cuenta_id": detalle["cuenta_id"],
+            "operaciones": detalle["operaciones"],
+            "saldo_esperado": detalle["saldo_esperado"],
+            "saldo_real": detalle["saldo_real"],
+            "deriva": detalle["deriva"],
+            "timestamp": datetime.now().isoformat()
+        })
+    registro.registrar_libro(resultado)
+    
+    logger.info(
+        f"🔥 Contención: {resultado['operaciones']} operaciones en {resultado['cuentas']} cuentas "
+        f"compartidas, {resultado['cuentas_con_deriva']} con deriva (total {resultado['deriva_total']})"
+    )
+    return resultado
+
+
+def actualizar_neto():
+    """Pasar al registro lo que confirmaron ambos libros desde la última vez"""
+    registro.sumar_neto(libro.extraer_neto() + libro_contencion.extraer_neto())
+
+
+def saldo_esperado_en_vivo(environment):
+    """
+    Saldo total esperado de las cuentas sembradas: inicial + neto confirmado.
+    None si hubo cuentas creadas por POST (su neto está en el libro pero
+    quedan fuera del prefijo que mide el monitor). En modo distribuido el
+    neto llega con los deltas de los workers, con hasta INTERVALO_ENVIO s
+    de atraso.
+    """
+    if not siembra or registro.cuentas_creadas:
+        return None
+    if not isinstance(environment.runner, MasterRunner):
+        actualizar_neto()
+    return siembra["cuentas"] * SALDO_INICIAL + registro.neto_confirmado
+
+
+def iniciar_monitor(environment, intervalo):
+    """Master/local: muestrear la BD en un greenlet durante la prueba"""
+    global monitor, monitor_greenlet
+    runner = environment.runner
+    try:
+        monitor = MonitorInvariantes(
+            intervalo=intervalo,
+            prefijo=siembra.get("prefijo"),
+            saldo_esperado=lambda: saldo_esperado_en_vivo(environment),
+            carga=lambda: (runner.user_count, environment.stats.total.current_rps)
+        )
+    except Exception as e:
+        logger.error(f"No se pudo iniciar el monitor de invariantes: {e}")
+        monitor = None
+        return
+    monitor_greenlet = gevent.spawn(monitor.ejecutar, dormir=gevent.sleep)
+    logger.info(f"🔎 Monitor de invariantes cada {intervalo}s -> {monitor.archivo}")
+
+
+def detener_monitor():
+    """Detener el muestreo (con una última muestra) y registrar su costo"""
+    if monitor is None or not monitor.activo:
+        return
+    monitor.detener()
+    monitor_greenlet.join(timeout=10)
+    resumen = monitor.resumen()
+    try:
+        monitor.guardar_resumen()
+    except Exception as e:
+        logger.error(f"Error guardando resumen del monitor: {e}")
+    logger.info(
+        f"🔎 Monitor: {resumen['muestras']} muestras, sondas de {resumen['duracion_media_ms']} ms en promedio "
+        f"(máx {resumen['duracion_max_ms']} ms, {resumen['filas_leidas_por_muestra']} filas leídas por muestra)"
+    )
+    if resumen["primera_negativa"]:
+        logger.error(
+            f"⚠️ Saldos negativos desde el segundo {resumen['primera_negativa']['segundos']} "
+            f"con {resumen['primera_negativa']['usuarios']} usuarios"
+        )
+
+
+def enviar_delta(runner, final=False):
+    """
+    Worker: mandar al master lo registrado desde el último envío. El delta
+    del registro va último: cuando llega el final, el master ya tiene todo
+    lo demás de ese worker.
+    """
+    actualizar_neto()
+    delta_hdr = histogramas.extraer_delta()
+    if delta_hdr is not None:
+        runner.send_message(MENSAJE_HDR, delta_hdr)
+    delta_server_timing = tiempos_servidor.extraer_delta()
+    if delta_server_timing is not None:
+        runner.send_message(MENSAJE_SERVER_TIMING, delta_server_timing)
+    delta = registro.extraer_delta(final=final)
+    if delta is not None:
+        runner.send_message(MENSAJE_DELTA, delta)
+
+
+def esperar_deltas_finales(runner):
+    """
+    Master: test_stop del master puede llegar antes que el de los workers
+    (con --run-time el master se detiene y recién después les manda quit).
+    Se pide a cada worker conectado que se detenga y envíe su delta final, y
+    se espera a todos (con límite) antes de escribir los reportes.
+    """
+    esperados = registro.pendientes(runner.clients.keys())
+    for worker_id in esperados:
+        runner.send_message(MENSAJE_CIERRE, None, client_id=worker_id)
+    limite = time.monotonic() + ESPERA_FINAL
+    while registro.pendientes(esperados) and time.monotonic() < limite:
+        gevent.sleep(0.2)
+    faltantes = registro.pendientes(esperados)
+    if faltantes:
+        logger.warning(f"Sin delta final de {len(faltantes)} workers: el reporte puede estar incompleto")
+
+
+def enviar_periodicamente(runner):
+    while True:
+        gevent.sleep(INTERVALO_ENVIO)
+        enviar_delta(runner)
+
+
+def recibir_cierre(environment, msg, **kwargs):
+    """Worker: detenerse; su test_stop envía el delta final (no-op si ya se detuvo)"""
+    environment.runner.stop()
+
+
+def recibir_pool(environment, msg, **kwargs):
+    """Worker: cargar la partición del pool y las cuentas compartidas"""
+    pool.cargar(msg.data["cuentas"], msg.data["saldo"])
+    cargar_compartidas(msg.data["compartidas"], msg.data["patron"], msg.data["saldo"])
+    logger.info(
+        f"🏦 Pool: {len(pool)} cuentas recibidas del master"
+        + (f", {len(compartidas)} compartidas" if compartidas else "")
+    )
+
+
+def recibir_delta(environment, msg, **kwargs):
+    """Master: combinar el delta que envía un worker"""
+    registro.combinar(msg.data, origen=msg.node_id)
+
+
+def recibir_hdr(environment, msg, **kwargs):
+    """Master: sumar los histogramas HDR que envía un worker"""
+    histogramas.combinar(msg.data)
+
+
+def recibir_server_timing(environment, msg, **kwargs):
+    """Master: sumar el desglose Server-Timing que envía un worker"""
+    tiempos_servidor.combinar(msg.data)
+
+
+@events.request.add_listener
+def on_request(request_type, name, response_time, response=None, **kwargs):
+    histogramas.registrar(request_type, name, response_time)
+    tiempos_servidor.registrar(request_type, name, response_time, response)
+
+
+def seleccionar_cliente_http(environment):
+    """
+    Dejar solo las variantes del cliente elegido con --cliente-http. Los
+    escenarios pedidos (p. ej. EliminacionMasivaUser) se cambian por su
+    variante en lugar de ejecutarse con los dos clientes a la vez. Los
+    escenarios solo_explicito (contención) corren solo si se nombran.
+    """
+    variantes = VARIANTES_HTTP[environment.parsed_options.cliente_http]
+    nombrados = bool(environment.parsed_options.user_classes)
+    seleccion = []
+    for clase in environment.user_classes:
+        if getattr(clase, "solo_explicito", False) and not nombrados:
+            continue
+        clase = variantes.get(getattr(clase, "escenario", None), clase)
+        if clase not in seleccion:
+            seleccion.append(clase)
+    environment.user_classes[:] = seleccion
+
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    """
+    Elegir el cliente HTTP y conectar el canal worker -> master del registro
+    de inconsistencias. Los workers conservan todas las clases: el master les
+    indica por nombre cuáles lanzar.
+    """
+    if environment.parsed_options and not isinstance(environment.runner, WorkerRunner):
+        if environment.parsed_options.grabar_traza:
+            grabar_traza(environment)
+        seleccionar_cliente_http(environment)
+    
+    if isinstance(environment.runner, MasterRunner):
+        environment.runner.register_message(MENSAJE_DELTA, recibir_delta)
+        environment.runner.register_message(MENSAJE_HDR, recibir_hdr)
+        environment.runner.register_message(MENSAJE_SERVER_TIMING, recibir_server_timing)
+    elif isinstance(environment.runner, WorkerRunner):
+        environment.runner.register_message(MENSAJE_POOL, recibir_pool)
+        environment.runner.register_message(MENSAJE_CIERRE, recibir_cierre, concurrent=True)
+        gevent.spawn(enviar_periodicamente, environment.runner)
+
+
+@events.init_command_line_parser.add_listener
+def on_parser(parser):
+    parser.add_argument(
+        "--cuentas-pool", type=int, default=0,
+        help="Sembrar N cuentas en MySQL antes de la prueba en lugar de un POST por usuario"
+    )
+    parser.add_argument(
+        "--cliente-http", choices=sorted(VARIANTES_HTTP), default="requests",
+        env_var="LOCUST_CLIENTE_HTTP",
+        help="Cliente HTTP de los usuarios: requests (HttpUser) o fast (FastHttpUser)"
+    )
+    parser.add_argument(
+        "--patron-acceso", default="zipf:1.1",
+        help="Contención: cuenta compartida que elige cada operación (uniforme | zipf:S | calientes:N[:P])"
+    )
+    parser.add_argument(
+        "--cuentas-contencion", type=int, default=100,
+        help="Contención: cuentas compartidas que se siembran para ContencionUser"
+    )
+    parser.add_argument(
+        "--monitor-invariantes", type=float, default=0,
+        help="Muestrear invariantes de la BD cada N segundos durante la prueba (0 = desactivado)"
+    )
+    parser.add_argument(
+        "--limite-pagina", type=int, default=100,
+        help="Listado: cuentas por página de GET /cuentas/pagina (máx. 500)"
+    )
+    parser.add_argument(
+        "--paginas-recorrido", type=int, default=10,
+        help="Listado: páginas que ListadoUser recorre por tarea (sigue desde donde quedó)"
+    )
+    parser.add_argument(
+        "--lineas-stream", type=int, default=0,
+        help="Listado: líneas de GET /cuentas/stream a leer antes de cortar (0 = todo)"
+    )
+    parser.add_argument(
+        "--tamanos-lote", default=TAMANOS_LOTE,
+        help="Lote: tamaños de lote separados por coma que LoteUser alterna (máx. 1000)"
+    )
+    parser.add_argument(
+        "--grabar-traza", default=None,
+        help="Escribir la traza de CuentasUser para --users/--run-time en este archivo y salir sin ejecutar"
+    )
+    parser.add_argument(
+        "--semilla-traza", type=int, default=1,
+        help="Semilla de --grabar-traza: la misma semilla produce la misma traza"
+    )
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    registro.reiniciar()
+    histogramas.reiniciar()
+    tiempos_servidor.reiniciar()
+    libro.extraer_neto()
+    
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    siembra.clear()
+    cargar_compartidas([], None)
+    opciones = environment.parsed_options
+    total = getattr(opciones, "cuentas_pool", 0)
+    total_compartidas = 0
+    escenarios = {getattr(clase, "escenario", None) for clase in environment.user_classes}
+    if escenarios & ESCENARIOS_COMPARTIDOS:
+        total_compartidas = getattr(opciones, "cuentas_contencion", 0)
+        # modos_saldo reparte las cuentas entre los modos: cada partición necesita las suyas
+        partes = len(MODOS_SALDO) if "modos_saldo" in escenarios else 1
+        try:
+            if total_compartidas // partes < 1:
+                raise ValueError(
+                    f"--cuentas-contencion {total_compartidas} no alcanza para {partes} particiones"
+                )
+            crear_patron(opciones.patron_acceso, total_compartidas // partes)
+        except ValueError as e:
+            logger.error(f"{e}: no se siembran cuentas compartidas")
+            total_compartidas = 0
+    if total or total_compartidas:
+        sembrar_pool_cuentas(environment.runner, total, total_compartidas, getattr(opciones, "patron_acceso", None))
+    
+    intervalo = getattr(opciones, "monitor_invariantes", 0)
+    if intervalo:
+        iniciar_monitor(environment, intervalo)
+    
+    iniciar_medicion_cache(environment)
+
+
+def iniciar_medicion_cache(environment):
+    """Master/local: primera lectura de los contadores de la caché y de MySQL"""
+    global medicion_cache
+    medicion_cache = None
+    if not environment.host:
+        return
+    medicion = MedicionCache(environment.host)
+    medicion.inicio_prueba = time.monotonic()
+    if medicion.iniciar():
+        medicion_cache = medicion
+    else:
+        logger.info("Sin GET /cuentas/cache/estadisticas: no se miden los contadores de caché")
+
+
+def cargar_compartidas(cuentas, especificacion, saldo_inicial=SALDO_INICIAL):
+    """Cargar las cuentas compartidas y abrirlas en orden de rango en su libro"""
+    compartidas.cargar(cuentas, especificacion)
+    libro_contencion.reiniciar()
+    for cuenta_id in compartidas.cuentas:
+        libro_contencion.abrir_cuenta(cuenta_id, saldo_inicial)
+
+
+def sembrar_pool_cuentas(runner, total, total_compartidas=0, especificacion=None):
+    """
+    Master/local: sembrar el pool antes de lanzar usuarios. En modo
+    distribuido cada worker recibe su partición antes que su orden de spawn.
+    Las primeras total_compartidas cuentas no se reparten: van completas y en
+    el mismo orden a todos los workers (escenario de contención).
+    """
+    try:
+        inicio = time.perf_counter()
+        cuentas = sembrar_pool(total + total_compartidas)
+        cargar_compartidas(cuentas[:total_compartidas], especificacion)
+    except Exception as e:
+        logger.error(f"No se pudo sembrar el pool de cuentas, se usará POST /cuentas: {e}")
+        return
+    logger.info(f"🏦 Pool: {len(cuentas)} cuentas sembradas en {time.perf_counter() - inicio:.1f}s")
+    if cuentas:
+        siembra.update(prefijo=cuentas[0][1].rsplit("-", 1)[0] + "-", cuentas=len(cuentas))
+    if compartidas:
+        logger.info(f"🔥 Contención: {len(compartidas)} cuentas compartidas, patrón {compartidas.patron.etiqueta}")
+    lista_compartidas, cuentas = cuentas[:total_compartidas], cuentas[total_compartidas:]
+    
+    if isinstance(runner, MasterRunner):
+        workers = list(runner.clients.keys())
+        for worker_id, particion in zip(workers, particionar(cuentas, len(workers))):
+            runner.send_message(
+                MENSAJE_POOL,
+                {
+                    "cuentas": particion,
+                    "saldo": SALDO_INICIAL,
+                    "compartidas": lista_compartidas,
+                    "patron": especificacion
+                },
+                client_id=worker_id
+            )
+    else:
+        pool.cargar(cuentas)
+
+
+def guardar_reporte_libro(timestamp):
+    """Resumen global del libro en locust/reportes/libro_YYYYMMDD_HHMMSS.json"""
+    try:
+        import os
+        os.makedirs("locust/reportes", exist_ok=True)
+        with open(f"locust/reportes/libro_{timestamp}.json", "w") as f:
+            json.dump(dict(
+                registro.libro,
+                timestamp=datetime.now().isoformat(),
+                detalles=[inc for inc in registro.muestras if inc["tipo"] == "DERIVA_SALDO"]
+            ), f, indent=2)
+    except Exception as e:
+        logger.error(f"Error guardando reporte del libro: {e}")
+
+
+def deriva_por_modo(conciliacion):
+    """
+    Escenario modos_saldo: operaciones y deriva de las cuentas compartidas de
+    cada modo (la cuenta de rango r pertenece a MODOS_SALDO[r % 3])
+    """
+    modos = {
+        modo: {"cuentas": 0, "operaciones": 0, "cuentas_con_deriva": 0, "deriva_total": 0.0,
+               "deriva_absoluta_total": 0.0}
+        for modo in MODOS_SALDO
+    }
+    modo_de = {cuenta_id: MODOS_SALDO[rango % len(MODOS_SALDO)] for rango, cuenta_id in enumerate(compartidas.cuentas)}
+    for cuenta_id, (_, operaciones) in registro.contencion.items():
+        if cuenta_id in modo_de:
+            modos[modo_de[cuenta_id]]["cuentas"] += 1
+            modos[modo_de[cuenta_id]]["operaciones"] += int(operaciones)
+    for detalle in (conciliacion or {}).get("detalles", []):
+        if detalle["cuenta_id"] in modo_de:
+            datos = modos[modo_de[detalle["cuenta_id"]]]
+            datos["cuentas_con_deriva"] += 1
+            datos["deriva_total"] = round(datos["deriva_total"] + detalle["deriva"], 2)
+            datos["deriva_absoluta_total"] = round(datos["deriva_absoluta_total"] + abs(detalle["deriva"]), 2)
+    return modos
+
+
+def guardar_reporte_contencion(environment, timestamp, conciliacion):
+    """
+    Throughput y latencia del escenario de contención junto con el sesgo
+    pedido (patrón) y el medido (concentración de operaciones), en
+    locust/reportes/contencion_<patrón>_YYYYMMDD_HHMMSS.json. Un archivo por
+    ejecución; resumen_contencion.py los compara.
+    """
+    endpoints = {}
+    for (nombre, metodo), entrada in environment.stats.entries.items():
+        if not nombre.endswith(SUFIJO_CONTENCION):
+            continue
+        hdr = histogramas.acumulados.get(f"{metodo} {nombre}")
+        endpoints[f"{metodo} {nombre}"] = {
+            "solicitudes": entrada.num_requests,
+            "fallos": entrada.num_failures,
+            "rps": round(entrada.total_rps, 2),
+            "media_ms": round(entrada.avg_response_time, 2),
+            **({
+                f"p{p:g}_ms": hdr.get_value_at_percentile(p) / 1000 for p in (50, 95, 99, 99.9)
+            } if hdr else {
+                f"p{p:g}_ms": entrada.get_response_time_percentile(p / 100) for p in (50, 95, 99)
+            })
+        }
+    
+    operaciones = [operaciones for _, operaciones in registro.contencion.values()]
+    modos = None
+    if any(getattr(clase, "escenario", None) == "modos_saldo" for clase in environment.user_classes):
+        modos = deriva_por_modo(conciliacion)
+    try:
+        import os
+        os.makedirs("locust/reportes", exist_ok=True)
+        archivo = f"locust/reportes/contencion_{compartidas.patron.etiqueta}_{timestamp}.json"
+        with open(archivo, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "patron": compartidas.patron.descripcion(),
+                "especificacion": compartidas.especificacion,
+                "cuentas_compartidas": len(compartidas),
+                "usuarios": environment.parsed_options.num_users,
+                "cliente_http": environment.parsed_options.cliente_http,
+                "concentracion": concentracion(operaciones),
+                "conciliacion": {
+                    clave: valor for clave, valor in (conciliacion or {}).items() if clave != "detalles"
+                },
+                "endpoints": endpoints,
+                **({"modos_saldo": modos} if modos else {})
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"🔥 Reporte de contención guardado en: {archivo}")
+    except Exception as e:
+        logger.error(f"Error guardando reporte de contención: {e}")
+
+
+def guardar_reporte_lote(environment, timestamp):
+    """
+    Curva de throughput del endpoint de lotes: por tamaño de lote, solicitudes
+    y movimientos por segundo y latencia (por lote y por movimiento), en
+    locust/reportes/lote_YYYYMMDD_HHMMSS.json
+    """
+    tamanos = {}
+    for (nombre, metodo), entrada in environment.stats.entries.items():
+        if not nombre.startswith(NOMBRE_LOTE):
+            continue
+        n = int(nombre[len(NOMBRE_LOTE):].strip("[n=]"))
+        hdr = histogramas.acumulados.get(f"{metodo} {nombre}")
+        p50 = hdr.get_value_at_percentile(50) / 1000 if hdr else entrada.get_response_time_percentile(0.5)
+        tamanos[n] = {
+            "solicitudes": entrada.num_requests,
+            "fallos": entrada.num_failures,
+            "rps": round(entrada.total_rps, 2),
+            "movimientos_por_segundo": round(entrada.total_rps * n, 2),
+            "media_ms": round(entrada.avg_response_time, 2),
+            **({
+                f"p{p:g}_ms": hdr.get_value_at_percentile(p) / 1000 for p in (50, 95, 99)
+            } if hdr else {
+                f"p{p:g}_ms": entrada.get_response_time_percentile(p / 100) for p in (50, 95, 99)
+            }),
+            "p50_ms_por_movimiento": round(p50 / n, 3) if p50 else None
+        }
+    if not tamanos:
+        return
+    
+    try:
+        import os
+        os.makedirs("locust/reportes", exist_ok=True)
+        archivo = f"locust/reportes/lote_{timestamp}.json"
+        with open(archivo, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "usuarios": environment.parsed_options.num_users,
+                "cliente_http": environment.parsed_options.cliente_http,
+                "cuentas_compartidas": len(compartidas),
+                "patron": compartidas.patron.descripcion() if compartidas.patron else None,
+                "tamanos": {str(n): tamanos[n] for n in sorted(tamanos)}
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"📦 Reporte de lotes guardado en: {archivo}")
+        for n in sorted(tamanos):
+            logger.info(
+                f"📦 Lote de {n}: {tamanos[n]['rps']} req/s, "
+                f"{tamanos[n]['movimientos_por_segundo']} movimientos/s, p50 {tamanos[n]['p50_ms']} ms"
+            )
+    except Exception as e:
+        logger.error(f"Error guardando reporte de lotes: {e}")
+
+
+def guardar_reporte_cache(environment, timestamp):
+    """
+    Tasa de aciertos de la caché del servicio, consultas evitadas, carga de
+    lectura en MySQL y lecturas obsoletas detectadas durante la prueba, en
+    locust/reportes/cache_YYYYMMDD_HHMMSS.json
+    """
+    if medicion_cache is None:
+        return
+    try:
+        resumen = medicion_cache.resumen(time.monotonic() - medicion_cache.inicio_prueba)
+        if resumen is None:
+            return
+        import os
+        os.makedirs("locust/reportes", exist_ok=True)
+        archivo = f"locust/reportes/cache_{timestamp}.json"
+        with open(archivo, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "usuarios": environment.parsed_options.num_users,
+                "cliente_http": environment.parsed_options.cliente_http,
+                "cache": resumen,
+                "lecturas_obsoletas": registro.por_tipo.get("LECTURA_OBSOLETA", 0),
+                "lecturas_cuenta": environment.stats.get("/cuentas/[id]", "GET").num_requests
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"🗃️ Reporte de caché guardado en: {archivo}")
+        if resumen["habilitada"]:
+            logger.info(
+                f"🗃️ Caché: {resumen['tasa_aciertos']} de aciertos ({resumen['aciertos']}/{resumen['lecturas']}), "
+                f"{resumen['consultas_evitadas']} consultas evitadas, {resumen['expulsiones']} expulsiones"
+            )
+        if "mysql" in resumen:
+            logger.info(f"🗃️ MySQL: {resumen['mysql']['Com_select']} SELECT durante la prueba")
+    except Exception as e:
+        logger.error(f"Error guardando reporte de caché: {e}")
+
+
+def guardar_reporte_server_timing(timestamp):
+    """
+    Desglose de la latencia por endpoint en bd, app y red (cabecera
+    Server-Timing del servicio), en locust/reportes/server_timing_YYYYMMDD_HHMMSS.json
+    """
+    try:
+        archivo = tiempos_servidor.guardar(timestamp=timestamp)
+        if not archivo:
+            return
+        logger.info(f"⏱️ Desglose Server-Timing guardado en: {archivo}")
+        for endpoint, datos in tiempos_servidor.resumen().items():
+            if "bd" not in datos:
+                continue
+            logger.info(
+                f"⏱️ {endpoint}: p95 bd {datos['bd']['p95_ms']} ms, app {datos['app']['p95_ms']} ms, "
+                f"red {datos['red']['p95_ms']} ms ({datos['consultas']['media']} consultas en promedio)"
+            )
+    except Exception as e:
+        logger.error(f"Error guardando desglose Server-Timing: {e}")
+
+
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
     """Ejecutado al finalizar las pruebas - genera reporte de inconsistencias"""
+    if not isinstance(environment.runner, MasterRunner):
+        conciliar_libro()
+        if libro_contencion.cuentas:
+            registro.registrar_contencion(libro_contencion.resumen())
+    
+    if isinstance(environment.runner, WorkerRunner):
+        # El reporte lo escribe el master
+        enviar_delta(environment.runner, final=True)
+        return
+    
+    if isinstance(environment.runner, MasterRunner):
+        esperar_deltas_finales(environment.runner)
+    # Después del delta final: la última muestra ya ve el neto completo
+    detener_monitor()
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    conciliacion_contencion = conciliar_contencion()
+    if registro.contencion:
+        guardar_reporte_contencion(environment, timestamp, conciliacion_contencion)
+    if registro.libro:
+        guardar_reporte_libro(timestamp)
+    if any(getattr(clase, "escenario", None) == "lote" for clase in environment.user_classes):
+        guardar_reporte_lote(environment, timestamp)
+    guardar_reporte_cache(environment, timestamp)
+    try:
+        archivo_hdr = histogramas.guardar(timestamp=timestamp)
+        if archivo_hdr:
+            logger.info(f"📊 Histogramas HDR guardados en: {archivo_hdr}")
+    except Exception as e:
+        logger.error(f"Error guardando histogramas HDR: {e}")
+    guardar_reporte_server_timing(timestamp)
+    
     logger.info("=" * 80)
     logger.info("REPORTE DE INCONSISTENCIAS")
     logger.info("=" * 80)
     
-    if inconsistencias:
-        logger.error(f"\n⚠️  Se detectaron {len(inconsistencias)} INCONSISTENCIAS:\n")
-        
-        # Agrupar por tipo
-        por_tipo = {}
-        for inc in inconsistencias:
-            tipo = inc["tipo"]
-            por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
+    if registro.total:
+        logger.error(f"\n⚠️  Se detectaron {registro.total} INCONSISTENCIAS:\n")
         
-        for tipo, cantidad in por_tipo.items():
+        for tipo, cantidad in registro.por_tipo.items():
             logger.error(f"  - {tipo}: {cantidad} ocurrencias")
         
         # Guardar reporte detallado
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         reporte_file = f"locust/reportes/inconsistencias_{timestamp}.json"
         
         try:
@@ -238,13 +1049,10 @@ def on_test_stop(environment, **kwargs):
             os.makedirs("locust/reportes", exist_ok=True)
             
             with open(reporte_file, "w") as f:
-                json.dump({
-                    "timestamp": datetime.now().isoformat(),
-                    "total_inconsistencias": len(inconsistencias),
-                    "por_tipo": por_tipo,
-                    "detalles": inconsistencias,
-                    "cuentas_creadas": len(cuentas_creadas)
-                }, f, indent=2)
+                json.dump(dict(
+                    {"timestamp": datetime.now().isoformat()},
+                    **registro.reporte()
+                ), f, indent=2)
             
             logger.info(f"\n✅ Reporte guardado en: {reporte_file}")
         except Exception as e:
@@ -253,21 +1061,32 @@ def on_test_stop(environment, **kwargs):
         logger.info("\n✅ No se detectaron inconsistencias durante la prueba")
     
     logger.info(f"\n📊 Estadísticas:")
-    logger.info(f"  - Cuentas creadas: {len(cuentas_creadas)}")
-    logger.info(f"  - Inconsistencias totales: {len(inconsistencias)}")
+    logger.info(f"  - Cuentas creadas: {registro.cuentas_creadas}")
+    logger.info(f"  - Inconsistencias totales: {registro.total}")
+    if registro.workers:
+        logger.info(f"  - Workers reportando: {len(registro.workers)}")
     logger.info("=" * 80)
 
 
 # Clase para pruebas específicas de eliminación masiva
-class EliminacionMasivaUser(HttpUser):
+class OperacionesEliminacionMasiva(User):
     """Usuario específico para probar eliminaciones concurrentes masivas"""
     
+    abstract = True
+    escenario = "eliminacion_masiva"
+    
     wait_time = between(0.5, 1.5)
     
     def on_start(self):
-        """Crear múltiples cuentas para eliminar"""
+        """Tomar del pool (o crear) múltiples cuentas para eliminar"""
         self.cuentas_ids = []
         for i in range(5):
+            cuenta = pool.arrendar()
+            if cuenta:
+                self.cuentas_ids.append(cuenta[0])
+                libro.abrir_cuenta(cuenta[0], pool.saldo_inicial)
+                continue
+            
             numero = f"DELETE-{random.randint(100000, 999999)}"
             payload = {
                 "socioId": f"{random.randint(1, 50)}",
@@ -280,6 +1099,7 @@ class EliminacionMasivaUser(HttpUser):
             if response.status_code == 201:
                 data = response.json()
                 self.cuentas_ids.append(data.get("id"))
+                libro.abrir_cuenta(data.get("id"), data.get("saldo", 1000.0))
     
     @task
     def eliminar_concurrente(self):
@@ -300,7 +1120,7 @@ class EliminacionMasivaUser(HttpUser):
                     self.cuentas_ids.remove(cuenta_id)
             elif response.status_code == 404:
                 # Ya eliminada - race condition
-                inconsistencias.append({
+                registro.agregar({
                     "tipo": "DOUBLE_DELETE",
                     "cuenta_id": cuenta_id,
                     "timestamp": datetime.now().isoformat()
@@ -308,3 +1128,455 @@ class EliminacionMasivaUser(HttpUser):
                 response.success()
             else:
                 response.failure(f"Error: {response.status_code}")
+
+
+# Sufijo de los name= del escenario de contención (filtra sus estadísticas)
+SUFIJO_CONTENCION = " (contención)"
+
+
+class OperacionesContencion(User):
+    """
+    Usuario para medir contención: cada operación elige una cuenta del
+    conjunto compartido con el patrón de --patron-acceso, así que muchos
+    usuarios (de todos los workers) escriben las mismas filas a la vez.
+    Requiere las cuentas sembradas con --cuentas-contencion.
+    """
+    
+    abstract = True
+    escenario = "contencion"
+    solo_explicito = True
+    
+    wait_time = between(0.5, 1.5)
+    
+    def on_start(self):
+        if not compartidas:
+            logger.error("🔥 Contención: no hay cuentas compartidas sembradas (--cuentas-contencion)")
+            raise StopUser()
+    
+    @task(3)
+    def retiro_compartido(self):
+        cuenta_id = compartidas.elegir()
+        monto = round(random.uniform(100, 500), 2)
+        
+        with self.client.post(
+            f"/cuentas/{cuenta_id}/retiro",
+            json={"monto": monto},
+            catch_response=True,
+            name="/cuentas/[id]/retiro" + SUFIJO_CONTENCION
+        ) as response:
+            if response.status_code == 200:
+                nuevo_saldo = response.json().get("saldo")
+                libro_contencion.registrar(cuenta_id, -monto, nuevo_saldo)
+                if nuevo_saldo < 0:
+                    registro.agregar({
+                        "tipo": "SALDO_NEGATIVO",
+                        "escenario": "contencion",
+                        "cuenta_id": cuenta_id,
+                        "saldo": nuevo_saldo,
+                        "operacion": "retiro",
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    response.failure(f"Saldo negativo: {nuevo_saldo}")
+                else:
+                    response.success()
+            elif response.status_code == 409:
+                # Saldo insuficiente es esperado
+                response.success()
+            else:
+                response.failure(f"Error en retiro: {response.status_code}")
+    
+    @task(3)
+    def deposito_compartido(self):
+        cuenta_id = compartidas.elegir()
+        monto = round(random.uniform(200, 800), 2)
+        
+        with self.client.post(
+            f"/cuentas/{cuenta_id}/deposito",
+            json={"monto": monto},
+            catch_response=True,
+            name="/cuentas/[id]/deposito" + SUFIJO_CONTENCION
+        ) as response:
+            if response.status_code == 200:
+                libro_contencion.registrar(cuenta_id, monto, response.json().get("saldo"))
+                response.success()
+            else:
+                response.failure(f"Error en depósito: {response.status_code}")
+    
+    @task(1)
+    def consultar_compartida(self):
+        with self.client.get(
+            f"/cuentas/{compartidas.elegir()}",
+            catch_response=True,
+            name="/cuentas/[id]" + SUFIJO_CONTENCION
+        ) as response:
+            if response.status_code == 200:
+                response.success()
+            else:
+                response.failure(f"Error obteniendo cuenta: {response.status_code}")
+
+
+# Modos de actualización de saldo del servicio (ver src/cuentas/modo-saldo.ts)
+MODOS_SALDO = ("legacy", "atomico", "pesimista")
+
+# Escenarios que usan las cuentas compartidas (--cuentas-contencion)
+ESCENARIOS_COMPARTIDOS = {"contencion", "modos_saldo", "lote"}
+
+
+class OperacionesModosSaldo(User):
+    """
+    Benchmark de los modos de saldo (legacy, atomico, pesimista) bajo el
+    patrón de contención: cada operación elige un modo al azar y lo pide con
+    la cabecera X-Modo-Saldo (el servicio debe correr con
+    CUENTAS_MODO_SALDO_POR_CABECERA=true). Cada modo tiene su partición de
+    cuentas compartidas, con el mismo sesgo, para que la deriva de un modo no
+    contamine a los otros. Requiere --cuentas-contencion (múltiplo de 3).
+    """
+    
+    abstract = True
+    escenario = "modos_saldo"
+    solo_explicito = True
+    
+    wait_time = between(0.5, 1.5)
+    
+    def on_start(self):
+        if len(compartidas) < len(MODOS_SALDO):
+            logger.error("⚖️  Modos de saldo: no hay cuentas compartidas sembradas (--cuentas-contencion)")
+            raise StopUser()
+    
+    def _elegir(self):
+        particion = random.randrange(len(MODOS_SALDO))
+        return MODOS_SALDO[particion], compartidas.elegir_en(particion, len(MODOS_SALDO))
+    
+    def _operar(self, operacion, monto):
+        modo, cuenta_id = self._elegir()
+        
+        with self.client.post(
+            f"/cuentas/{cuenta_id}/{operacion}",
+            json={"monto": monto},
+            headers={"X-Modo-Saldo": modo},
+            catch_response=True,
+            name=f"/cuentas/[id]/{operacion} [{modo}]" + SUFIJO_CONTENCION
+        ) as response:
+            if response.status_code == 200:
+                nuevo_saldo = response.json().get("saldo")
+                # Confirmada aunque el modo no se haya respetado: el libro sigue cuadrando
+                libro_contencion.registrar(cuenta_id, monto if operacion == "deposito" else -monto, nuevo_saldo)
+                if response.headers.get("X-Modo-Saldo") != modo:
+                    response.failure("Modo no aplicado: servicio sin CUENTAS_MODO_SALDO_POR_CABECERA=true")
+                elif nuevo_saldo < 0:
+                    registro.agregar({
+                        "tipo": "SALDO_NEGATIVO",
+                        "escenario": "modos_saldo",
+                        "modo": modo,
+                        "cuenta_id": cuenta_id,
+                        "saldo": nuevo_saldo,
+                        "operacion": operacion,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    response.failure(f"Saldo negativo: {nuevo_saldo}")
+                else:
+                    response.success()
+            elif response.status_code == 409 and operacion == "retiro":
+                # Saldo insuficiente es esperado
+                response.success()
+            else:
+                response.failure(f"Error en {operacion} ({modo}): {response.status_code}")
+    
+    @task(3)
+    def retiro_por_modo(self):
+        self._operar("retiro", round(random.uniform(100, 500), 2))
+    
+    @task(3)
+    def deposito_por_modo(self):
+        self._operar("deposito", round(random.uniform(200, 800), 2))
+
+
+# Tamaños de lote por defecto (--tamanos-lote) y máximo que acepta el servicio
+TAMANOS_LOTE = "1,10,50,100,500"
+MAX_OPERACIONES_LOTE = 1000
+
+# Prefijo de los name= del escenario de lotes: "/cuentas/operaciones/lote [n=100]"
+NOMBRE_LOTE = "/cuentas/operaciones/lote "
+
+
+def leer_tamanos_lote(texto):
+    """'1,10,100' -> [1, 10, 100]; ValueError si algún tamaño está fuera de 1..1000"""
+    tamanos = [int(parte) for parte in str(texto).split(",") if parte.strip()]
+    if not tamanos or not all(1 <= n <= MAX_OPERACIONES_LOTE for n in tamanos):
+        raise ValueError(f"Tamaños de lote inválidos: {texto!r} (enteros entre 1 y {MAX_OPERACIONES_LOTE})")
+    return tamanos
+
+
+class OperacionesLote(User):
+    """
+    Usuario para POST /cuentas/operaciones/lote: cada solicitud lleva n
+    depósitos y retiros (n alterna entre --tamanos-lote) sobre las cuentas
+    compartidas, elegidas con --patron-acceso. Sin espera entre solicitudes:
+    los usuarios fijan la concurrencia y el servicio el throughput, que queda
+    por tamaño de lote en locust/reportes/lote_YYYYMMDD_HHMMSS.json.
+    Los movimientos aplicados se registran en el libro de las cuentas
+    compartidas, así la conciliación del master también verifica los lotes.
+    """
+    
+    abstract = True
+    escenario = "lote"
+    solo_explicito = True
+    
+    wait_time = constant(0)
+    
+    def on_start(self):
+        if not compartidas:
+            logger.error("📦 Lote: no hay cuentas compartidas sembradas (--cuentas-contencion)")
+            raise StopUser()
+        try:
+            self.tamanos = leer_tamanos_lote(self.environment.parsed_options.tamanos_lote)
+        except ValueError as e:
+            logger.error(f"📦 Lote: {e}")
+            raise StopUser()
+    
+    @task
+    def operaciones_lote(self):
+        n = random.choice(self.tamanos)
+        operaciones = []
+        for _ in range(n):
+            if random.random() < 0.5:
+                operaciones.append({"cuentaId": compartidas.elegir(), "tipo": "RETIRO",
+                                    "monto": round(random.uniform(100, 500), 2)})
+            else:
+                operaciones.append({"cuentaId": compartidas.elegir(), "tipo": "DEPOSITO",
+                                    "monto": round(random.uniform(200, 800), 2)})
+        
+        with self.client.post(
+            "/cuentas/operaciones/lote",
+            json={"operaciones": operaciones},
+            catch_response=True,
+            name=f"{NOMBRE_LOTE}[n={n}]"
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"Error en lote de {n}: {response.status_code}")
+                return
+            resultados = response.json().get("resultados") or []
+            if len(resultados) != n:
+                response.failure(f"Lote de {n}: {len(resultados)} resultados")
+                return
+            
+            inesperados = []
+            for operacion, resultado in zip(operaciones, resultados):
+                if resultado.get("exito"):
+                    monto = operacion["monto"] if operacion["tipo"] == "DEPOSITO" else -operacion["monto"]
+                    libro_contencion.registrar(operacion["cuentaId"], monto, resultado.get("saldo"))
+                    if resultado.get("saldo", 0) < 0:
+                        registro.agregar({
+                            "tipo": "SALDO_NEGATIVO",
+                            "escenario": "lote",
+                            "cuenta_id": operacion["cuentaId"],
+                            "saldo": resultado["saldo"],
+                            "operacion": operacion["tipo"].lower(),
+                            "timestamp": datetime.now().isoformat()
+                        })
+                        inesperados.append(f"saldo negativo {resultado['saldo']}")
+                elif resultado.get("error") != "Saldo insuficiente":
+                    # Saldo insuficiente es esperado; cualquier otro rechazo no
+                    inesperados.append(resultado.get("error"))
+            
+            if inesperados:
+                response.failure(f"Lote de {n}: {len(inesperados)} movimientos con error ({inesperados[0]})")
+            else:
+                response.success()
+
+
+# Bytes por lectura del cuerpo de GET /cuentas/stream
+TROZO_STREAM = 64 * 1024
+
+
+def leer_trozos(response, tamano=TROZO_STREAM):
+    """Cuerpo de una respuesta con stream=True por trozos (HttpUser o FastHttpUser)"""
+    if hasattr(response, "iter_content"):
+        yield from response.iter_content(tamano)
+        return
+    while True:
+        trozo = response.stream.read(tamano)
+        if not trozo:
+            return
+        yield trozo
+
+
+def cerrar_stream(response):
+    """Liberar la conexión; si el cuerpo no se leyó completo se cierra en lugar de reutilizarse"""
+    if hasattr(response, "iter_content"):
+        response.close()
+    else:
+        response.stream.release()
+
+
+class OperacionesListado(User):
+    """
+    Usuario para el listado de cuentas en tablas grandes: recorre
+    GET /cuentas/pagina siguiendo el cursor (cada usuario continúa donde quedó,
+    así con el tiempo llega a páginas profundas) y consume GET /cuentas/stream.
+    Las páginas se agrupan por profundidad (pág. 1, 10+, 100+, ...): con
+    keyset la latencia debe ser la misma en todos los grupos y con cualquier
+    tamaño de tabla (ver generar_dataset.py).
+    """
+    
+    abstract = True
+    escenario = "listado"
+    solo_explicito = True
+    
+    wait_time = between(0.5, 1.5)
+    
+    def on_start(self):
+        self.cursor = None
+        self.pagina = 0
+        self.ultimos_ids = set()
+    
+    @task(3)
+    def recorrer_paginas(self):
+        opciones = self.environment.parsed_options
+        for _ in range(opciones.paginas_recorrido):
+            self.pagina += 1
+            profundidad = 10 ** int(math.log10(self.pagina))
+            parametros = {"limite": opciones.limite_pagina}
+            if self.cursor:
+                parametros["cursor"] = self.cursor
+            
+            with self.client.get(
+                "/cuentas/pagina",
+                params=parametros,
+                catch_response=True,
+                name=f"/cuentas/pagina [pág. {profundidad}{'+' if profundidad > 1 else ''}]"
+            ) as response:
+                if response.status_code != 200:
+                    response.failure(f"Error en página {self.pagina}: {response.status_code}")
+                    self.cursor, self.pagina, self.ultimos_ids = None, 0, set()
+                    return
+                datos = response.json()
+                ids = {cuenta["id"] for cuenta in datos.get("cuentas", [])}
+                repetidas = ids & self.ultimos_ids
+                if repetidas:
+                    # Con keyset dos páginas seguidas nunca comparten filas
+                    registro.agregar({
+                        "tipo": "PAGINA_REPETIDA",
+                        "pagina": self.pagina,
+                        "cuentas_repetidas": len(repetidas),
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    response.failure(f"Página {self.pagina}: {len(repetidas)} cuentas de la página anterior")
+                else:
+                    response.success()
+                self.ultimos_ids = ids
+                self.cursor = datos.get("siguienteCursor")
+            
+            if not self.cursor:
+                # Fin de la tabla: volver a empezar
+                self.pagina, self.ultimos_ids = 0, set()
+                return
+    
+    @task(1)
+    def consumir_stream(self):
+        maximo = self.environment.parsed_options.lineas_stream
+        inicio = time.perf_counter()
+        lineas = 0
+        total_bytes = 0
+        error = None
+        
+        # El tiempo de /cuentas/stream es hasta los encabezados; el de
+        # "/cuentas/stream (completo)" incluye leer todas las líneas
+        with self.client.get("/cuentas/stream", stream=True, catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"Error en stream: {response.status_code}")
+                return
+            response.success()
+            try:
+                primera = None
+                for trozo in leer_trozos(response):
+                    if primera is None:
+                        primera = trozo.split(b"\n", 1)[0]
+                    total_bytes += len(trozo)
+                    lineas += trozo.count(b"\n")
+                    if maximo and lineas >= maximo:
+                        break
+                if primera:
+                    json.loads(primera)
+            except Exception as e:
+                error = e
+            finally:
+                cerrar_stream(response)
+        
+        self.environment.events.request.fire(
+            request_type="GET",
+            name="/cuentas/stream (completo)",
+            response_time=(time.perf_counter() - inicio) * 1000,
+            response_length=total_bytes,
+            exception=error,
+            context={"lineas": lineas}
+        )
+
+
+# Variantes concretas por cliente HTTP: mismas tareas, pesos y verificaciones
+class CuentasUser(OperacionesCuentas, HttpUser):
+    cliente_http = "requests"
+
+
+class CuentasFastUser(OperacionesCuentas, FastHttpUser):
+    cliente_http = "fast"
+
+
+class EliminacionMasivaUser(OperacionesEliminacionMasiva, HttpUser):
+    cliente_http = "requests"
+
+
+class EliminacionMasivaFastUser(OperacionesEliminacionMasiva, FastHttpUser):
+    cliente_http = "fast"
+
+
+class ContencionUser(OperacionesContencion, HttpUser):
+    cliente_http = "requests"
+
+
+class ContencionFastUser(OperacionesContencion, FastHttpUser):
+    cliente_http = "fast"
+
+
+class ModosSaldoUser(OperacionesModosSaldo, HttpUser):
+    cliente_http = "requests"
+
+
+class ModosSaldoFastUser(OperacionesModosSaldo, FastHttpUser):
+    cliente_http = "fast"
+
+
+class LoteUser(OperacionesLote, HttpUser):
+    cliente_http = "requests"
+
+
+class LoteFastUser(OperacionesLote, FastHttpUser):
+    cliente_http = "fast"
+
+
+class ListadoUser(OperacionesListado, HttpUser):
+    cliente_http = "requests"
+
+
+class ListadoFastUser(OperacionesListado, FastHttpUser):
+    cliente_http = "fast"
+
+
+VARIANTES_HTTP = {
+    "requests": {
+        "cuentas": CuentasUser,
+        "eliminacion_masiva": EliminacionMasivaUser,
+        "contencion": ContencionUser,
+        "modos_saldo": ModosSaldoUser,
+        "lote": LoteUser,
+        "listado": ListadoUser
+    },
+    "fast": {
+        "cuentas": CuentasFastUser,
+        "eliminacion_masiva": EliminacionMasivaFastUser,
+        "contencion": ContencionFastUser,
+        "modos_saldo": ModosSaldoFastUser,
+        "lote": LoteFastUser,
+        "listado": ListadoFastUser
+    }
+}
@@ -0,0 +1,252 @@
+"""
+Monitor de Invariantes en Vivo (durante la prueba de carga)
+validar_inconsistencias.py solo corre con Locust detenido; este monitor
+muestrea la BD cada N segundos mientras la prueba corre, para saber en qué
+minuto y con cuánta carga aparecen las inconsistencias.
+
+Sondas (consultas agregadas baratas, una sola conexión de un pool dedicado):
+- Cuentas con saldo negativo y saldo total del ámbito (con prefijo, p. ej. el
+  de las cuentas sembradas POOL-<token>-, es un rango sobre el índice único
+  de numeroCuenta; sin prefijo recorre toda la tabla)
+- Saldo esperado según el libro de operaciones del cliente y la diferencia
+- Filas nuevas de auditoria_cuentas por segundo (MAX(id), resuelto con la PK)
+
+El costo de cada muestra queda medido en la misma serie: duración de las
+sondas y filas leídas por el servidor (Handler_read_* de la sesión).
+
+Serie de tiempo en locust/reportes/monitor_invariantes_YYYYMMDD_HHMMSS.csv; la
+columna Timestamp (epoch en segundos) es la misma del _stats_history.csv de
+Locust (--csv), así ambas series se pueden unir.
+
+Uso como proceso aparte (sidecar):
+    python locust/monitor_invariantes.py --intervalo 5 --prefijo POOL-3fa9c1-
+Uso desde Locust: --monitor-invariantes 5 (ver locustfile.py)
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import mysql.connector.pooling
+
+from validar_inconsistencias import DB_CONFIG, DIRECTORIO_REPORTES
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre muestras
+INTERVALO = 5
+
+# Paso de la espera entre muestras (latencia de detener())
+ESPERA_PASO = 0.2
+
+# Límite de ejecución de cada sonda (hint MAX_EXECUTION_TIME de MySQL 8)
+MAX_EJECUCION_MS = 2000
+
+COLUMNAS = [
+    "Timestamp",
+    "segundos",
+    "usuarios",
+    "rps",
+    "cuentas",
+    "cuentas_saldo_negativo",
+    "saldo_total",
+    "saldo_esperado",
+    "diferencia",
+    "auditoria_max_id",
+    "auditoria_por_segundo",
+    "duracion_sondas_ms",
+    "filas_leidas"
+]
+
+SONDA_SALDOS = (
+    f"SELECT /*+ MAX_EXECUTION_TIME({MAX_EJECUCION_MS}) */ "
+    "COUNT(*), COALESCE(SUM(saldo < 0), 0), COALESCE(SUM(saldo), 0) FROM cuentas"
+)
+SONDA_AUDITORIA = f"SELECT /*+ MAX_EXECUTION_TIME({MAX_EJECUCION_MS}) */ MAX(id) FROM auditoria_cuentas"
+ESTADO_LECTURAS = "SHOW SESSION STATUS LIKE 'Handler_read%'"
+
+
+class MonitorInvariantes:
+    def __init__(self, intervalo=INTERVALO, prefijo=None, saldo_esperado=None, carga=None,
+                 db_config=None, directorio=DIRECTORIO_REPORTES, timestamp=None):
+        """
+        prefijo: limitar las sondas de saldo a numeroCuenta LIKE '<prefijo>%'
+        saldo_esperado: función sin argumentos -> saldo total esperado o None
+        carga: función sin argumentos -> (usuarios, rps) de Locust o None
+        """
+        self.intervalo = intervalo
+        self.prefijo = prefijo
+        self.saldo_esperado = saldo_esperado
+        self.carga = carga
+        # use_pure: conector en Python puro, así dentro de Locust la espera
+        # de red cede el control a gevent en lugar de bloquear a los usuarios
+        self.pool = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="monitor_invariantes",
+            pool_size=1,
+            autocommit=True,
+            use_pure=True,
+            **(db_config or DB_CONFIG)
+        )
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(directorio, exist_ok=True)
+        self.archivo = f"{directorio}/monitor_invariantes_{timestamp}.csv"
+        self.muestras = 0
+        self.duracion_total_ms = 0.0
+        self.duracion_max_ms = 0.0
+        self.filas_leidas_total = 0
+        self.max_negativas = 0
+        self.primera_negativa = None
+        self.activo = False
+        self._inicio = None
+        self._anterior = None
+
+    def _lecturas(self, cursor):
+        cursor.execute(ESTADO_LECTURAS)
+        return sum(int(valor) for _, valor in cursor.fetchall())
+
+    def sondear(self):
+        """Ejecutar las sondas una vez y devolver la fila de la serie"""
+        conexion = self.pool.get_connection()
+        try:
+            cursor = conexion.cursor()
+            lecturas_antes = self._lecturas(cursor)
+            inicio = time.perf_counter()
+            if self.prefijo:
+                cursor.execute(SONDA_SALDOS + " WHERE numeroCuenta LIKE %s", (self.prefijo + "%",))
+            else:
+                cursor.execute(SONDA_SALDOS)
+            cuentas, negativas, saldo_total = cursor.fetchone()
+            cursor.execute(SONDA_AUDITORIA)
+            max_id = cursor.fetchone()[0] or 0
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            # Lo que leyó el servidor para las dos sondas (más unas pocas filas del propio SHOW)
+            filas_leidas = self._lecturas(cursor) - lecturas_antes
+            cursor.close()
+        finally:
+            conexion.close()
+
+        ahora = time.time()
+        if self._inicio is None:
+            self._inicio = ahora
+        por_segundo = None
+        if self._anterior is not None:
+            tiempo_previo, max_id_previo = self._anterior
+            por_segundo = round((max_id - max_id_previo) / max(ahora - tiempo_previo, 1e-6), 2)
+        self._anterior = (ahora, max_id)
+
+        esperado = self.saldo_esperado() if self.saldo_esperado else None
+        usuarios, rps = (self.carga() if self.carga else None) or (None, None)
+        saldo_total = float(saldo_total)
+        return {
+            "Timestamp": int(ahora),
+            "segundos": round(ahora - self._inicio, 1),
+            "usuarios": usuarios,
+            "rps": None if rps is None else round(rps, 2),
+            "cuentas": cuentas,
+            "cuentas_saldo_negativo": int(negativas),
+            "saldo_total": round(saldo_total, 2),
+            "saldo_esperado": None if esperado is None else round(esperado, 2),
+            "diferencia": None if esperado is None else round(saldo_total - esperado, 2),
+            "auditoria_max_id": max_id,
+            "auditoria_por_segundo": por_segundo,
+            "duracion_sondas_ms": round(duracion_ms, 2),
+            "filas_leidas": filas_leidas
+        }
+
+    def _acumular(self, fila):
+        self.muestras += 1
+        self.duracion_total_ms += fila["duracion_sondas_ms"]
+        self.duracion_max_ms = max(self.duracion_max_ms, fila["duracion_sondas_ms"])
+        self.filas_leidas_total += fila["filas_leidas"]
+        self.max_negativas = max(self.max_negativas, fila["cuentas_saldo_negativo"])
+        if fila["cuentas_saldo_negativo"] and self.primera_negativa is None:
+            self.primera_negativa = {"segundos": fila["segundos"], "usuarios": fila["usuarios"]}
+
+    def _muestrear(self, escritor, f):
+        try:
+            fila = self.sondear()
+        except Exception as e:
+            logger.warning(f"⚠️  Monitor: sonda fallida: {e}")
+            return
+        escritor.writerow(fila)
+        f.flush()
+        self._acumular(fila)
+
+    def ejecutar(self, dormir=time.sleep, duracion=None):
+        """
+        Muestrear cada 'intervalo' segundos hasta detener() o 'duracion', más
+        una muestra final al salir (con la carga ya detenida).
+        dormir: time.sleep en un proceso aparte, gevent.sleep dentro de Locust
+        """
+        self.activo = True
+        fin = None if duracion is None else time.monotonic() + duracion
+        with open(self.archivo, "w", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=COLUMNAS)
+            escritor.writeheader()
+            while self.activo:
+                siguiente = time.monotonic() + self.intervalo
+                self._muestrear(escritor, f)
+                # Espera en pasos cortos para que detener() no demore un intervalo entero
+                while self.activo and time.monotonic() < siguiente:
+                    dormir(min(ESPERA_PASO, max(siguiente - time.monotonic(), 0)))
+                if fin is not None and time.monotonic() >= fin:
+                    break
+            self._muestrear(escritor, f)
+        self.activo = False
+
+    def detener(self):
+        self.activo = False
+
+    def resumen(self):
+        """Costo de las sondas y primer momento con saldos negativos"""
+        transcurrido = self._anterior[0] - self._inicio if self._anterior else 0
+        return {
+            "archivo": self.archivo,
+            "muestras": self.muestras,
+            "intervalo": self.intervalo,
+            "prefijo": self.prefijo,
+            "duracion_media_ms": round(self.duracion_total_ms / self.muestras, 2) if self.muestras else None,
+            "duracion_max_ms": round(self.duracion_max_ms, 2),
+            "filas_leidas_por_muestra": round(self.filas_leidas_total / self.muestras) if self.muestras else None,
+            # Fracción del tiempo que la conexión del monitor estuvo ocupada
+            "ocupacion": round(self.duracion_total_ms / 1000 / transcurrido, 5) if transcurrido else None,
+            "max_cuentas_saldo_negativo": self.max_negativas,
+            "primera_negativa": self.primera_negativa
+        }
+
+    def guardar_resumen(self):
+        archivo = self.archivo.replace(".csv", "_resumen.json")
+        with open(archivo, "w") as f:
+            json.dump(self.resumen(), f, indent=2)
+        return archivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor de invariantes de la BD durante una prueba de carga")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO,
+                        help=f"Segundos entre muestras (por defecto {INTERVALO})")
+    parser.add_argument("--prefijo", help="Limitar las sondas de saldo a numeroCuenta LIKE '<prefijo>%%'")
+    parser.add_argument("--duracion", type=float, help="Segundos de monitoreo (por defecto hasta Ctrl+C)")
+    args = parser.parse_args()
+
+    monitor = MonitorInvariantes(intervalo=args.intervalo, prefijo=args.prefijo)
+    print(f"🔎 Monitor de invariantes cada {args.intervalo}s -> {monitor.archivo}")
+    try:
+        monitor.ejecutar(duracion=args.duracion)
+    except KeyboardInterrupt:
+        pass
+    resumen = monitor.resumen()
+    print(f"\n📊 {resumen['muestras']} muestras, sondas de {resumen['duracion_media_ms']} ms en promedio "
+          f"(máx {resumen['duracion_max_ms']} ms), {resumen['filas_leidas_por_muestra']} filas leídas por muestra")
+    if resumen["primera_negativa"]:
+        print(f"⚠️  Saldos negativos desde el segundo {resumen['primera_negativa']['segundos']}")
+    print(f"✅ Resumen guardado en: {monitor.guardar_resumen()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
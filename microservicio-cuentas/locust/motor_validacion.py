@@ -0,0 +1,194 @@
+"""
+Motor de Validación en una Sola Pasada
+Compila las reglas registradas y los agregados de estadísticas en un único
+recorrido de la tabla cuentas, en lugar de una consulta por verificación.
+
+- Reglas por fila: se evalúan sobre cada fila leída
+- Reglas por grupo: se evalúan sobre filas consecutivas con la misma clave
+  (el recorrido va ordenado por numeroCuenta, así que cada grupo es contiguo)
+- Agregados: total, activas, cuentas por estado y saldo total activo
+
+El motor no conoce la base de datos: recibe filas (dict) y devuelve hallazgos,
+por lo que el mismo código sirve para el recorrido serial y por shards.
+"""
+from decimal import Decimal
+
+# Columnas que necesita el recorrido y claves (en orden) de la paginación keyset
+COLUMNAS = ("id", "numeroCuenta", "saldo", "estado", "activo")
+CLAVES_RECORRIDO = ("numeroCuenta", "id")
+
+
+class ReglaFila:
+    """Verificación que se decide mirando una sola fila"""
+
+    def __init__(self, tipo, titulo, condicion, construir, describir):
+        self.tipo = tipo
+        self.titulo = titulo
+        self.condicion = condicion
+        self.construir = construir
+        self.describir = describir
+
+    def evaluar(self, fila):
+        if self.condicion(fila):
+            return self.construir(fila)
+        return None
+
+
+class ReglaGrupo:
+    """
+    Verificación sobre el grupo de filas consecutivas que comparten 'clave'.
+    'incluir' filtra qué filas cuentan y 'condicion' recibe (clave, total).
+    """
+
+    def __init__(self, tipo, titulo, clave, incluir, condicion, construir, describir):
+        self.tipo = tipo
+        self.titulo = titulo
+        self.clave = clave
+        self.incluir = incluir
+        self.condicion = condicion
+        self.construir = construir
+        self.describir = describir
+
+
+REGLAS = []
+
+
+def estadisticas_vacias():
+    return {
+        "total": 0,
+        "activas": 0,
+        "por_estado": {},
+        "saldo_total": Decimal("0")
+    }
+
+
+def registrar_regla(regla):
+    """Agregar una regla al conjunto que compila el motor"""
+    REGLAS.append(regla)
+    return regla
+
+
+registrar_regla(ReglaFila(
+    "SALDO_NEGATIVO",
+    "SALDOS NEGATIVOS DETECTADOS",
+    lambda c: c['saldo'] < 0,
+    lambda c: {
+        "tipo": "SALDO_NEGATIVO",
+        "cuenta_id": c['id'],
+        "numero_cuenta": c['numeroCuenta'],
+        "saldo": float(c['saldo']),
+        "estado": c['estado'],
+        "activo": c['activo']
+    },
+    lambda c: f"Cuenta {c['numero_cuenta']}: Saldo = {c['saldo']}"
+))
+
+registrar_regla(ReglaFila(
+    "ESTADO_INCONSISTENTE",
+    "ESTADOS INCONSISTENTES DETECTADOS",
+    lambda c: (c['estado'] == 'ACTIVA' and c['activo'] == 0)
+    or (c['estado'] in ('CANCELADA', 'SUSPENDIDA') and c['activo'] == 1),
+    lambda c: {
+        "tipo": "ESTADO_INCONSISTENTE",
+        "cuenta_id": c['id'],
+        "numero_cuenta": c['numeroCuenta'],
+        "estado": c['estado'],
+        "activo": c['activo']
+    },
+    lambda c: f"Cuenta {c['numero_cuenta']}: Estado={c['estado']}, Activo={c['activo']}"
+))
+
+registrar_regla(ReglaGrupo(
+    "NUMERO_DUPLICADO",
+    "NÚMEROS DE CUENTA DUPLICADOS",
+    "numeroCuenta",
+    lambda c: c['activo'] == 1,
+    lambda clave, total: total > 1,
+    lambda clave, total: {
+        "tipo": "NUMERO_DUPLICADO",
+        "numero_cuenta": clave,
+        "total_duplicados": total
+    },
+    lambda item: f"Número {item['numero_cuenta']}: {item['total_duplicados']} duplicados"
+))
+
+
+class MotorValidacion:
+    """Evalúa todas las reglas y agregados sobre un único flujo de filas"""
+
+    def __init__(self, reglas=None):
+        reglas = REGLAS if reglas is None else reglas
+        self.reglas_fila = [r for r in reglas if isinstance(r, ReglaFila)]
+        self.reglas_grupo = [r for r in reglas if isinstance(r, ReglaGrupo)]
+        # Por cada regla de grupo: [clave actual, filas del grupo que cuentan]
+        self._grupos = [[None, 0] for _ in self.reglas_grupo]
+        self.estadisticas = estadisticas_vacias()
+
+    def procesar(self, fila):
+        """Acumular una fila; devuelve la lista de hallazgos que produce"""
+        hallazgos = []
+        # Los grupos que cierra esta fila van antes que sus propios hallazgos,
+        # así el orden es el mismo si el recorrido se parte en shards
+        for regla, grupo in zip(self.reglas_grupo, self._grupos):
+            clave = fila[regla.clave]
+            if clave != grupo[0]:
+                hallazgo = self._cerrar_grupo(regla, grupo)
+                if hallazgo is not None:
+                    hallazgos.append(hallazgo)
+                grupo[0], grupo[1] = clave, 0
+            if regla.incluir(fila):
+                grupo[1] += 1
+
+        for regla in self.reglas_fila:
+            hallazgo = regla.evaluar(fila)
+            if hallazgo is not None:
+                hallazgos.append(hallazgo)
+
+        est = self.estadisticas
+        est["total"] += 1
+        est["por_estado"][fila['estado']] = est["por_estado"].get(fila['estado'], 0) + 1
+        if fila['activo'] == 1:
+            est["activas"] += 1
+            est["saldo_total"] += fila['saldo']
+
+        return hallazgos
+
+    def finalizar(self):
+        """Cerrar los grupos abiertos al terminar el recorrido"""
+        hallazgos = []
+        for regla, grupo in zip(self.reglas_grupo, self._grupos):
+            hallazgo = self._cerrar_grupo(regla, grupo)
+            if hallazgo is not None:
+                hallazgos.append(hallazgo)
+            grupo[0], grupo[1] = None, 0
+        return hallazgos
+
+    @staticmethod
+    def _cerrar_grupo(regla, grupo):
+        clave, total = grupo
+        if clave is not None and regla.condicion(clave, total):
+            return regla.construir(clave, total)
+        return None
+
+    def describir(self, hallazgo):
+        """Texto de consola de un hallazgo, según la regla que lo generó"""
+        for regla in self.reglas_fila + self.reglas_grupo:
+            if regla.tipo == hallazgo["tipo"]:
+                return regla.describir(hallazgo)
+        return str(hallazgo)
+
+    def titulo(self, tipo):
+        for regla in self.reglas_fila + self.reglas_grupo:
+            if regla.tipo == tipo:
+                return regla.titulo
+        return tipo
+
+
+def combinar_estadisticas(destino, parcial):
+    """Sumar a 'destino' las estadísticas parciales de otro recorrido (shard)"""
+    destino["total"] += parcial["total"]
+    destino["activas"] += parcial["activas"]
+    destino["saldo_total"] += parcial["saldo_total"]
+    for estado, total in parcial["por_estado"].items():
+        destino["por_estado"][estado] = destino["por_estado"].get(estado, 0) + total
+    return destino
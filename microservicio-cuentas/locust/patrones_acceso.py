@@ -0,0 +1,142 @@
+"""
+Patrones de Acceso a Cuentas Compartidas (escenario de contención)
+Eligen qué cuenta de un conjunto compartido toca cada operación, para que
+muchos usuarios choquen sobre las mismas filas:
+
+- uniforme          todas las cuentas con la misma probabilidad
+- zipf:S            la cuenta de rango k con probabilidad proporcional a 1/k^S
+                    (S=0 es uniforme; S>1 concentra casi todo en pocas cuentas)
+- calientes:N[:P]   con probabilidad P (0.9 por defecto) una de las N primeras
+                    cuentas, si no una de las demás
+
+El rango de cada cuenta es su posición en la lista compartida, que es la
+misma en todos los workers: la cuenta "más caliente" es la misma en todos.
+"""
+import bisect
+import random
+from abc import ABC, abstractmethod
+from array import array
+
+import numpy as np
+
+
+class PatronAcceso(ABC):
+    # Nombre corto del patrón en reportes y etiquetas; lo define cada subclase
+    etiqueta: str
+
+    def __init__(self, total):
+        if total < 1:
+            raise ValueError("El patrón de acceso necesita al menos una cuenta")
+        self.total = total
+
+    @abstractmethod
+    def elegir(self, rnd):
+        """Índice de la cuenta a usar, en [0, total)"""
+
+    def descripcion(self):
+        return {"patron": self.etiqueta}
+
+
+class Uniforme(PatronAcceso):
+    etiqueta = "uniforme"
+
+    def elegir(self, rnd):
+        return rnd.randrange(self.total)
+
+
+class Zipf(PatronAcceso):
+    """Muestreo por CDF acumulada precalculada + búsqueda binaria (O(log n))"""
+
+    def __init__(self, total, s):
+        super().__init__(total)
+        self.s = s
+        self.etiqueta = f"zipf_{s:g}"
+        pesos = 1.0 / np.arange(1, total + 1, dtype=np.float64) ** s
+        cdf = np.cumsum(pesos)
+        self._cdf = array("d", (cdf / cdf[-1]).tolist())
+
+    def elegir(self, rnd):
+        # min() por si el redondeo deja el último valor de la CDF apenas bajo 1.0
+        return min(bisect.bisect_right(self._cdf, rnd.random()), self.total - 1)
+
+    def descripcion(self):
+        return {"patron": "zipf", "s": self.s}
+
+
+class Calientes(PatronAcceso):
+    def __init__(self, total, calientes, probabilidad=0.9):
+        super().__init__(total)
+        if calientes < 1:
+            raise ValueError("El patrón calientes necesita al menos una cuenta caliente")
+        if not 0.0 <= probabilidad <= 1.0:
+            raise ValueError("La probabilidad del patrón calientes debe estar entre 0 y 1")
+        self.calientes = min(calientes, total)
+        self.probabilidad = probabilidad
+        self.etiqueta = f"calientes_{self.calientes}_{probabilidad:g}"
+
+    def elegir(self, rnd):
+        if self.calientes == self.total or rnd.random() < self.probabilidad:
+            return rnd.randrange(self.calientes)
+        return rnd.randrange(self.calientes, self.total)
+
+    def descripcion(self):
+        return {"patron": "calientes", "calientes": self.calientes, "probabilidad": self.probabilidad}
+
+
+def crear_patron(especificacion, total):
+    """'uniforme', 'zipf:1.1' o 'calientes:10:0.9' -> PatronAcceso"""
+    nombre, *parametros = especificacion.split(":")
+    if nombre == "uniforme" and not parametros:
+        return Uniforme(total)
+    if nombre == "zipf" and len(parametros) == 1:
+        return Zipf(total, float(parametros[0]))
+    if nombre == "calientes" and len(parametros) in (1, 2):
+        return Calientes(total, int(parametros[0]), *(float(p) for p in parametros[1:]))
+    raise ValueError(f"Patrón de acceso inválido: {especificacion!r} (uniforme | zipf:S | calientes:N[:P])")
+
+
+class CuentasCompartidas:
+    """Cuentas que comparten todos los usuarios de contención de este proceso"""
+
+    def __init__(self):
+        self.cargar([], None)
+
+    def __len__(self):
+        return len(self.cuentas)
+
+    def cargar(self, cuentas, especificacion):
+        """cuentas: [id, numeroCuenta] en orden de rango (la primera es la más caliente)"""
+        self.cuentas = [cuenta_id for cuenta_id, _ in cuentas]
+        self.especificacion = especificacion
+        self.patron = crear_patron(especificacion, len(self.cuentas)) if self.cuentas else None
+        self._subpatrones = {}
+
+    def elegir(self, rnd=random):
+        return self.cuentas[self.patron.elegir(rnd)]
+
+    def elegir_en(self, particion, partes, rnd=random):
+        """
+        Elegir dentro de una partición (rangos particion, particion + partes, ...)
+        con el mismo patrón sobre sus cuentas: cada partición tiene su propia
+        cuenta más caliente y el mismo sesgo que las demás
+        """
+        patron = self._subpatrones.get(partes)
+        if patron is None:
+            patron = self._subpatrones[partes] = crear_patron(self.especificacion, len(self.cuentas) // partes)
+        return self.cuentas[patron.elegir(rnd) * partes + particion]
+
+
+def concentracion(operaciones_por_cuenta):
+    """
+    Sesgo medido: fracción de las operaciones que cayó en la cuenta más usada
+    y en las 10 más usadas
+    """
+    operaciones = np.sort(np.asarray(operaciones_por_cuenta, dtype=np.int64))[::-1]
+    total = int(operaciones.sum())
+    if not total:
+        return {"operaciones": 0, "top1": 0.0, "top10": 0.0}
+    return {
+        "operaciones": total,
+        "top1": round(float(operaciones[0]) / total, 4),
+        "top10": round(float(operaciones[:10].sum()) / total, 4)
+    }
@@ -0,0 +1,90 @@
+"""
+Pool de Cuentas Pre-sembradas (Locust)
+En lugar de que cada usuario haga POST /cuentas en on_start (findOne de
+unicidad + insert por cuenta), el nodo master (o el proceso local) inserta
+las N cuentas directamente en MySQL antes de la prueba con executemany por
+lotes. Los usuarios toman ids del pool; en modo distribuido el master reparte
+el pool en particiones, una por worker.
+
+Las cuentas sembradas usan numeroCuenta = POOL-<token>-<n>, con un token
+nuevo por siembra para no chocar con el índice único de ejecuciones previas.
+"""
+import random
+import uuid
+from collections import deque
+
+import mysql.connector
+
+from validar_inconsistencias import DB_CONFIG
+
+# Filas por executemany/commit al sembrar
+LOTE_SIEMBRA = 5000
+
+# Saldo con el que nace cada cuenta del pool
+SALDO_INICIAL = 10000.0
+
+PREFIJO_NUMERO = "POOL"
+
+# Tipo de mensaje master -> worker con su partición del pool
+MENSAJE_POOL = "pool_cuentas"
+
+
+def sembrar_pool(total, saldo_inicial=SALDO_INICIAL, lote=LOTE_SIEMBRA, db_config=None):
+    """Insertar 'total' cuentas ACTIVA y devolver la lista de [id, numeroCuenta]"""
+    token = uuid.uuid4().hex[:6]
+    insert = """
+        INSERT INTO cuentas (id, socio_id, numeroCuenta, saldo, estado, tipoCuenta, activo)
+        VALUES (%s, %s, %s, %s, 'ACTIVA', %s, 1)
+    """
+    cuentas = []
+    conexion = mysql.connector.connect(**(db_config or DB_CONFIG))
+    try:
+        cursor = conexion.cursor()
+        for inicio in range(0, total, lote):
+            valores = []
+            for i in range(inicio, min(inicio + lote, total)):
+                cuenta = [str(uuid.uuid4()), f"{PREFIJO_NUMERO}-{token}-{i:07d}"]
+                cuentas.append(cuenta)
+                valores.append((
+                    cuenta[0],
+                    str(i % 100 + 1),
+                    cuenta[1],
+                    saldo_inicial,
+                    random.choice(["AHORRO", "CORRIENTE", "PLAZO_FIJO"])
+                ))
+            cursor.executemany(insert, valores)
+            conexion.commit()
+        cursor.close()
+    finally:
+        conexion.close()
+    return cuentas
+
+
+def particionar(cuentas, partes):
+    """Repartir las cuentas en 'partes' particiones disjuntas de tamaño parejo"""
+    return [cuentas[i::partes] for i in range(partes)]
+
+
+class PoolCuentas:
+    """Cuentas disponibles en este proceso; cada una la usa un solo usuario a la vez"""
+
+    def __init__(self):
+        self.saldo_inicial = SALDO_INICIAL
+        self._libres = deque()
+
+    def __len__(self):
+        return len(self._libres)
+
+    def cargar(self, cuentas, saldo_inicial=SALDO_INICIAL):
+        """Reemplazar el contenido del pool (nueva siembra o nueva partición)"""
+        self.saldo_inicial = saldo_inicial
+        self._libres = deque((cuenta_id, numero) for cuenta_id, numero in cuentas)
+
+    def arrendar(self):
+        """Tomar una cuenta libre (id, numeroCuenta); None si el pool está vacío"""
+        return self._libres.popleft() if self._libres else None
+
+    def devolver(self, cuenta_id, numero_cuenta):
+        """Devolver una cuenta que sigue existiendo para que la use otro usuario"""
+        self._libres.append((cuenta_id, numero_cuenta))
+
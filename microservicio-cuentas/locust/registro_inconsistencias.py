@@ -0,0 +1,163 @@
+"""
+Registro de Inconsistencias (Locust local y distribuido)
+Reemplaza las listas globales del locustfile, que crecían sin límite y que en
+modo --master/--worker solo veían lo ocurrido en su propio proceso.
+
+- Contadores por tipo y de cuentas creadas (memoria constante)
+- Buffer circular con las últimas MAX_MUESTRAS inconsistencias
+- Delta pendiente: lo acumulado desde el último envío; los workers lo mandan
+  al master cada INTERVALO_ENVIO segundos con el canal de mensajes propio de
+  Locust y el master lo combina en un único registro global
+"""
+from collections import deque
+
+# Inconsistencias completas que se conservan (las más recientes)
+MAX_MUESTRAS = 1000
+
+# Segundos entre envíos de un worker al master
+INTERVALO_ENVIO = 5
+
+# Tipo de mensaje worker -> master
+MENSAJE_DELTA = "registro_inconsistencias"
+
+# Master -> worker: pedir el delta final (detiene los usuarios del worker)
+MENSAJE_CIERRE = "cerrar_registro"
+
+# Segundos que el master espera el delta final de cada worker al detenerse
+ESPERA_FINAL = 30
+
+# Campos del resumen del libro de operaciones que se suman entre workers
+CAMPOS_LIBRO = (
+    "cuentas",
+    "operaciones",
+    "cuentas_sin_saldo_real",
+    "cuentas_con_deriva",
+    "deriva_total",
+    "deriva_absoluta_total"
+)
+
+
+def _sumar_libro(destino, resumen):
+    for campo in CAMPOS_LIBRO:
+        destino[campo] = destino.get(campo, 0) + resumen.get(campo, 0)
+    destino["deriva_total"] = round(destino["deriva_total"], 2)
+    destino["deriva_absoluta_total"] = round(destino["deriva_absoluta_total"], 2)
+
+
+def _sumar_contencion(destino, filas):
+    """filas: (cuenta_id, neto, operaciones) -> destino[cuenta_id] = [neto, operaciones]"""
+    for cuenta_id, neto, operaciones in filas:
+        acumulado = destino.setdefault(cuenta_id, [0.0, 0])
+        acumulado[0] += neto
+        acumulado[1] += operaciones
+
+
+class RegistroInconsistencias:
+    def __init__(self, max_muestras=MAX_MUESTRAS):
+        self.max_muestras = max_muestras
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vaciar contadores, muestras y delta pendiente (inicio de una prueba)"""
+        self.por_tipo = {}
+        self.cuentas_creadas = 0
+        self.muestras = deque(maxlen=self.max_muestras)
+        self.libro = {}
+        self.contencion = {}
+        self.neto_confirmado = 0.0
+        self.workers = set()
+        self.finalizados = set()
+        self._pendiente = self._delta_vacio()
+
+    def _delta_vacio(self):
+        return {
+            "por_tipo": {},
+            "cuentas_creadas": 0,
+            "muestras": deque(maxlen=self.max_muestras),
+            "libro": {},
+            "contencion": {},
+            "neto_confirmado": 0.0
+        }
+
+    @property
+    def total(self):
+        return sum(self.por_tipo.values())
+
+    def agregar(self, inconsistencia):
+        """Registrar una inconsistencia detectada por este proceso"""
+        tipo = inconsistencia["tipo"]
+        self.por_tipo[tipo] = self.por_tipo.get(tipo, 0) + 1
+        self.muestras.append(inconsistencia)
+        pendiente = self._pendiente
+        pendiente["por_tipo"][tipo] = pendiente["por_tipo"].get(tipo, 0) + 1
+        pendiente["muestras"].append(inconsistencia)
+
+    def cuenta_creada(self):
+        self.cuentas_creadas += 1
+        self._pendiente["cuentas_creadas"] += 1
+
+    def registrar_libro(self, resumen):
+        """Sumar el resumen de conciliación del libro de operaciones"""
+        _sumar_libro(self.libro, resumen)
+        _sumar_libro(self._pendiente["libro"], resumen)
+
+    def sumar_neto(self, neto):
+        """Montos confirmados (depósitos - retiros) para el saldo esperado en vivo"""
+        self.neto_confirmado += neto
+        self._pendiente["neto_confirmado"] += neto
+
+    def registrar_contencion(self, resumen):
+        """
+        Sumar neto y operaciones por cuenta compartida (escenario de
+        contención). Esas cuentas las tocan todos los workers, así que solo
+        el master puede conciliarlas, con la suma de todos.
+        """
+        filas = list(zip(resumen["cuentas"], resumen["neto"].tolist(), resumen["operaciones"].tolist()))
+        _sumar_contencion(self.contencion, filas)
+        _sumar_contencion(self._pendiente["contencion"], filas)
+
+    def extraer_delta(self, final=False):
+        """
+        Devolver lo acumulado desde la última llamada (serializable para
+        send_message) y empezar un delta nuevo. None si no hay nada que enviar,
+        salvo el delta final, que se envía siempre para avisar al master que
+        ese worker ya no mandará más.
+        """
+        pendiente = self._pendiente
+        if not (final or pendiente["por_tipo"] or pendiente["cuentas_creadas"] or pendiente["libro"]
+                or pendiente["contencion"] or pendiente["neto_confirmado"]):
+            return None
+        self._pendiente = self._delta_vacio()
+        return dict(pendiente, muestras=list(pendiente["muestras"]), final=final)
+
+    def combinar(self, delta, origen=None):
+        """Sumar el delta recibido de un worker (en el master)"""
+        for tipo, cantidad in delta["por_tipo"].items():
+            self.por_tipo[tipo] = self.por_tipo.get(tipo, 0) + cantidad
+        self.cuentas_creadas += delta["cuentas_creadas"]
+        self.neto_confirmado += delta["neto_confirmado"]
+        self.muestras.extend(delta["muestras"])
+        if delta["libro"]:
+            _sumar_libro(self.libro, delta["libro"])
+        _sumar_contencion(self.contencion, (
+            (cuenta_id, neto, operaciones) for cuenta_id, (neto, operaciones) in delta["contencion"].items()
+        ))
+        if origen is not None:
+            self.workers.add(origen)
+            if delta.get("final"):
+                self.finalizados.add(origen)
+
+    def pendientes(self, workers):
+        """Workers de la lista que todavía no enviaron su delta final"""
+        return set(workers) - self.finalizados
+
+    def reporte(self):
+        """Contenido del reporte de inconsistencias"""
+        return {
+            "total_inconsistencias": self.total,
+            "por_tipo": dict(self.por_tipo),
+            "detalles": list(self.muestras),
+            "detalles_truncados": self.total > len(self.muestras),
+            "cuentas_creadas": self.cuentas_creadas,
+            "workers": len(self.workers)
+        }
@@ -0,0 +1,410 @@
+"""
+Reinicio Rápido de Datos entre Ejecuciones de Carga
+En lugar de docker-compose down -v && up -d (borra el volumen de MySQL y
+vuelve a correr mysql-init, varios minutos), deja la base en su estado
+inicial en segundos:
+
+1. Borra las cuentas de prueba por prefijo de numeroCuenta (TEST- de
+   CuentasUser, DELETE- de EliminacionMasivaUser, POOL- de las siembras) en
+   lotes: cada lote es un rango del índice único de numeroCuenta (keyset, sin
+   OFFSET) y se confirma por separado, así no hay transacciones ni bloqueos
+   largos. Las filas de auditoria_cuentas de cada lote se borran antes que
+   sus cuentas; si no, la FK (ON DELETE SET NULL) las dejaría huérfanas.
+2. Borra las filas de auditoría que ya quedaron huérfanas (cuenta_id NULL).
+3. Recarga las cuentas base de mysql-init (los INSERT INTO cuentas de
+   01-init.sql y 02-test-data.sql), reemplazando las filas que la prueba
+   haya modificado.
+4. ANALYZE TABLE, para que el optimizador no planifique con las
+   estadísticas de la tabla llena.
+
+Con --guardar-base se copia el estado resultante a cuentas_base y
+auditoria_cuentas_base. Después, --restaurar-base vuelve a ese estado con
+TRUNCATE + INSERT ... SELECT (se conservan trigger y FK de las tablas) en
+lugar de borrar por prefijo, y cada ejecución parte exactamente del mismo
+estado.
+
+La duración de cada paso se imprime y queda en
+locust/reportes/reinicio_YYYYMMDD_HHMMSS.json. Como son borrados físicos,
+también se descarta el checkpoint de la validación incremental.
+
+Uso:
+    python locust/reiniciar_datos.py
+    python locust/reiniciar_datos.py --prefijos TEST- DELETE- --tamano-lote 2000
+    python locust/reiniciar_datos.py --guardar-base      # una vez, base limpia
+    python locust/reiniciar_datos.py --restaurar-base    # entre ejecuciones
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import mysql.connector
+
+from checkpoint_validacion import RUTA_CHECKPOINT
+from validar_inconsistencias import DB_CONFIG, DIRECTORIO_REPORTES
+
+PREFIJOS = ("TEST-", "DELETE-", "POOL-")
+
+# Cuentas por lote (y por commit) al borrar por prefijo
+TAMANO_LOTE = 5000
+
+DIRECTORIO_INIT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mysql-init")
+FIXTURES = (
+    os.path.join(DIRECTORIO_INIT, "01-init.sql"),
+    os.path.join(DIRECTORIO_INIT, "02-test-data.sql"),
+)
+
+# Tablas de la base y sufijo de su copia; se restauran en este orden (padre primero)
+TABLAS = ("cuentas", "auditoria_cuentas")
+SUFIJO_BASE = "_base"
+
+# Los scripts de mysql-init usan snake_case; TypeORM (synchronize) crea numeroCuenta y tipoCuenta
+ALIAS_COLUMNAS = {
+    "numero_cuenta": "numeroCuenta",
+    "tipo_cuenta": "tipoCuenta",
+}
+
+PATRON_INSERT = re.compile(r"INSERT\s+(?:IGNORE\s+)?INTO\s+`?cuentas`?\s*\(([^)]*)\)\s*VALUES", re.IGNORECASE)
+
+
+def escapar_like(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _valor_sql(literal):
+    """Literal SQL sin comillas -> valor para el conector"""
+    literal = literal.strip()
+    if literal.upper() == "NULL":
+        return None
+    if literal.upper() in ("TRUE", "FALSE"):
+        return int(literal.upper() == "TRUE")
+    return literal
+
+
+def _tuplas(texto, inicio):
+    """
+    Tuplas de un VALUES (...), (...); desde 'inicio' hasta el ';' que lo
+    cierra. Las cadenas entre comillas simples pueden tener comas,
+    paréntesis, ';' y comillas duplicadas.
+    """
+    tuplas = []
+    actual = None
+    valor = ""
+    cadena = None
+    i = inicio
+    while i < len(texto):
+        c = texto[i]
+        if cadena is not None:
+            if c == "'" and texto[i + 1:i + 2] == "'":
+                cadena += "'"
+                i += 1
+            elif c == "'":
+                # Marcada como cadena: no se interpreta NULL ni TRUE/FALSE
+                valor, cadena = ("cadena", cadena), None
+            else:
+                cadena += c
+        elif c == "'":
+            cadena = ""
+        elif c == "(" and actual is None:
+            actual, valor = [], ""
+        elif c in ",)" and actual is not None:
+            actual.append(valor[1] if isinstance(valor, tuple) else _valor_sql(valor))
+            valor = ""
+            if c == ")":
+                tuplas.append(actual)
+                actual = None
+        elif c == ";" and actual is None:
+            break
+        elif actual is not None and not isinstance(valor, tuple):
+            valor += c
+        i += 1
+    return tuplas
+
+
+def leer_fixtures(rutas):
+    """Lista de (columnas, filas) de cada INSERT INTO cuentas de los scripts"""
+    inserts = []
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            texto = f.read()
+        for encontrado in PATRON_INSERT.finditer(texto):
+            columnas = [columna.strip().strip("`") for columna in encontrado.group(1).split(",")]
+            filas = _tuplas(texto, encontrado.end())
+            invalidas = [fila for fila in filas if len(fila) != len(columnas)]
+            if invalidas:
+                raise ValueError(f"{ruta}: {len(invalidas)} filas no coinciden con las columnas {columnas}")
+            inserts.append((columnas, filas))
+    return inserts
+
+
+def columnas_tabla(cursor, tabla):
+    cursor.execute(f"SHOW COLUMNS FROM {tabla}")
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def tablas_existentes(cursor, tablas):
+    cursor.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()"
+    )
+    existentes = {fila[0] for fila in cursor.fetchall()}
+    return [tabla for tabla in tablas if tabla in existentes]
+
+
+def columna_real(columna, existentes):
+    """Nombre de la columna en la tabla: el del script o su alias de TypeORM"""
+    if columna in existentes:
+        return columna
+    alias = ALIAS_COLUMNAS.get(columna)
+    if alias in existentes:
+        return alias
+    raise ValueError(f"La columna {columna} de los fixtures no existe en cuentas")
+
+
+def _borrar_lote(cursor, ids, con_auditoria):
+    marcadores = ", ".join(["%s"] * len(ids))
+    filas_auditoria = 0
+    if con_auditoria:
+        cursor.execute(f"DELETE FROM auditoria_cuentas WHERE cuenta_id IN ({marcadores})", ids)
+        filas_auditoria = cursor.rowcount
+    cursor.execute(f"DELETE FROM cuentas WHERE id IN ({marcadores})", ids)
+    return cursor.rowcount, filas_auditoria
+
+
+def borrar_prefijo(conexion, prefijo, tamano_lote=TAMANO_LOTE, con_auditoria=True):
+    """
+    Borrar las cuentas cuyo numeroCuenta empieza con 'prefijo', un lote por
+    commit. El lote siguiente empieza después del último numeroCuenta visto
+    (rango del índice único). Devuelve cuentas, filas de auditoría y lotes.
+    """
+    cursor = conexion.cursor()
+    patron = escapar_like(prefijo) + "%"
+    ultimo = ""
+    cuentas = filas_auditoria = lotes = 0
+    while True:
+        cursor.execute(
+            "SELECT id, numeroCuenta FROM cuentas "
+            "WHERE numeroCuenta LIKE %s AND numeroCuenta > %s "
+            "ORDER BY numeroCuenta LIMIT %s",
+            (patron, ultimo, tamano_lote)
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            break
+        ultimo = filas[-1][1]
+        borradas, auditoria = _borrar_lote(cursor, [fila[0] for fila in filas], con_auditoria)
+        conexion.commit()
+        cuentas += borradas
+        filas_auditoria += auditoria
+        lotes += 1
+    cursor.close()
+    return {"cuentas": cuentas, "auditoria": filas_auditoria, "lotes": lotes}
+
+
+def borrar_auditoria_huerfana(conexion, tamano_lote=TAMANO_LOTE):
+    """Filas de auditoría sin cuenta (cuenta_id NULL), por lotes"""
+    cursor = conexion.cursor()
+    total = 0
+    while True:
+        cursor.execute("DELETE FROM auditoria_cuentas WHERE cuenta_id IS NULL LIMIT %s", (tamano_lote,))
+        conexion.commit()
+        total += cursor.rowcount
+        if cursor.rowcount < tamano_lote:
+            break
+    cursor.close()
+    return total
+
+
+def recargar_fixtures(conexion, inserts, con_auditoria=True):
+    """
+    Borrar las cuentas base (por id o por numeroCuenta) y volver a
+    insertarlas con sus valores originales, en una transacción
+    """
+    cursor = conexion.cursor()
+    existentes = columnas_tabla(cursor, "cuentas")
+    columna_numero = columna_real("numero_cuenta", existentes)
+    total = 0
+    try:
+        for columnas, filas in inserts:
+            reales = [columna_real(columna, existentes) for columna in columnas]
+            ids = [fila[reales.index("id")] for fila in filas]
+            numeros = [fila[reales.index(columna_numero)] for fila in filas]
+            marcadores_ids = ", ".join(["%s"] * len(ids))
+            marcadores_numeros = ", ".join(["%s"] * len(numeros))
+            cursor.execute(
+                f"SELECT id FROM cuentas WHERE id IN ({marcadores_ids}) "
+                f"OR {columna_numero} IN ({marcadores_numeros})",
+                ids + numeros
+            )
+            previas = [fila[0] for fila in cursor.fetchall()]
+            if previas:
+                _borrar_lote(cursor, previas, con_auditoria)
+            cursor.executemany(
+                f"INSERT INTO cuentas ({', '.join(reales)}) VALUES ({', '.join(['%s'] * len(reales))})",
+                filas
+            )
+            total += len(filas)
+        conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        cursor.close()
+    return total
+
+
+def guardar_base(conexion, tablas):
+    """Copiar cada tabla a <tabla>_base (reemplaza una copia anterior)"""
+    cursor = conexion.cursor()
+    filas = {}
+    for tabla in tablas:
+        copia = tabla + SUFIJO_BASE
+        cursor.execute(f"DROP TABLE IF EXISTS {copia}")
+        cursor.execute(f"CREATE TABLE {copia} LIKE {tabla}")
+        cursor.execute(f"INSERT INTO {copia} SELECT * FROM {tabla}")
+        filas[tabla] = cursor.rowcount
+    conexion.commit()
+    cursor.close()
+    return filas
+
+
+def restaurar_base(conexion, tablas):
+    """
+    Volver al estado de <tabla>_base: TRUNCATE (hijas primero) e
+    INSERT ... SELECT (padre primero) con las FK desactivadas solo en esta
+    sesión. TRUNCATE conserva el trigger y las FK de las tablas.
+    """
+    cursor = conexion.cursor()
+    faltantes = [tabla + SUFIJO_BASE for tabla in tablas
+                 if not tablas_existentes(cursor, [tabla + SUFIJO_BASE])]
+    if faltantes:
+        raise RuntimeError(f"No hay copia base ({', '.join(faltantes)}): ejecutar antes con --guardar-base")
+    filas = {}
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        for tabla in reversed(tablas):
+            cursor.execute(f"TRUNCATE TABLE {tabla}")
+        for tabla in tablas:
+            # Columnas explícitas: la tabla pudo cambiar (synchronize) después de la copia
+            columnas = ", ".join(f"`{columna}`" for columna in columnas_tabla(cursor, tabla + SUFIJO_BASE))
+            cursor.execute(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {tabla}{SUFIJO_BASE}")
+            filas[tabla] = cursor.rowcount
+        conexion.commit()
+    finally:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        cursor.close()
+    return filas
+
+
+def analizar(conexion, tablas):
+    cursor = conexion.cursor()
+    cursor.execute(f"ANALYZE TABLE {', '.join(tablas)}")
+    cursor.fetchall()
+    cursor.close()
+
+
+def descartar_checkpoint(ruta=RUTA_CHECKPOINT):
+    """La validación incremental no ve borrados físicos: forzar reconstrucción"""
+    if os.path.exists(ruta):
+        os.remove(ruta)
+        return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reiniciar los datos de prueba de la BD de cuentas")
+    parser.add_argument("--prefijos", nargs="+", default=list(PREFIJOS),
+                        help=f"Prefijos de numeroCuenta a borrar (por defecto {' '.join(PREFIJOS)})")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE,
+                        help=f"Cuentas por lote y por commit (por defecto {TAMANO_LOTE})")
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES),
+                        help="Scripts SQL de los que se recargan los INSERT INTO cuentas")
+    parser.add_argument("--sin-fixtures", action="store_true", help="No recargar las cuentas base")
+    parser.add_argument("--guardar-base", action="store_true",
+                        help="Al terminar, copiar cuentas y auditoria_cuentas a *_base")
+    parser.add_argument("--restaurar-base", action="store_true",
+                        help="Restaurar desde *_base en lugar de borrar por prefijo")
+    parser.add_argument("--checkpoint", default=RUTA_CHECKPOINT,
+                        help="Checkpoint de la validación incremental que se descarta")
+    args = parser.parse_args()
+    if args.tamano_lote <= 0:
+        parser.error("--tamano-lote debe ser positivo")
+
+    inserts = []
+    if not args.restaurar_base and not args.sin_fixtures:
+        try:
+            inserts = leer_fixtures(args.fixtures)
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudieron leer los fixtures: {e}")
+            return 1
+
+    try:
+        conexion = mysql.connector.connect(**DB_CONFIG)
+    except mysql.connector.Error as e:
+        print(f"❌ Error conectando a MySQL: {e}")
+        return 1
+
+    pasos = []
+    inicio_total = time.perf_counter()
+
+    def paso(nombre, funcion, *argumentos):
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        segundos = round(time.perf_counter() - inicio, 3)
+        pasos.append({"paso": nombre, "segundos": segundos, "resultado": resultado})
+        print(f"  ⏱️ {nombre}: {segundos}s -> {resultado}")
+        return resultado
+
+    print("=" * 80)
+    print("REINICIO DE DATOS DE PRUEBA")
+    print("=" * 80)
+    try:
+        cursor = conexion.cursor()
+        tablas = tablas_existentes(cursor, TABLAS)
+        cursor.close()
+        con_auditoria = "auditoria_cuentas" in tablas
+
+        if args.restaurar_base:
+            paso("restaurar_base", restaurar_base, conexion, tablas)
+        else:
+            for prefijo in args.prefijos:
+                paso(f"borrar {prefijo}*", borrar_prefijo, conexion, prefijo, args.tamano_lote, con_auditoria)
+            if con_auditoria:
+                paso("borrar auditoría huérfana", borrar_auditoria_huerfana, conexion, args.tamano_lote)
+            if inserts:
+                paso("recargar fixtures", recargar_fixtures, conexion, inserts, con_auditoria)
+        paso("analizar", analizar, conexion, tablas)
+        if args.guardar_base:
+            paso("guardar_base", guardar_base, conexion, tablas)
+    except (mysql.connector.Error, RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        conexion.close()
+
+    if descartar_checkpoint(args.checkpoint):
+        print(f"  🗑️ Checkpoint incremental descartado: {args.checkpoint}")
+
+    total = round(time.perf_counter() - inicio_total, 3)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+    archivo = f"{DIRECTORIO_REPORTES}/reinicio_{timestamp}.json"
+    with open(archivo, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "modo": "restaurar_base" if args.restaurar_base else "prefijos",
+            "prefijos": [] if args.restaurar_base else args.prefijos,
+            "tamano_lote": args.tamano_lote,
+            "segundos_total": total,
+            "pasos": pasos
+        }, f, indent=2, ensure_ascii=False)
+    print("=" * 80)
+    print(f"✅ Reinicio completo en {total}s")
+    print(f"✅ Reporte guardado en: {archivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
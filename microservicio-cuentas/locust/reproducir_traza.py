@@ -0,0 +1,266 @@
+"""
+Reproducción en Lazo Abierto de una Traza (asyncio + aiohttp)
+Dispara cada operación de una traza (ver traza.py) en su instante programado,
+dividido por --velocidad, sin esperar las respuestas anteriores: si el
+servicio se vuelve lento, la carga ofrecida no baja y la cola crece a la
+vista. Un solo proceso con un pool de conexiones keep-alive
+(--conexiones) llega a tasas que un worker de Locust no alcanza.
+
+Por endpoint ("<método> <plantilla>", los mismos name= del locustfile) se
+registran dos histogramas HDR:
+- "<endpoint>": desde el instante programado hasta la respuesta. Incluye la
+  espera por una conexión libre, así que no sufre de omisión coordinada
+- "<endpoint> (servicio)": desde que salen las cabeceras de la solicitud
+  (ya con conexión) hasta la respuesta
+
+Antes de reproducir se siembran en MySQL tantas cuentas como slots tiene la
+traza (pool_cuentas.sembrar_pool), todas con el mismo saldo inicial: con la
+misma traza cada ejecución parte del mismo estado.
+
+Resultados en locust/reportes/reproduccion_YYYYMMDD_HHMMSS.json y
+hdr_YYYYMMDD_HHMMSS.json (legible con consultar_hdr.py).
+
+Uso:
+    locust -f locust/locustfile.py --headless -u 500 -r 50 -t 10m \\
+      --grabar-traza locust/trazas/cuentas_500u.trz --semilla-traza 42
+    python locust/reproducir_traza.py locust/trazas/cuentas_500u.trz \\
+      --host http://localhost:3000 --velocidad 4 --conexiones 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+
+import aiohttp
+
+from histogramas_hdr import HistogramasHdr
+from pool_cuentas import sembrar_pool, SALDO_INICIAL
+from traza import Traza, METODOS, PLANTILLAS
+
+DIRECTORIO_REPORTES = "locust/reportes"
+
+# Margen entre preparar la reproducción y la primera operación
+ARRANQUE_S = 0.5
+
+# Si el envío se atrasa más que esto respecto al programa, el generador es el cuello de botella
+RETRASO_ADVERTENCIA_MS = 50
+
+SUFIJO_SERVICIO = " (servicio)"
+
+
+class Resultados:
+    """Conteos, códigos de estado e histogramas por endpoint"""
+
+    def __init__(self):
+        self.histogramas = HistogramasHdr()
+        self.endpoints = {}
+        self.en_vuelo = 0
+        self.en_vuelo_max = 0
+        self.retraso_max_ms = 0.0
+        self.atrasadas = 0
+
+    def registrar(self, metodo, plantilla, estado, latencia_s, servicio_s):
+        clave = f"{metodo} {plantilla}"
+        endpoint = self.endpoints.setdefault(clave, {"solicitudes": 0, "fallos": 0, "codigos": {}})
+        endpoint["solicitudes"] += 1
+        endpoint["codigos"][estado] = endpoint["codigos"].get(estado, 0) + 1
+        # 404 y 409 son respuestas esperadas del modelo (cuenta eliminada, saldo insuficiente)
+        if not isinstance(estado, int) or estado >= 500:
+            endpoint["fallos"] += 1
+        self.histogramas.registrar(metodo, plantilla, latencia_s * 1000)
+        if servicio_s is not None:
+            self.histogramas.registrar(metodo, plantilla + SUFIJO_SERVICIO, servicio_s * 1000)
+
+    def resumen(self):
+        endpoints = {}
+        for clave, endpoint in sorted(self.endpoints.items()):
+            latencia = self.histogramas.acumulados.get(clave)
+            servicio = self.histogramas.acumulados.get(clave + SUFIJO_SERVICIO)
+            endpoints[clave] = {
+                **endpoint,
+                "codigos": {str(codigo): n for codigo, n in endpoint["codigos"].items()},
+                **{f"p{p:g}_ms": latencia.get_value_at_percentile(p) / 1000 for p in (50, 95, 99, 99.9)},
+                "max_ms": latencia.get_max_value() / 1000,
+                **({
+                    f"servicio_p{p:g}_ms": servicio.get_value_at_percentile(p) / 1000 for p in (50, 99)
+                } if servicio else {})
+            }
+        return endpoints
+
+
+def preparar(traza, cuentas):
+    """Listas Python (más rápidas que indexar numpy en el lazo) de cada operación"""
+    registros = traza.registros
+    return list(zip(
+        (traza.instantes_us() / 1_000_000).tolist(),
+        [METODOS[i] for i in registros["metodo"].tolist()],
+        [PLANTILLAS[i] for i in registros["plantilla"].tolist()],
+        [cuentas[i] for i in registros["cuenta"].tolist()],
+        registros["valor"].tolist()
+    ))
+
+
+def solicitud(metodo, plantilla, cuenta, valor):
+    """(url, cuerpo JSON) de una operación; cuenta es [id, numeroCuenta]"""
+    if plantilla == "/cuentas/socio/[id]":
+        return f"/cuentas/socio/{valor}", None
+    url = plantilla.replace("[id]", cuenta[0])
+    if plantilla in ("/cuentas/[id]/retiro", "/cuentas/[id]/deposito"):
+        return url, {"monto": valor / 100}
+    if metodo == "PUT":
+        return url, {
+            "socioId": str(valor),
+            "numeroCuenta": cuenta[1],
+            "tipoCuenta": "AHORRO",
+            "saldo": SALDO_INICIAL
+        }
+    return url, None
+
+
+async def marcar_salida(sesion, contexto, parametros):
+    """TraceConfig: instante en que salen las cabeceras (la conexión ya está tomada)"""
+    contexto.trace_request_ctx["salida"] = asyncio.get_running_loop().time()
+
+
+async def enviar(sesion, resultados, programado, metodo, plantilla, cuenta, valor):
+    loop = asyncio.get_running_loop()
+    url, cuerpo = solicitud(metodo, plantilla, cuenta, valor)
+    resultados.en_vuelo += 1
+    resultados.en_vuelo_max = max(resultados.en_vuelo_max, resultados.en_vuelo)
+    marcas = {}
+    try:
+        async with sesion.request(metodo, url, json=cuerpo, trace_request_ctx=marcas) as respuesta:
+            await respuesta.read()
+            estado = respuesta.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        estado = f"error:{type(e).__name__}"
+    finally:
+        resultados.en_vuelo -= 1
+    fin = loop.time()
+    servicio = fin - marcas["salida"] if isinstance(estado, int) and "salida" in marcas else None
+    resultados.registrar(metodo, plantilla, estado, fin - programado, servicio)
+
+
+async def reproducir(operaciones, host, velocidad, conexiones, timeout, duracion=None):
+    """
+    Lanzar cada operación en inicio + instante / velocidad. El lazo solo
+    duerme hasta la próxima operación: las que ya vencieron salen de
+    inmediato y su atraso queda medido.
+    """
+    resultados = Resultados()
+    conector = aiohttp.TCPConnector(limit=conexiones, limit_per_host=conexiones)
+    trazado = aiohttp.TraceConfig()
+    trazado.on_request_headers_sent.append(marcar_salida)
+    async with aiohttp.ClientSession(
+        host, connector=conector, timeout=aiohttp.ClientTimeout(total=timeout), trace_configs=[trazado]
+    ) as sesion:
+        loop = asyncio.get_running_loop()
+        pendientes = set()
+        inicio = loop.time() + ARRANQUE_S
+        for instante, metodo, plantilla, cuenta, valor in operaciones:
+            desplazamiento = instante / velocidad
+            if duracion is not None and desplazamiento > duracion:
+                break
+            programado = inicio + desplazamiento
+            espera = programado - loop.time()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            else:
+                retraso_ms = -espera * 1000
+                resultados.retraso_max_ms = max(resultados.retraso_max_ms, retraso_ms)
+                if retraso_ms > RETRASO_ADVERTENCIA_MS:
+                    resultados.atrasadas += 1
+            tarea = asyncio.create_task(
+                enviar(sesion, resultados, programado, metodo, plantilla, cuenta, valor)
+            )
+            pendientes.add(tarea)
+            tarea.add_done_callback(pendientes.discard)
+        fin_envio = loop.time()
+        if pendientes:
+            await asyncio.gather(*pendientes)
+        resultados.duracion_envio_s = fin_envio - inicio
+        resultados.duracion_total_s = loop.time() - inicio
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducir una traza de operaciones en lazo abierto")
+    parser.add_argument("traza", help="Archivo generado con locustfile.py --grabar-traza")
+    parser.add_argument("--host", default="http://localhost:3000")
+    parser.add_argument("--velocidad", type=float, default=1.0,
+                        help="Factor de aceleración: 4 dispara la traza en un cuarto de su duración")
+    parser.add_argument("--conexiones", type=int, default=100, help="Conexiones keep-alive del pool")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout por solicitud (s)")
+    parser.add_argument("--duracion", type=float, default=None,
+                        help="Cortar la reproducción a los N segundos (de reloj, ya acelerados)")
+    args = parser.parse_args()
+    if args.velocidad <= 0 or args.conexiones <= 0:
+        parser.error("--velocidad y --conexiones deben ser positivos")
+
+    try:
+        traza = Traza(args.traza)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    duracion_traza = traza.duracion_us / 1_000_000
+    print(f"🎞️ Traza {args.traza}: {len(traza)} operaciones sobre {traza.cuentas} cuentas "
+          f"en {duracion_traza:.1f}s (semilla {traza.semilla})")
+
+    print(f"🌱 Sembrando {traza.cuentas} cuentas con saldo {SALDO_INICIAL}...")
+    cuentas = sembrar_pool(traza.cuentas)
+    operaciones = preparar(traza, cuentas)
+
+    objetivo_s = duracion_traza / args.velocidad
+    print(f"▶️ Reproduciendo a x{args.velocidad:g} ({len(traza) / objetivo_s if objetivo_s else 0:.0f} "
+          f"op/s ofrecidas durante {objetivo_s:.1f}s) con {args.conexiones} conexiones")
+    resultados = asyncio.run(reproducir(
+        operaciones, args.host, args.velocidad, args.conexiones, args.timeout, args.duracion
+    ))
+
+    enviadas = sum(endpoint["solicitudes"] for endpoint in resultados.endpoints.values())
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+    archivo = f"{DIRECTORIO_REPORTES}/reproduccion_{timestamp}.json"
+    reporte = {
+        "timestamp": datetime.now().isoformat(),
+        "traza": args.traza,
+        "semilla": traza.semilla,
+        "cuentas": traza.cuentas,
+        "host": args.host,
+        "velocidad": args.velocidad,
+        "conexiones": args.conexiones,
+        "operaciones": enviadas,
+        "duracion_envio_s": round(resultados.duracion_envio_s, 3),
+        "duracion_total_s": round(resultados.duracion_total_s, 3),
+        "tasa_ofrecida": round(enviadas / resultados.duracion_envio_s, 2) if resultados.duracion_envio_s else None,
+        "tasa_lograda": round(enviadas / resultados.duracion_total_s, 2) if resultados.duracion_total_s else None,
+        "en_vuelo_max": resultados.en_vuelo_max,
+        "retraso_envio_max_ms": round(resultados.retraso_max_ms, 3),
+        "envios_atrasados": resultados.atrasadas,
+        "endpoints": resultados.resumen()
+    }
+    with open(archivo, "w") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    archivo_hdr = resultados.histogramas.guardar(DIRECTORIO_REPORTES, timestamp)
+
+    print("=" * 80)
+    print(f"{'Endpoint':<36}{'Solic.':>8}{'Fallos':>8}{'P50 ms':>10}{'P99 ms':>10}{'P99 serv.':>11}")
+    for clave, endpoint in reporte["endpoints"].items():
+        print(f"{clave:<36}{endpoint['solicitudes']:>8}{endpoint['fallos']:>8}"
+              f"{endpoint['p50_ms']:>10.1f}{endpoint['p99_ms']:>10.1f}"
+              f"{endpoint.get('servicio_p99_ms', float('nan')):>11.1f}")
+    print("=" * 80)
+    print(f"Ofrecidas: {reporte['tasa_ofrecida']} op/s, logradas: {reporte['tasa_lograda']} op/s, "
+          f"máximo en vuelo: {resultados.en_vuelo_max}")
+    if resultados.atrasadas:
+        print(f"⚠️ {resultados.atrasadas} envíos salieron con más de {RETRASO_ADVERTENCIA_MS} ms de atraso "
+              f"(máx {reporte['retraso_envio_max_ms']} ms): el generador no sostiene la tasa pedida")
+    print(f"✅ Reporte guardado en: {archivo}")
+    print(f"📊 Histogramas HDR guardados en: {archivo_hdr}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
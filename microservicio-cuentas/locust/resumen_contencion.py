@@ -0,0 +1,74 @@
+"""
+Comparar throughput y latencia en función del sesgo de acceso
+Lee los contencion_*.json que escribe el locustfile (una ejecución de
+ContencionUser por patrón) y los ordena por concentración medida.
+Uso:
+    python locust/resumen_contencion.py
+    python locust/resumen_contencion.py locust/reportes/contencion_zipf_*.json
+    python locust/resumen_contencion.py --endpoint "POST /cuentas/[id]/deposito (contención)" --json
+"""
+import argparse
+import glob
+import json
+import sys
+
+ENDPOINT_POR_DEFECTO = "POST /cuentas/[id]/retiro (contención)"
+
+
+def fila(reporte, endpoint):
+    datos = reporte["endpoints"].get(endpoint, {})
+    conciliacion = reporte.get("conciliacion") or {}
+    return {
+        "patron": reporte["especificacion"],
+        "usuarios": reporte.get("usuarios"),
+        "cuentas": reporte["cuentas_compartidas"],
+        "top1": reporte["concentracion"]["top1"],
+        "top10": reporte["concentracion"]["top10"],
+        "rps_total": round(sum(e["rps"] for e in reporte["endpoints"].values()), 2),
+        "rps": datos.get("rps"),
+        "p50_ms": datos.get("p50_ms"),
+        "p95_ms": datos.get("p95_ms"),
+        "p99_ms": datos.get("p99_ms"),
+        "fallos": datos.get("fallos"),
+        "cuentas_con_deriva": conciliacion.get("cuentas_con_deriva"),
+        "archivo": reporte["archivo"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y latencia vs sesgo de acceso")
+    parser.add_argument("archivos", nargs="*", help="Archivos contencion_*.json (por defecto todos)")
+    parser.add_argument("--endpoint", default=ENDPOINT_POR_DEFECTO, help="Endpoint de las columnas de latencia")
+    parser.add_argument("--json", action="store_true", help="Salida JSON en lugar de tabla")
+    args = parser.parse_args()
+
+    archivos = args.archivos or sorted(glob.glob("locust/reportes/contencion_*.json"))
+    if not archivos:
+        print("❌ No hay reportes de contención (ejecuta ContencionUser primero)")
+        return 1
+
+    filas = []
+    for archivo in archivos:
+        with open(archivo) as f:
+            filas.append(fila(dict(json.load(f), archivo=archivo), args.endpoint))
+    filas.sort(key=lambda f: (f["top10"], f["top1"]))
+
+    if args.json:
+        print(json.dumps(filas, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"Latencia de: {args.endpoint}")
+    columnas = ["usuarios", "top1", "top10", "rps_total", "rps", "p50_ms", "p95_ms", "p99_ms", "fallos",
+                "cuentas_con_deriva"]
+    ancho = max(len(f["patron"]) for f in filas) + 2
+    anchos = {c: max(len(c), 8) + 2 for c in columnas}
+    print(f"{'Patrón':<{ancho}}" + "".join(f"{c:>{anchos[c]}}" for c in columnas))
+    for f in filas:
+        print(f"{f['patron']:<{ancho}}" + "".join(
+            f"{'-':>{anchos[c]}}" if f[c] is None else f"{f[c]:>{anchos[c]}}" for c in columnas
+        ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
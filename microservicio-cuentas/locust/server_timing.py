@@ -0,0 +1,160 @@
+"""
+Desglose de Latencia con Server-Timing (Locust)
+El servicio de cuentas responde en cada solicitud la cabecera
+    Server-Timing: bd;dur=3.12, consultas;desc=2, handler;dur=5.40
+(ver src/cuentas/server-timing.ts). Con el tiempo de respuesta que mide
+Locust, cada solicitud se separa en:
+- bd: tiempo en MySQL (suma de las consultas de la solicitud)
+- app: handler - bd (Nest, validación y código del servicio)
+- red: total - handler (red, HTTP/Express, serialización y el cliente)
+y se registra en un histograma HDR propio por endpoint y componente, con la
+clave "<método> <name> [componente]". Las consultas por solicitud van en
+"[consultas]". En modo distribuido los workers envían sus histogramas al
+master como los de histogramas_hdr.py.
+
+Al terminar se escribe locust/reportes/server_timing_YYYYMMDD_HHMMSS.json con
+media y percentiles de cada componente por endpoint, más los histogramas
+codificados (se pueden sumar entre ejecuciones).
+"""
+import json
+import os
+from datetime import datetime
+
+from histogramas_hdr import HistogramasHdr
+
+CABECERA = "Server-Timing"
+
+COMPONENTES = ("bd", "app", "red")
+
+# Tipo de mensaje worker -> master
+MENSAJE_SERVER_TIMING = "server_timing"
+
+PERCENTILES = (50, 95, 99)
+
+
+def leer_server_timing(valor):
+    """
+    Métricas de una cabecera Server-Timing: {nombre: dur en ms} y, para las
+    que solo traen desc numérico (consultas), {nombre: desc}. Las métricas
+    mal formadas se ignoran.
+    """
+    metricas = {}
+    for metrica in (valor or "").split(","):
+        nombre, *parametros = [parte.strip() for parte in metrica.split(";")]
+        if not nombre:
+            continue
+        for parametro in parametros:
+            clave, _, dato = parametro.partition("=")
+            if clave.strip() in ("dur", "desc"):
+                try:
+                    metricas[nombre] = float(dato.strip().strip('"'))
+                except ValueError:
+                    continue
+                if clave.strip() == "dur":
+                    break
+    return metricas
+
+
+def componentes(total_ms, metricas):
+    """bd, app, red y consultas de una solicitud; None sin bd y handler"""
+    if "bd" not in metricas or "handler" not in metricas:
+        return None
+    handler = metricas["handler"]
+    bd = min(metricas["bd"], handler)
+    return {
+        "bd": bd,
+        "app": handler - bd,
+        # El reloj del cliente y el del servicio no son el mismo: nunca negativo
+        "red": max(total_ms - handler, 0.0),
+        "consultas": metricas.get("consultas", 0)
+    }
+
+
+class TiemposServidor:
+    """Histogramas HDR por endpoint y componente de Server-Timing"""
+
+    def __init__(self):
+        self.histogramas = HistogramasHdr()
+        self.sin_cabecera = {}
+
+    def reiniciar(self):
+        self.histogramas.reiniciar()
+        self.sin_cabecera = {}
+
+    def registrar(self, metodo, nombre, total_ms, respuesta):
+        """Registrar una solicitud a partir de la respuesta (listener de events.request)"""
+        if respuesta is None:
+            # Eventos sin respuesta HTTP, p. ej. "/cuentas/stream (completo)"
+            return
+        encabezados = getattr(respuesta, "headers", None)
+        valor = encabezados.get(CABECERA) if encabezados is not None else None
+        desglose = componentes(total_ms, leer_server_timing(valor)) if valor else None
+        clave = f"{metodo} {nombre}"
+        if desglose is None:
+            self.sin_cabecera[clave] = self.sin_cabecera.get(clave, 0) + 1
+            return
+        for componente in COMPONENTES:
+            self.histogramas.registrar(metodo, f"{nombre} [{componente}]", desglose[componente])
+        # Valor entero: se registra como "ms" y se lee dividiendo por 1000 (ver resumen)
+        self.histogramas.registrar(metodo, f"{nombre} [consultas]", desglose["consultas"])
+
+    def extraer_delta(self):
+        """Worker: histogramas y solicitudes sin cabecera desde la última llamada"""
+        hdr = self.histogramas.extraer_delta()
+        sin_cabecera, self.sin_cabecera = self.sin_cabecera, {}
+        if hdr is None and not sin_cabecera:
+            return None
+        return {"hdr": hdr or {}, "sin_cabecera": sin_cabecera}
+
+    def combinar(self, delta):
+        """Master: sumar lo recibido de un worker"""
+        self.histogramas.combinar(delta["hdr"])
+        for clave, cantidad in delta["sin_cabecera"].items():
+            self.sin_cabecera[clave] = self.sin_cabecera.get(clave, 0) + cantidad
+
+    def resumen(self):
+        """{"<método> <name>": {solicitudes, consultas, bd/app/red: media y percentiles en ms}}"""
+        endpoints = {}
+        for clave, histograma in self.histogramas.acumulados.items():
+            endpoint, _, componente = clave.rpartition(" [")
+            componente = componente.rstrip("]")
+            datos = endpoints.setdefault(endpoint, {})
+            if componente == "consultas":
+                datos["solicitudes"] = histograma.get_total_count()
+                datos["consultas"] = {
+                    "media": round(histograma.get_mean_value() / 1000, 2),
+                    "max": histograma.get_max_value() // 1000
+                }
+                continue
+            datos[componente] = {
+                "media_ms": round(histograma.get_mean_value() / 1000, 3),
+                **{f"p{p}_ms": histograma.get_value_at_percentile(p) / 1000 for p in PERCENTILES}
+            }
+        for datos in endpoints.values():
+            medias = [datos[c]["media_ms"] for c in COMPONENTES if c in datos]
+            total = sum(medias)
+            if total:
+                datos["fraccion_media"] = {
+                    c: round(datos[c]["media_ms"] / total, 3) for c in COMPONENTES if c in datos
+                }
+        return dict(sorted(endpoints.items()))
+
+    def guardar(self, directorio="locust/reportes", timestamp=None):
+        """Escribir server_timing_<timestamp>.json y devolver su ruta (None si no hay datos)"""
+        if not self.histogramas.acumulados:
+            return None
+        os.makedirs(directorio, exist_ok=True)
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        archivo = f"{directorio}/server_timing_{timestamp}.json"
+        with open(archivo, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "componentes": list(COMPONENTES),
+                "endpoints": self.resumen(),
+                "sin_cabecera": self.sin_cabecera,
+                "hdr": {
+                    clave: histograma.encode().decode("ascii")
+                    for clave, histograma in sorted(self.histogramas.acumulados.items())
+                }
+            }, f, indent=2, ensure_ascii=False)
+        return archivo
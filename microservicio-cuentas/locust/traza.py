@@ -0,0 +1,166 @@
+"""
+Trazas de Operaciones para Reproducción en Lazo Abierto
+Locust es de lazo cerrado: cada usuario espera la respuesta antes de su
+tiempo de espera, así que si el servicio se vuelve lento la carga ofrecida
+baja con él y la cola de latencia queda escondida. Una traza fija de antemano
+cuándo sale cada solicitud; reproducir_traza.py la dispara a esos instantes
+sin importar cuánto tarden las respuestas.
+
+La traza se genera con una semilla a partir del modelo de usuario del
+locustfile (pesos de tareas, montos y tiempo de espera), así que la misma
+semilla produce la misma traza byte a byte.
+
+Formato binario (little-endian):
+- Cabecera (CABECERA): "TRZA", versión, cuentas, semilla, registros y
+  duración en µs
+- Un registro de 14 bytes por operación (REGISTRO): µs desde el registro
+  anterior, método y plantilla de endpoint (índices en METODOS/PLANTILLAS),
+  cuenta (slot 0..cuentas-1) y valor (monto en centavos, o socio en las
+  operaciones que lo usan)
+1M de operaciones ocupan ~14 MB y se leen con un solo np.fromfile.
+"""
+import heapq
+import random
+import struct
+
+import numpy as np
+
+MAGICO = b"TRZA"
+VERSION = 1
+
+CABECERA = struct.Struct("<4sHIQQQ")
+
+REGISTRO = np.dtype([
+    ("delta_us", "<u4"),
+    ("metodo", "u1"),
+    ("plantilla", "u1"),
+    ("cuenta", "<u4"),
+    ("valor", "<u4"),
+])
+
+# Índices fijos del formato: solo se agregan al final
+METODOS = ("GET", "POST", "PUT", "DELETE")
+PLANTILLAS = (
+    "/cuentas",
+    "/cuentas/[id]",
+    "/cuentas/[id]/retiro",
+    "/cuentas/[id]/deposito",
+    "/cuentas/socio/[id]",
+)
+
+# Registros por escritura a disco
+LOTE_ESCRITURA = 1 << 16
+
+class EscritorTraza:
+    """Escribe registros en orden de tiempo; la cabecera se completa al cerrar"""
+
+    def __init__(self, ruta, cuentas, semilla):
+        self.ruta = ruta
+        self.cuentas = cuentas
+        self.semilla = semilla
+        self.registros = 0
+        self._ultimo_us = 0
+        self._pendientes = []
+        self._metodos = {metodo: i for i, metodo in enumerate(METODOS)}
+        self._plantillas = {plantilla: i for i, plantilla in enumerate(PLANTILLAS)}
+        self._archivo = open(ruta, "wb")
+        self._archivo.write(CABECERA.pack(MAGICO, VERSION, cuentas, semilla, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def agregar(self, instante_us, metodo, plantilla, cuenta, valor=0):
+        delta = instante_us - self._ultimo_us
+        if delta < 0:
+            raise ValueError("Los registros de la traza deben agregarse en orden de tiempo")
+        self._pendientes.append((delta, self._metodos[metodo], self._plantillas[plantilla], cuenta, valor))
+        self._ultimo_us = instante_us
+        self.registros += 1
+        if len(self._pendientes) >= LOTE_ESCRITURA:
+            self._volcar()
+
+    def _volcar(self):
+        if self._pendientes:
+            np.array(self._pendientes, dtype=REGISTRO).tofile(self._archivo)
+            self._pendientes = []
+
+    def cerrar(self):
+        if self._archivo.closed:
+            return
+        self._volcar()
+        self._archivo.seek(0)
+        self._archivo.write(CABECERA.pack(
+            MAGICO, VERSION, self.cuentas, self.semilla, self.registros, self._ultimo_us
+        ))
+        self._archivo.close()
+
+
+class Traza:
+    """Traza leída de disco: cabecera y arreglo de registros"""
+
+    def __init__(self, ruta):
+        with open(ruta, "rb") as f:
+            datos = f.read(CABECERA.size)
+            if len(datos) < CABECERA.size:
+                raise ValueError(f"{ruta}: archivo demasiado corto para ser una traza")
+            magico, version, self.cuentas, self.semilla, total, self.duracion_us = CABECERA.unpack(datos)
+            if magico != MAGICO or version != VERSION:
+                raise ValueError(f"{ruta}: no es una traza versión {VERSION}")
+            self.registros = np.fromfile(f, dtype=REGISTRO)
+        if len(self.registros) != total:
+            raise ValueError(f"{ruta}: la cabecera indica {total} registros y hay {len(self.registros)}")
+        self.ruta = ruta
+
+    def __len__(self):
+        return len(self.registros)
+
+    def instantes_us(self):
+        """Instante de cada registro desde el inicio de la traza"""
+        return np.cumsum(self.registros["delta_us"], dtype=np.uint64)
+
+    def conteo_por_endpoint(self):
+        """{"<método> <plantilla>": operaciones}"""
+        claves = self.registros["metodo"].astype(np.uint16) << 8 | self.registros["plantilla"]
+        valores, cantidades = np.unique(claves, return_counts=True)
+        return {
+            f"{METODOS[valor >> 8]} {PLANTILLAS[valor & 0xFF]}": int(cantidad)
+            for valor, cantidad in zip(valores.tolist(), cantidades.tolist())
+        }
+
+
+def generar_traza(ruta, modelo, usuarios, duracion_s, semilla, espera, tasa_spawn=None):
+    """
+    Simular 'usuarios' usuarios durante duracion_s y escribir sus operaciones.
+    modelo(rnd, estado) devuelve la próxima operación de un usuario como
+    (método, plantilla, valor) o None si esa iteración no hace solicitud;
+    estado es un dict propio de cada usuario. El usuario i usa la cuenta i,
+    arranca en i / tasa_spawn (todos en 0 sin tasa) y entre operaciones
+    espera uniform(*espera) segundos, los límites del wait_time del escenario.
+    Las respuestas no cuentan: el tiempo de servicio no desplaza la operación
+    siguiente.
+
+    Cada usuario tiene su propio Random derivado de la semilla, así la
+    secuencia de un usuario no depende de cómo se intercalan los demás.
+    """
+    duracion_us = int(duracion_s * 1_000_000)
+    generadores = [random.Random(f"{semilla}-{i}") for i in range(usuarios)]
+    estados = [{} for _ in range(usuarios)]
+    proximos = [
+        (int(i / tasa_spawn * 1_000_000) if tasa_spawn else 0, i) for i in range(usuarios)
+    ]
+    heapq.heapify(proximos)
+
+    with EscritorTraza(ruta, usuarios, semilla) as escritor:
+        while proximos:
+            instante, i = heapq.heappop(proximos)
+            if instante >= duracion_us:
+                continue
+            operacion = modelo(generadores[i], estados[i])
+            if operacion is not None:
+                metodo, plantilla, valor = operacion
+                escritor.agregar(instante, metodo, plantilla, i, valor)
+            heapq.heappush(proximos, (instante + int(generadores[i].uniform(*espera) * 1_000_000), i))
+    return escritor.registros
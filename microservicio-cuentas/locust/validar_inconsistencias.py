@@ -4,12 +4,33 @@ Conecta a MySQL y verifica:
 - Saldos negativos
 - Cuentas con estado inconsistente
 - Duplicados
-- Integridad referencial
+- Integridad referencial: socios inexistentes en la base de socios (--huerfanas)
+- Cadena de auditoría (auditoria_cuentas) contra el saldo final (--auditoria)
 """
 import mysql.connector
-from datetime import datetime
+import mysql.connector.pooling
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import gzip
 import json
+import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+
+import numpy as np
+
+from checkpoint_validacion import CheckpointValidacion, RUTA_CHECKPOINT
+from conjunto_socios import ConjuntoIds, leer_socios_archivo, leer_socios_postgres
+from motor_validacion import (
+    MotorValidacion, COLUMNAS, CLAVES_RECORRIDO,
+    combinar_estadisticas, estadisticas_vacias
+)
 
 # Configuración de conexión (ajustar según .env o docker-compose)
 DB_CONFIG = {
@@ -20,16 +41,125 @@ DB_CONFIG = {
     'database': 'cooperativa_cuentas'
 }
 
+DIRECTORIO_REPORTES = "locust/reportes"
+
+# Filas leídas por página en la paginación keyset (acota la memoria por consulta)
+TAMANO_LOTE = 5000
+
+# Máximo de hallazgos por verificación que se imprimen en consola
+MAX_MUESTRAS_CONSOLA = 20
+
+# Modo paralelo: hilos (y conexiones del pool) y filas por shard
+WORKERS = 4
+TAMANO_SHARD = 200000
+
+# Modo incremental: segundos que se retrocede la marca de agua guardada, para
+# no perder filas de transacciones que confirman después de la lectura con un
+# fecha_actualizacion anterior a la última fila vista
+MARGEN_MARCA_AGUA = 5
+
+# Descripción que escribe el trigger after_cuenta_update de 01-init.sql
+PATRON_AUDITORIA_SALDO = re.compile(r"^Saldo actualizado de (-?\d+(?:\.\d+)?) a (-?\d+(?:\.\d+)?)$")
+
+# Títulos en consola de los hallazgos de la cadena de auditoría
+TITULOS_AUDITORIA = {
+    "AUDITORIA_ILEGIBLE": "REGISTROS DE AUDITORÍA ILEGIBLES",
+    "AUDITORIA_CADENA_ROTA": "CADENAS DE AUDITORÍA ROTAS",
+    "AUDITORIA_SALDO_FINAL": "SALDO FINAL DISTINTO AL DE LA AUDITORÍA"
+}
+
+
+def _alias_columna(columna):
+    """Nombre con el que una columna aparece en la fila ('a.id' -> 'id')"""
+    return columna.split(".")[-1]
+
+
+def _condicion_keyset(claves, ultima):
+    """
+    Condición (k1, k2, ...) > (v1, v2, ...) expandida en OR/AND, forma en la
+    que MySQL sí usa el índice de las claves como rango.
+    """
+    partes, params = [], []
+    for i, clave in enumerate(claves):
+        iguales = [f"{c} = %s" for c in claves[:i]]
+        partes.append("(" + " AND ".join(iguales + [f"{clave} > %s"]) + ")")
+        params.extend(ultima[:i + 1])
+    return "(" + " OR ".join(partes) + ")", tuple(params)
+
+
+def _sumar_contribucion(agregados, estado, activo, saldo, tipos, signo=1):
+    """Sumar (o restar con signo=-1) lo que aporta una cuenta a los agregados"""
+    agregados["total"] += signo
+    _sumar_conteo(agregados["por_estado"], estado, signo)
+    if activo == 1:
+        agregados["activas"] += signo
+        agregados["saldo_total"] += signo * saldo
+    for tipo in tipos:
+        _sumar_conteo(agregados["abiertas_por_tipo"], tipo, signo)
+
+
+def _sumar_conteo(conteos, clave, signo):
+    conteos[clave] = conteos.get(clave, 0) + signo
+    if conteos[clave] == 0:
+        del conteos[clave]
+
+
 class ValidadorInconsistencias:
-    def __init__(self):
+    def __init__(self, streaming=False, comprimir=False, tamano_lote=TAMANO_LOTE,
+                 una_pasada=False, db_config=None, paralelo=False,
+                 workers=WORKERS, tamano_shard=TAMANO_SHARD, incremental=False,
+                 completo=False, ruta_checkpoint=RUTA_CHECKPOINT,
+                 margen_marca_agua=MARGEN_MARCA_AGUA, auditoria=False,
+                 huerfanas=False, socios_archivo=None):
+        """
+        streaming: escribe cada hallazgo en un reporte JSONL en lugar de
+        acumularlos en memoria (para tablas con millones de filas)
+        comprimir: en modo streaming, comprime el reporte JSONL con gzip
+        tamano_lote: filas por página en la paginación keyset
+        una_pasada: evalúa verificaciones y estadísticas con el motor de
+        motor_validacion.py en un único recorrido de la tabla
+        db_config: conexión alternativa a DB_CONFIG (p. ej. BD de benchmark)
+        paralelo: reparte el recorrido del motor en shards por rango de
+        numeroCuenta, ejecutados en 'workers' hilos con un pool de conexiones
+        tamano_shard: filas aproximadas por shard
+        incremental: solo revisa las filas con fecha_actualizacion desde el
+        último checkpoint y actualiza los agregados guardados en él
+        completo: con incremental, descarta el checkpoint y reconstruye todo
+        ruta_checkpoint: archivo SQLite del checkpoint incremental
+        margen_marca_agua: segundos que se restan a la marca de agua guardada
+        auditoria: además, reconstruir la cadena de saldos de auditoria_cuentas
+        huerfanas: además, buscar cuentas cuyo socio no existe en la base de
+        socios (o en socios_archivo, un id por línea)
+        """
+        self.db_config = db_config or DB_CONFIG
         self.conexion = None
         self.cursor = None
         self.inconsistencias = []
+        self.streaming = streaming
+        self.una_pasada = una_pasada
+        self.paralelo = paralelo
+        self.workers = workers
+        self.tamano_shard = tamano_shard
+        self.incremental = incremental
+        self.completo = completo
+        self.ruta_checkpoint = ruta_checkpoint
+        self.margen_marca_agua = margen_marca_agua
+        self.auditoria = auditoria
+        self.huerfanas = huerfanas or bool(socios_archivo)
+        self.socios_archivo = socios_archivo
+        self.estadisticas = None
+        self.comprimir = comprimir
+        self.tamano_lote = tamano_lote
+        self.conteo_por_tipo = {}
+        self.total_inconsistencias = 0
+        self.marca_tiempo = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.archivo_detalles = None
+        self._escritor_detalles = None
     
     def conectar(self):
         """Conectar a la base de datos"""
         try:
-            self.conexion = mysql.connector.connect(**DB_CONFIG)
+            self.conexion = mysql.connector.connect(**self.db_config)
             self.cursor = self.conexion.cursor(dictionary=True)
             print("✅ Conexión a MySQL exitosa")
             return True
@@ -37,144 +167,612 @@ class ValidadorInconsistencias:
             print(f"❌ Error conectando a MySQL: {e}")
             return False
     
+    def _iterar_lotes(self, consulta, claves, params=(), cursor=None):
+        """Recorrer fila a fila el resultado paginado de _iterar_paginas"""
+        for pagina in self._iterar_paginas(consulta, claves, params, cursor):
+            yield from pagina
+    
+    def _iterar_paginas(self, consulta, claves, params=(), cursor=None):
+        """
+        Recorrer el resultado de una consulta por páginas (paginación keyset).
+        
+        La consulta debe contener el marcador {keyset}, que se reemplaza por la
+        condición que continúa desde la última fila leída, y no debe terminar
+        en ORDER BY / LIMIT: ambos se agregan aquí a partir de 'claves'.
+        Solo hay una página en memoria a la vez.
+        """
+        cursor = cursor or self.cursor
+        ultima = None
+        while True:
+            if ultima is None:
+                filtro, params_keyset = "", ()
+            else:
+                filtro, params_keyset = _condicion_keyset(claves, ultima)
+                filtro = f"AND {filtro}"
+            sql = consulta.format(keyset=filtro) + \
+                f" ORDER BY {', '.join(claves)} LIMIT %s"
+            cursor.execute(sql, tuple(params) + params_keyset + (self.tamano_lote,))
+            filas = cursor.fetchall()
+            if filas:
+                yield filas
+            if len(filas) < self.tamano_lote:
+                return
+            ultima = tuple(filas[-1][_alias_columna(c)] for c in claves)
+    
+    def _registrar_inconsistencia(self, inconsistencia):
+        """Contar el hallazgo y guardarlo en memoria o en el reporte JSONL"""
+        tipo = inconsistencia["tipo"]
+        self.conteo_por_tipo[tipo] = self.conteo_por_tipo.get(tipo, 0) + 1
+        self.total_inconsistencias += 1
+        
+        if not self.streaming:
+            self.inconsistencias.append(inconsistencia)
+            return
+        
+        self._abrir_detalles().write(json.dumps(inconsistencia, ensure_ascii=False) + "\n")
+    
+    def _abrir_detalles(self):
+        """Archivo JSONL de detalles del modo streaming, abierto al primer uso"""
+        if self._escritor_detalles is None:
+            os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+            extension = "jsonl.gz" if self.comprimir else "jsonl"
+            self.archivo_detalles = \
+                f"{DIRECTORIO_REPORTES}/validacion_bd_{self.marca_tiempo}.{extension}"
+            if self.comprimir:
+                self._escritor_detalles = gzip.open(self.archivo_detalles, "wt", encoding="utf-8")
+            else:
+                self._escritor_detalles = open(self.archivo_detalles, "w", encoding="utf-8")
+        return self._escritor_detalles
+    
+    def _ejecutar_verificacion(self, consulta, claves, construir, describir, titulo, mensaje_ok):
+        """
+        Recorrer una consulta de verificación y registrar cada fila como hallazgo.
+        Solo se imprimen las primeras MAX_MUESTRAS_CONSOLA filas.
+        """
+        encontrados = 0
+        for fila in self._iterar_lotes(consulta, claves):
+            if encontrados == 0:
+                print(f"\n⚠️  {titulo}:")
+            encontrados += 1
+            self._registrar_inconsistencia(construir(fila))
+            if encontrados <= MAX_MUESTRAS_CONSOLA:
+                print(f"  - {describir(fila)}")
+        
+        if encontrados:
+            if encontrados > MAX_MUESTRAS_CONSOLA:
+                print(f"  ... y {encontrados - MAX_MUESTRAS_CONSOLA} más")
+            print(f"  Total: {encontrados}")
+        else:
+            print(f"\n✅ {mensaje_ok}")
+        
+        return encontrados
+    
     def verificar_saldos_negativos(self):
         """Detectar cuentas con saldo negativo"""
         query = """
         SELECT id, numeroCuenta, saldo, estado, activo
         FROM cuentas
-        WHERE saldo < 0
+        WHERE saldo < 0 {keyset}
         """
         
-        self.cursor.execute(query)
-        resultados = self.cursor.fetchall()
-        
-        if resultados:
-            print(f"\n⚠️  SALDOS NEGATIVOS DETECTADOS: {len(resultados)}")
-            for cuenta in resultados:
-                inconsistencia = {
-                    "tipo": "SALDO_NEGATIVO",
-                    "cuenta_id": cuenta['id'],
-                    "numero_cuenta": cuenta['numeroCuenta'],
-                    "saldo": float(cuenta['saldo']),
-                    "estado": cuenta['estado'],
-                    "activo": cuenta['activo']
-                }
-                self.inconsistencias.append(inconsistencia)
-                print(f"  - Cuenta {cuenta['numeroCuenta']}: Saldo = {cuenta['saldo']}")
-        else:
-            print("\n✅ No se encontraron saldos negativos")
-        
-        return len(resultados)
+        return self._ejecutar_verificacion(
+            query, ("id",),
+            lambda cuenta: {
+                "tipo": "SALDO_NEGATIVO",
+                "cuenta_id": cuenta['id'],
+                "numero_cuenta": cuenta['numeroCuenta'],
+                "saldo": float(cuenta['saldo']),
+                "estado": cuenta['estado'],
+                "activo": cuenta['activo']
+            },
+            lambda cuenta: f"Cuenta {cuenta['numeroCuenta']}: Saldo = {cuenta['saldo']}",
+            "SALDOS NEGATIVOS DETECTADOS",
+            "No se encontraron saldos negativos"
+        )
     
     def verificar_estado_inconsistente(self):
         """Detectar cuentas con estado activo pero marcadas como inactivas"""
         query = """
         SELECT id, numeroCuenta, estado, activo
         FROM cuentas
-        WHERE (estado = 'ACTIVA' AND activo = 0)
-           OR (estado IN ('CANCELADA', 'SUSPENDIDA') AND activo = 1)
+        WHERE ((estado = 'ACTIVA' AND activo = 0)
+           OR (estado IN ('CANCELADA', 'SUSPENDIDA') AND activo = 1)) {keyset}
         """
         
-        self.cursor.execute(query)
-        resultados = self.cursor.fetchall()
-        
-        if resultados:
-            print(f"\n⚠️  ESTADOS INCONSISTENTES DETECTADOS: {len(resultados)}")
-            for cuenta in resultados:
-                inconsistencia = {
-                    "tipo": "ESTADO_INCONSISTENTE",
-                    "cuenta_id": cuenta['id'],
-                    "numero_cuenta": cuenta['numeroCuenta'],
-                    "estado": cuenta['estado'],
-                    "activo": cuenta['activo']
-                }
-                self.inconsistencias.append(inconsistencia)
-                print(f"  - Cuenta {cuenta['numeroCuenta']}: Estado={cuenta['estado']}, Activo={cuenta['activo']}")
-        else:
-            print("\n✅ No se encontraron estados inconsistentes")
-        
-        return len(resultados)
+        return self._ejecutar_verificacion(
+            query, ("id",),
+            lambda cuenta: {
+                "tipo": "ESTADO_INCONSISTENTE",
+                "cuenta_id": cuenta['id'],
+                "numero_cuenta": cuenta['numeroCuenta'],
+                "estado": cuenta['estado'],
+                "activo": cuenta['activo']
+            },
+            lambda cuenta: f"Cuenta {cuenta['numeroCuenta']}: Estado={cuenta['estado']}, Activo={cuenta['activo']}",
+            "ESTADOS INCONSISTENTES DETECTADOS",
+            "No se encontraron estados inconsistentes"
+        )
     
     def verificar_numeros_duplicados(self):
         """Detectar números de cuenta duplicados entre cuentas activas"""
         query = """
         SELECT numeroCuenta, COUNT(*) as total
         FROM cuentas
-        WHERE activo = 1
+        WHERE activo = 1 {keyset}
         GROUP BY numeroCuenta
         HAVING COUNT(*) > 1
         """
         
-        self.cursor.execute(query)
-        resultados = self.cursor.fetchall()
-        
-        if resultados:
-            print(f"\n⚠️  NÚMEROS DE CUENTA DUPLICADOS: {len(resultados)}")
-            for item in resultados:
-                inconsistencia = {
-                    "tipo": "NUMERO_DUPLICADO",
-                    "numero_cuenta": item['numeroCuenta'],
-                    "total_duplicados": item['total']
-                }
-                self.inconsistencias.append(inconsistencia)
-                print(f"  - Número {item['numeroCuenta']}: {item['total']} duplicados")
+        return self._ejecutar_verificacion(
+            query, ("numeroCuenta",),
+            lambda item: {
+                "tipo": "NUMERO_DUPLICADO",
+                "numero_cuenta": item['numeroCuenta'],
+                "total_duplicados": item['total']
+            },
+            lambda item: f"Número {item['numeroCuenta']}: {item['total']} duplicados",
+            "NÚMEROS DE CUENTA DUPLICADOS",
+            "No se encontraron números duplicados"
+        )
+
+    def verificar_cuentas_huerfanas(self):
+        """
+        Detectar cuentas activas cuyo socio_id no existe en el microservicio
+        de socios (otra base: PostgreSQL, o el archivo de --socios-archivo).
+        Los ids de socios se cargan a un ConjuntoIds ordenado y cuentas se
+        recorre por páginas buscando cada página completa con searchsorted.
+        """
+        try:
+            inicio = time.perf_counter()
+            if self.socios_archivo:
+                total, lotes = leer_socios_archivo(self.socios_archivo)
+            else:
+                total, lotes = leer_socios_postgres()
+            socios = ConjuntoIds(total, lotes)
+        except Exception as e:
+            print(f"\n⚠️  No se pudo leer los socios, se omite la verificación de huérfanas: {e}")
+            return 0
+        print(f"\nSocios cargados: {len(socios)} ({socios.bytes_usados / 2**20:.1f} MB) "
+              f"en {time.perf_counter() - inicio:.1f}s")
+        if socios.invalidos:
+            print(f"  ({socios.invalidos} ids de socio que no son UUID ignorados)")
+        
+        query = """
+        SELECT id, numeroCuenta, socio_id
+        FROM cuentas
+        WHERE activo = 1 {keyset}
+        """
+        encontrados = 0
+        for pagina in self._iterar_paginas(query, ("id",)):
+            existe = socios.contiene([cuenta['socio_id'] for cuenta in pagina])
+            for posicion in np.flatnonzero(~existe):
+                cuenta = pagina[posicion]
+                if encontrados == 0:
+                    print("\n⚠️  CUENTAS HUÉRFANAS (socio inexistente):")
+                encontrados += 1
+                self._registrar_inconsistencia({
+                    "tipo": "SOCIO_INEXISTENTE",
+                    "cuenta_id": cuenta['id'],
+                    "numero_cuenta": cuenta['numeroCuenta'],
+                    "socio_id": cuenta['socio_id']
+                })
+                if encontrados <= MAX_MUESTRAS_CONSOLA:
+                    print(f"  - Cuenta {cuenta['numeroCuenta']}: SocioID={cuenta['socio_id']} no existe")
+        
+        if encontrados:
+            if encontrados > MAX_MUESTRAS_CONSOLA:
+                print(f"  ... y {encontrados - MAX_MUESTRAS_CONSOLA} más")
+            print(f"  Total: {encontrados}")
         else:
-            print("\n✅ No se encontraron números duplicados")
+            print("\n✅ No se encontraron cuentas huérfanas")
+        return encontrados
+    
+    def validar_en_una_pasada(self):
+        """
+        Evaluar todas las reglas registradas y los agregados de estadísticas
+        en un único recorrido de la tabla, ordenado por numeroCuenta
+        """
+        motor = MotorValidacion()
+        consulta = f"SELECT {', '.join(COLUMNAS)} FROM cuentas WHERE 1 = 1 {{keyset}}"
+        muestras = {}
+        
+        for fila in self._iterar_lotes(consulta, CLAVES_RECORRIDO):
+            self._registrar_hallazgos(motor.procesar(fila), muestras)
+        self._registrar_hallazgos(motor.finalizar(), muestras)
         
-        return len(resultados)
+        self._imprimir_muestras(motor, muestras)
+        self.estadisticas = motor.estadisticas
+        return self.estadisticas
     
-    def verificar_cuentas_huerfanas(self):
+    def _registrar_hallazgos(self, hallazgos, muestras):
+        """Registrar hallazgos del motor guardando las primeras muestras por tipo"""
+        for hallazgo in hallazgos:
+            self._registrar_inconsistencia(hallazgo)
+            lista = muestras.setdefault(hallazgo["tipo"], [])
+            if len(lista) < MAX_MUESTRAS_CONSOLA:
+                lista.append(hallazgo)
+    
+    def verificar_cadena_auditoria(self):
         """
-        Detectar cuentas que referencian socios inexistentes
-        (solo si tienes tabla de socios)
+        Recorrer las filas ACTUALIZACION_SALDO de auditoria_cuentas por
+        (cuenta_id, fecha, id), con el índice idx_auditoria_cuenta_fecha, y
+        reconstruir la cadena 'Saldo actualizado de X a Y' de cada cuenta:
+        - AUDITORIA_CADENA_ROTA: el X de una fila no es el Y de la anterior
+          (filas de auditoría perdidas o cambios de saldo que no pasaron por
+          el trigger)
+        - AUDITORIA_SALDO_FINAL: el último Y no es el saldo actual de la cuenta
+        Memoria acotada: una página de auditoría y los finales de cadena
+        pendientes, que se comparan con cuentas.saldo en lotes de tamano_lote.
         """
-        # Esta query asume que tienes tabla 'socios'
-        # Si no la tienes, comenta esta función
-        query = """
-        SELECT c.id, c.numeroCuenta, c.socioId
-        FROM cuentas c
-        LEFT JOIN socios s ON c.socioId = s.id
-        WHERE s.id IS NULL AND c.activo = 1
+        consulta = """
+        SELECT id, cuenta_id, fecha, descripcion
+        FROM auditoria_cuentas
+        WHERE accion = 'ACTUALIZACION_SALDO' AND cuenta_id IS NOT NULL {keyset}
+        """
+        muestras = {}
+        finales = {}
+        cuenta_actual, hasta_anterior, ultima_fila = None, None, None
+        filas = cadenas = 0
+        
+        for pagina in self._iterar_paginas(consulta, ("cuenta_id", "fecha", "id")):
+            for fila in pagina:
+                filas += 1
+                if fila['cuenta_id'] != cuenta_actual:
+                    if cuenta_actual is not None:
+                        finales[cuenta_actual] = (hasta_anterior, ultima_fila)
+                    cuenta_actual, hasta_anterior = fila['cuenta_id'], None
+                    cadenas += 1
+                
+                coincidencia = PATRON_AUDITORIA_SALDO.match(fila['descripcion'] or "")
+                if not coincidencia:
+                    self._registrar_hallazgos([{
+                        "tipo": "AUDITORIA_ILEGIBLE",
+                        "cuenta_id": fila['cuenta_id'],
+                        "auditoria_id": fila['id'],
+                        "descripcion": fila['descripcion']
+                    }], muestras)
+                    # La cadena sigue desde la próxima fila legible
+                    hasta_anterior = None
+                    continue
+                
+                desde, hasta = Decimal(coincidencia.group(1)), Decimal(coincidencia.group(2))
+                if hasta_anterior is not None and desde != hasta_anterior:
+                    self._registrar_hallazgos([{
+                        "tipo": "AUDITORIA_CADENA_ROTA",
+                        "cuenta_id": fila['cuenta_id'],
+                        "auditoria_id": fila['id'],
+                        "fecha": fila['fecha'].isoformat(),
+                        "saldo_anterior": float(hasta_anterior),
+                        "saldo_desde": float(desde),
+                        "diferencia": float(desde - hasta_anterior)
+                    }], muestras)
+                hasta_anterior, ultima_fila = hasta, fila
+            
+            if len(finales) >= self.tamano_lote:
+                self._verificar_finales_auditoria(finales, muestras)
+        
+        if cuenta_actual is not None:
+            finales[cuenta_actual] = (hasta_anterior, ultima_fila)
+        self._verificar_finales_auditoria(finales, muestras)
+        
+        print(f"\nAuditoría: {filas} cambios de saldo en {cadenas} cuentas")
+        for tipo, titulo in TITULOS_AUDITORIA.items():
+            total = self.conteo_por_tipo.get(tipo, 0)
+            if not total:
+                continue
+            print(f"\n⚠️  {titulo}:")
+            for hallazgo in muestras[tipo]:
+                print(f"  - {self._describir_hallazgo_auditoria(hallazgo)}")
+            if total > MAX_MUESTRAS_CONSOLA:
+                print(f"  ... y {total - MAX_MUESTRAS_CONSOLA} más")
+            print(f"  Total: {total}")
+        if not any(self.conteo_por_tipo.get(tipo) for tipo in TITULOS_AUDITORIA):
+            print("\n✅ Cadenas de auditoría consistentes con los saldos actuales")
+        return filas
+    
+    def _verificar_finales_auditoria(self, finales, muestras):
+        """Comparar el último saldo auditado de cada cuenta con cuentas.saldo y vaciar 'finales'"""
+        pendientes = {cuenta_id: final for cuenta_id, final in finales.items() if final[0] is not None}
+        finales.clear()
+        if not pendientes:
+            return
+        marcadores = ", ".join(["%s"] * len(pendientes))
+        self.cursor.execute(
+            f"SELECT id, saldo FROM cuentas WHERE id IN ({marcadores})", tuple(pendientes)
+        )
+        for cuenta in self.cursor.fetchall():
+            hasta, fila = pendientes[cuenta['id']]
+            if cuenta['saldo'] != hasta:
+                self._registrar_hallazgos([{
+                    "tipo": "AUDITORIA_SALDO_FINAL",
+                    "cuenta_id": cuenta['id'],
+                    "auditoria_id": fila['id'],
+                    "saldo_auditado": float(hasta),
+                    "saldo_actual": float(cuenta['saldo']),
+                    "diferencia": float(cuenta['saldo'] - hasta)
+                }], muestras)
+    
+    @staticmethod
+    def _describir_hallazgo_auditoria(hallazgo):
+        if hallazgo["tipo"] == "AUDITORIA_ILEGIBLE":
+            return f"Cuenta {hallazgo['cuenta_id']}: auditoría #{hallazgo['auditoria_id']} = {hallazgo['descripcion']!r}"
+        if hallazgo["tipo"] == "AUDITORIA_CADENA_ROTA":
+            return (f"Cuenta {hallazgo['cuenta_id']}: auditoría #{hallazgo['auditoria_id']} parte de "
+                    f"{hallazgo['saldo_desde']} pero la anterior dejó {hallazgo['saldo_anterior']}")
+        return (f"Cuenta {hallazgo['cuenta_id']}: auditoría termina en {hallazgo['saldo_auditado']}, "
+                f"saldo actual {hallazgo['saldo_actual']}")
+    
+    def calcular_shards(self):
+        """
+        Partir la tabla en rangos [desde, hasta) de numeroCuenta de unas
+        tamano_shard filas. Los límites se leen del índice de numeroCuenta
+        saltando tamano_shard entradas desde el límite anterior, así que
+        todas las filas con el mismo número quedan en el mismo shard.
+        """
+        limites = []
+        while True:
+            if limites:
+                self.cursor.execute(
+                    "SELECT numeroCuenta FROM cuentas WHERE numeroCuenta > %s "
+                    "ORDER BY numeroCuenta LIMIT 1 OFFSET %s",
+                    (limites[-1], self.tamano_shard - 1)
+                )
+            else:
+                self.cursor.execute(
+                    "SELECT numeroCuenta FROM cuentas ORDER BY numeroCuenta LIMIT 1 OFFSET %s",
+                    (self.tamano_shard,)
+                )
+            fila = self.cursor.fetchone()
+            if fila is None:
+                break
+            limites.append(fila['numeroCuenta'])
+        
+        bordes = [None] + limites + [None]
+        return list(zip(bordes[:-1], bordes[1:]))
+    
+    def _validar_shard(self, pool, desde, hasta):
+        """
+        Recorrer un rango de numeroCuenta con una conexión del pool.
+        Devuelve (hallazgos, archivo, conteo, muestras, estadisticas): en modo
+        streaming los hallazgos van a un JSONL temporal propio del shard
+        ('archivo') y en memoria solo quedan su conteo por tipo y las primeras
+        muestras; si no, 'hallazgos' los trae todos.
         """
+        condiciones, params = ["1 = 1"], []
+        if desde is not None:
+            condiciones.append("numeroCuenta >= %s")
+            params.append(desde)
+        if hasta is not None:
+            condiciones.append("numeroCuenta < %s")
+            params.append(hasta)
+        consulta = f"SELECT {', '.join(COLUMNAS)} FROM cuentas " \
+                   f"WHERE {' AND '.join(condiciones)} {{keyset}}"
         
+        motor = MotorValidacion()
+        hallazgos, conteo, muestras = [], {}, {}
+        escritor = None
+        if self.streaming:
+            escritor = tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", prefix="validacion_shard_", suffix=".jsonl", delete=False
+            )
+        
+        def guardar(nuevos):
+            if escritor is None:
+                hallazgos.extend(nuevos)
+                return
+            for hallazgo in nuevos:
+                escritor.write(json.dumps(hallazgo, ensure_ascii=False) + "\n")
+                conteo[hallazgo["tipo"]] = conteo.get(hallazgo["tipo"], 0) + 1
+                lista = muestras.setdefault(hallazgo["tipo"], [])
+                if len(lista) < MAX_MUESTRAS_CONSOLA:
+                    lista.append(hallazgo)
+        
+        conexion = pool.get_connection()
         try:
-            self.cursor.execute(query)
-            resultados = self.cursor.fetchall()
+            cursor = conexion.cursor(dictionary=True)
+            for fila in self._iterar_lotes(consulta, CLAVES_RECORRIDO, params, cursor):
+                guardar(motor.procesar(fila))
+            guardar(motor.finalizar())
+            cursor.close()
+        except BaseException:
+            if escritor is not None:
+                escritor.close()
+                os.remove(escritor.name)
+            raise
+        finally:
+            conexion.close()  # devuelve la conexión al pool
+        
+        if escritor is None:
+            return hallazgos, None, None, None, motor.estadisticas
+        escritor.close()
+        return None, escritor.name, conteo, muestras, motor.estadisticas
+    
+    def _combinar_shard(self, resultado, muestras):
+        """Sumar al reporte el resultado de un shard, en el orden de los shards"""
+        hallazgos, archivo, conteo, muestras_shard, estadisticas = resultado
+        if archivo is None:
+            self._registrar_hallazgos(hallazgos, muestras)
+        else:
+            try:
+                for tipo, total in conteo.items():
+                    self.conteo_por_tipo[tipo] = self.conteo_por_tipo.get(tipo, 0) + total
+                    self.total_inconsistencias += total
+                for tipo, lista in muestras_shard.items():
+                    destino = muestras.setdefault(tipo, [])
+                    destino.extend(lista[:MAX_MUESTRAS_CONSOLA - len(destino)])
+                if conteo:
+                    with open(archivo, encoding="utf-8") as origen:
+                        shutil.copyfileobj(origen, self._abrir_detalles())
+            finally:
+                os.remove(archivo)
+        combinar_estadisticas(self.estadisticas, estadisticas)
+    
+    def validar_en_paralelo(self):
+        """
+        Ejecutar el motor de una pasada repartido en shards sobre un pool de
+        hilos y conexiones. Como mucho hay 'workers' shards en vuelo: cada uno
+        nuevo se envía cuando se combina el más antiguo, y los resultados se
+        combinan en el orden de los shards, así que coinciden exactamente con
+        el recorrido serial
+        """
+        shards = self.calcular_shards()
+        workers = min(self.workers, len(shards), mysql.connector.pooling.CNX_POOL_MAXSIZE)
+        print(f"\nValidación paralela: {len(shards)} shards, {workers} workers")
+        
+        pool = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="validador_shards",
+            pool_size=workers,
+            **self.db_config
+        )
+        motor = MotorValidacion()
+        muestras = {}
+        self.estadisticas = estadisticas_vacias()
+        pendientes = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for shard in shards:
+                    if len(pendientes) == workers:
+                        self._combinar_shard(pendientes.popleft().result(), muestras)
+                    pendientes.append(executor.submit(self._validar_shard, pool, *shard))
+                while pendientes:
+                    self._combinar_shard(pendientes.popleft().result(), muestras)
+            finally:
+                # Si un shard falla, descartar los JSONL temporales de los demás
+                for futuro in pendientes:
+                    futuro.cancel()
+                for futuro in pendientes:
+                    if not futuro.cancelled() and futuro.exception() is None:
+                        archivo = futuro.result()[1]
+                        if archivo is not None:
+                            os.remove(archivo)
+        
+        self._imprimir_muestras(motor, muestras)
+        return self.estadisticas
+    
+    def validar_incremental(self):
+        """
+        Revisar solo las cuentas con fecha_actualizacion desde la marca de agua
+        del checkpoint y corregir los agregados guardados: a cada fila se le
+        resta la contribución que tenía en la instantánea y se suma la actual.
+        La comparación es >= para no perder filas actualizadas en el mismo
+        segundo que la marca, y la marca se guarda margen_marca_agua segundos
+        antes de la última fila vista para recoger las transacciones que
+        confirman tarde; reprocesar filas no altera los agregados.
+        Los duplicados abiertos se guardan en el checkpoint y se vuelven a
+        comprobar en cada ejecución, así que también se cierran cuando lo que
+        cambia es la otra fila del par.
+        """
+        checkpoint = CheckpointValidacion(self.ruta_checkpoint)
+        try:
+            desde = None if self.completo else checkpoint.marca_agua
+            if desde is None:
+                checkpoint.reiniciar()
+                print("\nValidación incremental: reconstrucción completa")
+            else:
+                print(f"\nValidación incremental: cambios desde {desde.isoformat()}")
+            
+            agregados = checkpoint.agregados
+            motor = MotorValidacion()
+            muestras = {}
+            numeros_reportados = set()
+            marca_agua = None
+            revisadas = 0
             
-            if resultados:
-                print(f"\n⚠️  CUENTAS HUÉRFANAS (socio inexistente): {len(resultados)}")
-                for cuenta in resultados:
-                    inconsistencia = {
-                        "tipo": "SOCIO_INEXISTENTE",
-                        "cuenta_id": cuenta['id'],
-                        "numero_cuenta": cuenta['numeroCuenta'],
-                        "socio_id": cuenta['socioId']
-                    }
-                    self.inconsistencias.append(inconsistencia)
-                    print(f"  - Cuenta {cuenta['numeroCuenta']}: SocioID={cuenta['socioId']} no existe")
+            consulta = f"SELECT {', '.join(COLUMNAS)}, fecha_actualizacion FROM cuentas " \
+                       f"WHERE {'1 = 1' if desde is None else 'fecha_actualizacion >= %s'} {{keyset}}"
+            params = () if desde is None else (desde,)
+            for pagina in self._iterar_paginas(consulta, ("fecha_actualizacion", "id"), params):
+                anteriores = checkpoint.anteriores(fila['id'] for fila in pagina)
+                instantanea = []
+                for fila in pagina:
+                    hallazgos = [h for h in (r.evaluar(fila) for r in motor.reglas_fila) if h]
+                    self._registrar_hallazgos(hallazgos, muestras)
+                    tipos = [h["tipo"] for h in hallazgos]
+                    
+                    anterior = anteriores.get(fila['id'])
+                    if anterior is not None:
+                        _sumar_contribucion(agregados, *anterior, signo=-1)
+                    _sumar_contribucion(agregados, fila['estado'], fila['activo'], fila['saldo'], tipos)
+                    instantanea.append((fila['id'], fila['estado'], fila['activo'], fila['saldo'], tipos))
+                
+                checkpoint.guardar_filas(instantanea)
+                self._verificar_duplicados_de(
+                    {f['numeroCuenta'] for f in pagina if f['activo'] == 1} - numeros_reportados,
+                    numeros_reportados, muestras
+                )
+                revisadas += len(pagina)
+                marca_agua = pagina[-1]['fecha_actualizacion']
+            
+            self._verificar_duplicados_de(
+                checkpoint.duplicados - numeros_reportados, numeros_reportados, muestras
+            )
+            checkpoint.duplicados = numeros_reportados
+            if numeros_reportados:
+                agregados["abiertas_por_tipo"]["NUMERO_DUPLICADO"] = len(numeros_reportados)
             else:
-                print("\n✅ No se encontraron cuentas huérfanas")
+                agregados["abiertas_por_tipo"].pop("NUMERO_DUPLICADO", None)
             
-            return len(resultados)
-        except Exception as e:
-            print(f"\n⚠️  No se pudo verificar cuentas huérfanas (tabla socios no existe?): {e}")
-            return 0
+            if marca_agua is not None:
+                marca_agua -= timedelta(seconds=self.margen_marca_agua)
+                # Sin filas nuevas la marca no debe retroceder en cada ejecución
+                checkpoint.marca_agua = marca_agua if desde is None else max(desde, marca_agua)
+            checkpoint.agregados = agregados
+            checkpoint.confirmar()
+        finally:
+            checkpoint.cerrar()
+        
+        print(f"Cuentas revisadas: {revisadas}")
+        self._imprimir_muestras(motor, muestras)
+        print("\nHallazgos abiertos en toda la tabla (según checkpoint):")
+        for tipo, total in agregados["abiertas_por_tipo"].items():
+            print(f"  - {tipo}: {total}")
+        
+        self.estadisticas = {clave: agregados[clave] for clave in ("total", "activas", "por_estado", "saldo_total")}
+        return self.estadisticas
+    
+    def _verificar_duplicados_de(self, numeros, numeros_reportados, muestras):
+        """Regla de duplicados limitada a los números de las filas cambiadas"""
+        if not numeros:
+            return
+        marcadores = ", ".join(["%s"] * len(numeros))
+        self.cursor.execute(f"""
+            SELECT numeroCuenta, COUNT(*) as total
+            FROM cuentas
+            WHERE activo = 1 AND numeroCuenta IN ({marcadores})
+            GROUP BY numeroCuenta
+            HAVING COUNT(*) > 1
+        """, tuple(numeros))
+        for item in self.cursor.fetchall():
+            numeros_reportados.add(item['numeroCuenta'])
+            self._registrar_hallazgos([{
+                "tipo": "NUMERO_DUPLICADO",
+                "numero_cuenta": item['numeroCuenta'],
+                "total_duplicados": item['total']
+            }], muestras)
+    
+    def _imprimir_muestras(self, motor, muestras):
+        """Imprimir, por regla, los primeros hallazgos y el total"""
+        for regla in motor.reglas_fila + motor.reglas_grupo:
+            total = self.conteo_por_tipo.get(regla.tipo, 0)
+            if not total:
+                print(f"\n✅ Sin hallazgos de tipo {regla.tipo}")
+                continue
+            print(f"\n⚠️  {regla.titulo}:")
+            for hallazgo in muestras.get(regla.tipo, []):
+                print(f"  - {motor.describir(hallazgo)}")
+            if total > MAX_MUESTRAS_CONSOLA:
+                print(f"  ... y {total - MAX_MUESTRAS_CONSOLA} más")
+            print(f"  Total: {total}")
     
     def generar_estadisticas(self):
         """Generar estadísticas generales de la BD"""
-        print("\n" + "=" * 80)
-        print("ESTADÍSTICAS GENERALES")
-        print("=" * 80)
-        
         # Total de cuentas
         self.cursor.execute("SELECT COUNT(*) as total FROM cuentas")
         total = self.cursor.fetchone()['total']
-        print(f"Total de cuentas: {total}")
         
         # Cuentas activas
         self.cursor.execute("SELECT COUNT(*) as total FROM cuentas WHERE activo = 1")
         activas = self.cursor.fetchone()['total']
-        print(f"Cuentas activas: {activas}")
         
         # Cuentas por estado
         self.cursor.execute("""
@@ -182,48 +780,76 @@ class ValidadorInconsistencias:
             FROM cuentas
             GROUP BY estado
         """)
-        por_estado = self.cursor.fetchall()
-        print("\nCuentas por estado:")
-        for item in por_estado:
-            print(f"  - {item['estado']}: {item['total']}")
+        por_estado = {item['estado']: item['total'] for item in self.cursor.fetchall()}
         
         # Saldo total
         self.cursor.execute("SELECT SUM(saldo) as total FROM cuentas WHERE activo = 1")
-        saldo_total = self.cursor.fetchone()['total'] or 0
-        print(f"\nSaldo total en el sistema: ${saldo_total:,.2f}")
+        saldo_total = Decimal(self.cursor.fetchone()['total'] or 0)
+        
+        self.estadisticas = {
+            "total": total,
+            "activas": activas,
+            "por_estado": por_estado,
+            "saldo_total": saldo_total
+        }
+        self.imprimir_estadisticas()
+        return self.estadisticas
+    
+    def imprimir_estadisticas(self):
+        """Imprimir las estadísticas calculadas (por consultas o por el motor)"""
+        est = self.estadisticas
+        print("\n" + "=" * 80)
+        print("ESTADÍSTICAS GENERALES")
+        print("=" * 80)
+        print(f"Total de cuentas: {est['total']}")
+        print(f"Cuentas activas: {est['activas']}")
+        
+        print("\nCuentas por estado:")
+        for estado, total in est['por_estado'].items():
+            print(f"  - {estado}: {total}")
+        
+        print(f"\nSaldo total en el sistema: ${est['saldo_total']:,.2f}")
         
         # Saldo promedio
-        if activas > 0:
-            promedio = float(saldo_total) / activas
+        if est['activas'] > 0:
+            promedio = float(est['saldo_total']) / est['activas']
             print(f"Saldo promedio por cuenta: ${promedio:,.2f}")
     
     def guardar_reporte(self):
-        """Guardar reporte JSON con todas las inconsistencias"""
-        import os
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("locust/reportes", exist_ok=True)
-        filename = f"locust/reportes/validacion_bd_{timestamp}.json"
+        """
+        Guardar reporte JSON con todas las inconsistencias.
+        En modo streaming los detalles ya están en el archivo JSONL y el JSON
+        solo lleva el resumen y la ruta de ese archivo.
+        """
+        os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+        filename = f"{DIRECTORIO_REPORTES}/validacion_bd_{self.marca_tiempo}.json"
         
         reporte = {
             "timestamp": datetime.now().isoformat(),
-            "total_inconsistencias": len(self.inconsistencias),
-            "inconsistencias_por_tipo": {},
-            "detalles": self.inconsistencias
+            "total_inconsistencias": self.total_inconsistencias,
+            "inconsistencias_por_tipo": dict(self.conteo_por_tipo)
         }
         
-        # Contar por tipo
-        for inc in self.inconsistencias:
-            tipo = inc["tipo"]
-            reporte["inconsistencias_por_tipo"][tipo] = \
-                reporte["inconsistencias_por_tipo"].get(tipo, 0) + 1
+        if self.streaming:
+            self._cerrar_detalles()
+            reporte["detalles_archivo"] = self.archivo_detalles
+        else:
+            reporte["detalles"] = self.inconsistencias
         
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(reporte, f, indent=2, ensure_ascii=False)
         
         print(f"\n✅ Reporte guardado en: {filename}")
+        if self.streaming:
+            print(f"✅ Detalles (JSONL) en: {self.archivo_detalles}")
         return filename
     
+    def _cerrar_detalles(self):
+        """Cerrar el archivo JSONL de detalles si está abierto"""
+        if self._escritor_detalles is not None:
+            self._escritor_detalles.close()
+            self._escritor_detalles = None
+    
     def ejecutar_validacion_completa(self):
         """Ejecutar todas las validaciones"""
         print("=" * 80)
@@ -235,31 +861,42 @@ class ValidadorInconsistencias:
             return False
         
         try:
-            # Ejecutar todas las verificaciones
-            self.verificar_saldos_negativos()
-            self.verificar_estado_inconsistente()
-            self.verificar_numeros_duplicados()
-            # self.verificar_cuentas_huerfanas()  # Descomentar si tienes tabla socios
+            if self.incremental:
+                # Solo cuentas cambiadas desde el último checkpoint
+                self.validar_incremental()
+                self.imprimir_estadisticas()
+            elif self.paralelo:
+                # Recorrido de una pasada repartido en shards
+                self.validar_en_paralelo()
+                self.imprimir_estadisticas()
+            elif self.una_pasada:
+                # Verificaciones y estadísticas en un solo recorrido
+                self.validar_en_una_pasada()
+                self.imprimir_estadisticas()
+            else:
+                # Ejecutar todas las verificaciones
+                self.verificar_saldos_negativos()
+                self.verificar_estado_inconsistente()
+                self.verificar_numeros_duplicados()
+                
+                # Estadísticas
+                self.generar_estadisticas()
             
-            # Estadísticas
-            self.generar_estadisticas()
+            if self.huerfanas:
+                self.verificar_cuentas_huerfanas()
+            if self.auditoria:
+                self.verificar_cadena_auditoria()
             
             # Resumen
             print("\n" + "=" * 80)
             print("RESUMEN")
             print("=" * 80)
             
-            if self.inconsistencias:
-                print(f"❌ Se encontraron {len(self.inconsistencias)} inconsistencias")
-                
-                # Agrupar por tipo
-                por_tipo = {}
-                for inc in self.inconsistencias:
-                    tipo = inc["tipo"]
-                    por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
+            if self.total_inconsistencias:
+                print(f"❌ Se encontraron {self.total_inconsistencias} inconsistencias")
                 
                 print("\nPor tipo:")
-                for tipo, cantidad in por_tipo.items():
+                for tipo, cantidad in self.conteo_por_tipo.items():
                     print(f"  - {tipo}: {cantidad}")
                 
                 # Guardar reporte
@@ -276,6 +913,7 @@ class ValidadorInconsistencias:
             return False
         
         finally:
+            self._cerrar_detalles()
             if self.cursor:
                 self.cursor.close()
             if self.conexion:
@@ -283,7 +921,57 @@ class ValidadorInconsistencias:
             print("\n✅ Conexión cerrada")
 
 
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description="Validación de inconsistencias en la BD de cuentas")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Escribir los hallazgos uno a uno en un reporte JSONL (memoria acotada)")
+    parser.add_argument("--gzip", action="store_true",
+                        help="Comprimir el reporte JSONL (solo con --streaming)")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE,
+                        help=f"Filas por página en la paginación keyset (por defecto {TAMANO_LOTE})")
+    parser.add_argument("--una-pasada", action="store_true",
+                        help="Evaluar verificaciones y estadísticas en un único recorrido de la tabla")
+    parser.add_argument("--paralelo", action="store_true",
+                        help="Repartir el recorrido de una pasada en shards ejecutados en paralelo")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"Hilos y conexiones del pool en modo paralelo (por defecto {WORKERS})")
+    parser.add_argument("--tamano-shard", type=int, default=TAMANO_SHARD,
+                        help=f"Filas aproximadas por shard (por defecto {TAMANO_SHARD})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Revisar solo las cuentas actualizadas desde el último checkpoint")
+    parser.add_argument("--full", action="store_true",
+                        help="Con --incremental, descartar el checkpoint y reconstruirlo completo")
+    parser.add_argument("--checkpoint", default=RUTA_CHECKPOINT,
+                        help=f"Archivo del checkpoint incremental (por defecto {RUTA_CHECKPOINT})")
+    parser.add_argument("--margen-marca-agua", type=float, default=MARGEN_MARCA_AGUA,
+                        help="Segundos que se retrocede la marca de agua guardada, para transacciones "
+                             f"que confirman tarde (por defecto {MARGEN_MARCA_AGUA})")
+    parser.add_argument("--auditoria", action="store_true",
+                        help="Verificar la cadena de saldos de auditoria_cuentas contra cuentas.saldo")
+    parser.add_argument("--huerfanas", action="store_true",
+                        help="Buscar cuentas cuyo socio no existe en la base de socios (PostgreSQL)")
+    parser.add_argument("--socios-archivo",
+                        help="Leer los ids de socios de un archivo (uno por línea, .gz opcional) en lugar de PostgreSQL")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    validador = ValidadorInconsistencias()
+    args = parsear_argumentos()
+    validador = ValidadorInconsistencias(
+        streaming=args.streaming,
+        comprimir=args.gzip,
+        tamano_lote=args.tamano_lote,
+        una_pasada=args.una_pasada,
+        paralelo=args.paralelo,
+        workers=args.workers,
+        tamano_shard=args.tamano_shard,
+        incremental=args.incremental,
+        completo=args.full,
+        ruta_checkpoint=args.checkpoint,
+        margen_marca_agua=args.margen_marca_agua,
+        auditoria=args.auditoria,
+        huerfanas=args.huerfanas,
+        socios_archivo=args.socios_archivo
+    )
     exito = validador.ejecutar_validacion_completa()
     sys.exit(0 if exito else 1)
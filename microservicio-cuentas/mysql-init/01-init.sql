@@ -24,11 +24,13 @@ CREATE TABLE IF NOT EXISTS cuentas (
     INDEX idx_cuentas_socio_id (socio_id),
     INDEX idx_cuentas_numero (numero_cuenta),
     INDEX idx_cuentas_activo (activo),
-    INDEX idx_cuentas_estado (estado)
+    INDEX idx_cuentas_estado (estado),
+    INDEX idx_cuentas_fecha_actualizacion (fecha_actualizacion),
+    INDEX idx_cuentas_listado (activo, estado, fecha_creacion, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Insertar datos de prueba
-INSERT IGNORE INTO cuentas (id, socio_id, numero_cuentas, saldo, estado, tipo_cuenta) VALUES
+INSERT IGNORE INTO cuentas (id, socio_id, numero_cuenta, saldo, estado, tipo_cuenta) VALUES
 ('550e8400-e29b-41d4-a716-446655440000', '123e4567-e89b-12d3-a456-426614174000', '001-100000001', 5000.00, 'ACTIVA', 'AHORRO'),
 ('550e8400-e29b-41d4-a716-446655440001', '123e4567-e89b-12d3-a456-426614174001', '001-100000002', 15000.00, 'ACTIVA', 'CORRIENTE'),
 ('550e8400-e29b-41d4-a716-446655440002', '123e4567-e89b-12d3-a456-426614174002', '001-100000003', 2500.00, 'SUSPENDIDA', 'AHORRO'),
@@ -43,6 +45,7 @@ CREATE TABLE IF NOT EXISTS auditoria_cuentas (
     usuario VARCHAR(100),
     ip_address VARCHAR(45),
     fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_auditoria_cuenta_fecha (cuenta_id, fecha, id),
     FOREIGN KEY (cuenta_id) REFERENCES cuentas(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -1,7 +1,7 @@
 USE cooperativa_cuentas;
 
 -- Más datos de prueba para simulaciones
-INSERT IGNORE INTO cuentas (id, socio_id, numero_cuentas, saldo, estado, tipo_cuenta, activo) VALUES
+INSERT IGNORE INTO cuentas (id, socio_id, numero_cuenta, saldo, estado, tipo_cuenta, activo) VALUES
 ('550e8400-e29b-41d4-a716-446655440100', '00000000-0000-0000-0000-000000000000', '001-999999999', 1000.00, 'ACTIVA', 'AHORRO', 1),
 ('550e8400-e29b-41d4-a716-446655440101', '11111111-1111-1111-1111-111111111111', '001-888888888', 5000.00, 'ACTIVA', 'CORRIENTE', 1),
 ('550e8400-e29b-41d4-a716-446655440102', '22222222-2222-2222-2222-222222222222', '001-777777777', 2000.00, 'CANCELADA', 'AHORRO', 0),
@@ -0,0 +1,93 @@
+import { CacheLru, crearCacheCuentas } from './cache-cuentas';
+
+describe('CacheLru', () => {
+  let ahora: number;
+  const reloj = () => ahora;
+
+  beforeEach(() => {
+    ahora = 0;
+  });
+
+  it('debería cargar una vez y responder desde la caché', async () => {
+    const cache = new CacheLru<number>(10, 1000, reloj);
+    const cargar = jest.fn().mockResolvedValue(42);
+
+    expect(await cache.obtener('a', cargar)).toBe(42);
+    expect(await cache.obtener('a', cargar)).toBe(42);
+
+    expect(cargar).toHaveBeenCalledTimes(1);
+    expect(cache.estadisticas()).toMatchObject({ aciertos: 1, fallos: 1, tasaAciertos: 0.5 });
+  });
+
+  it('debería expirar las entradas después del TTL', async () => {
+    const cache = new CacheLru<number>(10, 1000, reloj);
+    const cargar = jest.fn().mockResolvedValueOnce(1).mockResolvedValueOnce(2);
+
+    await cache.obtener('a', cargar);
+    ahora = 1000;
+
+    expect(await cache.obtener('a', cargar)).toBe(2);
+    expect(cache.estadisticas().expiradas).toBe(1);
+  });
+
+  it('debería expulsar la entrada usada hace más tiempo', async () => {
+    const cache = new CacheLru<string>(2, 1000, reloj);
+    const cargar = (valor: string) => jest.fn().mockResolvedValue(valor);
+
+    await cache.obtener('a', cargar('a'));
+    await cache.obtener('b', cargar('b'));
+    await cache.obtener('a', cargar('a'));
+    await cache.obtener('c', cargar('c'));
+
+    const recargaB = cargar('b');
+    const recargaA = cargar('a');
+    await cache.obtener('b', recargaB);
+    expect(recargaB).toHaveBeenCalled();
+    expect(cache.estadisticas().expulsiones).toBe(2);
+    await cache.obtener('c', recargaA);
+    expect(recargaA).not.toHaveBeenCalled();
+  });
+
+  it('debería compartir una sola carga entre lecturas concurrentes', async () => {
+    const cache = new CacheLru<number>(10, 1000, reloj);
+    const cargar = jest.fn().mockResolvedValue(7);
+
+    const valores = await Promise.all([cache.obtener('a', cargar), cache.obtener('a', cargar)]);
+
+    expect(valores).toEqual([7, 7]);
+    expect(cargar).toHaveBeenCalledTimes(1);
+    expect(cache.estadisticas().coalescidas).toBe(1);
+  });
+
+  it('no debería guardar una carga que empezó antes de invalidar', async () => {
+    const cache = new CacheLru<number>(10, 1000, reloj);
+    let resolver: (valor: number) => void;
+    const lecturaVieja = cache.obtener('a', () => new Promise<number>((r) => (resolver = r)));
+
+    // Escritura confirmada mientras la lectura seguía en la base
+    cache.invalidar('a');
+    resolver(100);
+    expect(await lecturaVieja).toBe(100);
+
+    const cargar = jest.fn().mockResolvedValue(50);
+    expect(await cache.obtener('a', cargar)).toBe(50);
+    expect(cargar).toHaveBeenCalledTimes(1);
+    expect(cache.estadisticas().descartadas).toBe(1);
+  });
+
+  it('no debería guardar cargas fallidas', async () => {
+    const cache = new CacheLru<number>(10, 1000, reloj);
+
+    await expect(cache.obtener('a', () => Promise.reject(new Error('no existe')))).rejects.toThrow('no existe');
+
+    expect(cache.estadisticas().tamano).toBe(0);
+  });
+
+  it('debería estar desactivada salvo que se configure un tamaño', () => {
+    expect(crearCacheCuentas(undefined, undefined)).toBeNull();
+    expect(crearCacheCuentas('', '5000')).toBeNull();
+    expect(crearCacheCuentas('0', '5000')).toBeNull();
+    expect(crearCacheCuentas('10000', undefined)).toBeInstanceOf(CacheLru);
+    expect(() => crearCacheCuentas('mucho', '5000')).toThrow('Configuración de caché inválida');
+  });
+});
@@ -0,0 +1,139 @@
+// Token de inyección de la caché de lecturas (null si está desactivada)
+export const CACHE_CUENTAS = 'CACHE_CUENTAS';
+
+// Capacidad por defecto de CacheLru y TTL por defecto de CUENTAS_CACHE_TTL_MS.
+// Sin CUENTAS_CACHE_TAMANO la caché del servicio queda desactivada.
+export const CACHE_TAMANO = 10000;
+export const CACHE_TTL_MS = 5000;
+
+export interface EstadisticasCache {
+  tamano: number;
+  capacidad: number;
+  ttlMs: number;
+  aciertos: number;
+  fallos: number;
+  coalescidas: number;
+  expulsiones: number;
+  expiradas: number;
+  invalidaciones: number;
+  descartadas: number;
+  tasaAciertos: number;
+}
+
+interface Entrada<V> {
+  valor: V;
+  expira: number;
+}
+
+/**
+ * Caché LRU + TTL de lectura a través (read-through). El orden de inserción
+ * del Map es el orden de uso: un acierto reinserta la clave al final y la
+ * primera es la que se expulsa.
+ *
+ * Las cargas concurrentes de una misma clave comparten una sola consulta.
+ * invalidar() descarta además la carga en curso, así una lectura que empezó
+ * antes de una escritura no guarda el valor viejo cuando termina.
+ */
+export class CacheLru<V> {
+  private readonly entradas = new Map<string, Entrada<V>>();
+  private readonly enCurso = new Map<string, Promise<V>>();
+
+  private aciertos = 0;
+  private fallos = 0;
+  private coalescidas = 0;
+  private expulsiones = 0;
+  private expiradas = 0;
+  private invalidaciones = 0;
+  private descartadas = 0;
+
+  constructor(
+    readonly capacidad: number = CACHE_TAMANO,
+    readonly ttlMs: number = CACHE_TTL_MS,
+    private readonly ahora: () => number = Date.now,
+  ) {}
+
+  async obtener(clave: string, cargar: () => Promise<V>): Promise<V> {
+    const entrada = this.entradas.get(clave);
+    if (entrada) {
+      this.entradas.delete(clave);
+      if (entrada.expira > this.ahora()) {
+        this.entradas.set(clave, entrada);
+        this.aciertos++;
+        return entrada.valor;
+      }
+      this.expiradas++;
+    }
+
+    this.fallos++;
+    const pendiente = this.enCurso.get(clave);
+    if (pendiente) {
+      this.coalescidas++;
+      return pendiente;
+    }
+
+    const carga = cargar();
+    this.enCurso.set(clave, carga);
+    try {
+      const valor = await carga;
+      if (this.enCurso.get(clave) === carga) {
+        this.guardar(clave, valor);
+      } else {
+        // Invalidada mientras se cargaba: el valor puede ser anterior a la escritura
+        this.descartadas++;
+      }
+      return valor;
+    } finally {
+      if (this.enCurso.get(clave) === carga) {
+        this.enCurso.delete(clave);
+      }
+    }
+  }
+
+  invalidar(...claves: string[]): void {
+    for (const clave of claves) {
+      this.entradas.delete(clave);
+      this.enCurso.delete(clave);
+      this.invalidaciones++;
+    }
+  }
+
+  estadisticas(): EstadisticasCache {
+    const lecturas = this.aciertos + this.fallos;
+    return {
+      tamano: this.entradas.size,
+      capacidad: this.capacidad,
+      ttlMs: this.ttlMs,
+      aciertos: this.aciertos,
+      fallos: this.fallos,
+      coalescidas: this.coalescidas,
+      expulsiones: this.expulsiones,
+      expiradas: this.expiradas,
+      invalidaciones: this.invalidaciones,
+      descartadas: this.descartadas,
+      tasaAciertos: lecturas ? Math.round((this.aciertos / lecturas) * 10000) / 10000 : 0,
+    };
+  }
+
+  private guardar(clave: string, valor: V): void {
+    this.entradas.set(clave, { valor, expira: this.ahora() + this.ttlMs });
+    if (this.entradas.size > this.capacidad) {
+      this.entradas.delete(this.entradas.keys().next().value);
+      this.expulsiones++;
+    }
+  }
+}
+
+/**
+ * Caché según CUENTAS_CACHE_TAMANO (entradas; sin definir o 0 = desactivada,
+ * como CUENTAS_MODO_SALDO que por defecto es legacy) y CUENTAS_CACHE_TTL_MS.
+ * Es por proceso: con varias réplicas se activa solo donde se acepte leer
+ * datos de hasta un TTL de antigüedad.
+ */
+export function crearCacheCuentas<V>(tamano?: string, ttlMs?: string): CacheLru<V> | null {
+  const capacidad = tamano === undefined || tamano === '' ? 0 : Number(tamano);
+  const ttl = ttlMs === undefined || ttlMs === '' ? CACHE_TTL_MS : Number(ttlMs);
+  if (!Number.isInteger(capacidad) || capacidad < 0 || !Number.isFinite(ttl) || ttl < 0) {
+    throw new Error(`Configuración de caché inválida: CUENTAS_CACHE_TAMANO=${tamano} CUENTAS_CACHE_TTL_MS=${ttlMs}`);
+  }
+  return capacidad && ttl ? new CacheLru<V>(capacidad, ttl) : null;
+}
@@ -1,4 +1,5 @@
 import { Test, TestingModule } from '@nestjs/testing';
+import { BadRequestException } from '@nestjs/common';
 import { CuentasController } from './cuentas.controller';
 import { CuentasService } from './cuentas.service';
 import { CuentaRequestDto } from './dto/cuenta-request.dto';
@@ -35,6 +36,9 @@ describe('CuentasController', () => {
     eliminarCuenta: jest.fn(),
     realizarRetiro: jest.fn(),
     realizarDeposito: jest.fn(),
+    realizarOperacionesLote: jest.fn(),
+    obtenerPaginaCuentas: jest.fn(),
+    estadisticasCache: jest.fn(),
   };
 
   beforeEach(async () => {
@@ -208,6 +212,93 @@ describe('CuentasController', () => {
     });
   });
 
+  describe('obtenerEstadisticasCache', () => {
+    it('debería devolver los contadores del servicio', () => {
+      const estadisticas = { habilitada: true, aciertos: 10, fallos: 2, tasaAciertos: 0.8333 };
+      mockCuentasService.estadisticasCache.mockReturnValue(estadisticas);
+
+      expect(controller.obtenerEstadisticasCache()).toEqual(estadisticas);
+    });
+  });
+
+  describe('obtenerPagina', () => {
+    it('debería pasar límite y cursor al servicio', async () => {
+      const pagina = { cuentas: [mockCuentaResponse], siguienteCursor: 'abc' };
+      mockCuentasService.obtenerPaginaCuentas.mockResolvedValue(pagina);
+
+      const result = await controller.obtenerPagina({ limite: 1, cursor: 'xyz' });
+
+      expect(service.obtenerPaginaCuentas).toHaveBeenCalledWith(1, 'xyz');
+      expect(result).toEqual(pagina);
+    });
+  });
+
+  describe('realizarOperacionesLote', () => {
+    it('debería delegar el lote completo al servicio', async () => {
+      const operaciones = [
+        { cuentaId: mockCuentaResponse.id, tipo: 'DEPOSITO' as const, monto: 100 },
+        { cuentaId: mockCuentaResponse.id, tipo: 'RETIRO' as const, monto: 50 },
+      ];
+      const respuesta = {
+        total: 2,
+        exitosas: 2,
+        fallidas: 0,
+        resultados: [
+          { indice: 0, ...operaciones[0], exito: true, saldo: 1100 },
+          { indice: 1, ...operaciones[1], exito: true, saldo: 1050 },
+        ],
+      };
+      mockCuentasService.realizarOperacionesLote.mockResolvedValue(respuesta);
+
+      const result = await controller.realizarOperacionesLote({ operaciones });
+
+      expect(service.realizarOperacionesLote).toHaveBeenCalledWith(operaciones);
+      expect(result).toEqual(respuesta);
+    });
+  });
+
+  describe('modo de saldo por cabecera', () => {
+    const respuesta = { setHeader: jest.fn() } as any;
+    const porCabeceraOriginal = process.env.CUENTAS_MODO_SALDO_POR_CABECERA;
+
+    afterEach(() => {
+      if (porCabeceraOriginal === undefined) {
+        delete process.env.CUENTAS_MODO_SALDO_POR_CABECERA;
+      } else {
+        process.env.CUENTAS_MODO_SALDO_POR_CABECERA = porCabeceraOriginal;
+      }
+    });
+
+    it('debería ignorar la cabecera si no está habilitada', async () => {
+      delete process.env.CUENTAS_MODO_SALDO_POR_CABECERA;
+      mockCuentasService.realizarRetiro.mockResolvedValue(mockCuentaResponse);
+
+      await controller.realizarRetiro(mockCuentaResponse.id, 100, 'atomico', respuesta);
+
+      expect(service.realizarRetiro).toHaveBeenCalledWith(mockCuentaResponse.id, 100);
+      expect(respuesta.setHeader).not.toHaveBeenCalled();
+    });
+
+    it('debería pasar el modo al servicio y devolverlo en la respuesta', async () => {
+      process.env.CUENTAS_MODO_SALDO_POR_CABECERA = 'true';
+      mockCuentasService.realizarDeposito.mockResolvedValue(mockCuentaResponse);
+
+      await controller.realizarDeposito(mockCuentaResponse.id, 100, 'pesimista', respuesta);
+
+      expect(service.realizarDeposito).toHaveBeenCalledWith(mockCuentaResponse.id, 100, 'pesimista');
+      expect(respuesta.setHeader).toHaveBeenCalledWith('X-Modo-Saldo', 'pesimista');
+    });
+
+    it('debería rechazar un modo desconocido', async () => {
+      process.env.CUENTAS_MODO_SALDO_POR_CABECERA = 'true';
+
+      await expect(
+        controller.realizarRetiro(mockCuentaResponse.id, 100, 'optimista', respuesta),
+      ).rejects.toThrow(BadRequestException);
+      expect(service.realizarRetiro).not.toHaveBeenCalled();
+    });
+  });
+
   describe('Integración de flujos completos', () => {
     it('debería manejar flujo completo: crear, depositar, retirar', async () => {
       // 1. Crear cuenta
@@ -7,15 +7,36 @@ import {
   Body, 
   Param, 
   HttpCode, 
-  HttpStatus 
+  HttpStatus,
+  Headers,
+  Res,
+  Query,
+  UseInterceptors
 } from '@nestjs/common';
-import { ApiTags, ApiOperation, ApiResponse, ApiParam } from '@nestjs/swagger';
+import { ApiTags, ApiOperation, ApiResponse, ApiParam, ApiHeader, ApiProduces } from '@nestjs/swagger';
+import { Response } from 'express';
+import { pipeline } from 'stream';
 import { CuentasService } from './cuentas.service';
 import { CuentaRequestDto } from './dto/cuenta-request.dto';
 import { CuentaResponseDto } from './dto/cuenta-response.dto';
+import { OperacionesLoteRequestDto } from './dto/operaciones-lote-request.dto';
+import { OperacionesLoteResponseDto } from './dto/operaciones-lote-response.dto';
+import { PaginaCuentasQueryDto } from './dto/pagina-cuentas-query.dto';
+import { CuentasPaginaResponseDto } from './dto/cuentas-pagina-response.dto';
+import { CABECERA_MODO_SALDO, MODOS_SALDO, modoSaldoSolicitado } from './modo-saldo';
+import { EstadisticasCache } from './cache-cuentas';
+import { ServerTimingInterceptor } from './server-timing';
+
+const DOC_CABECERA_MODO_SALDO = {
+  name: 'X-Modo-Saldo',
+  required: false,
+  enum: [...MODOS_SALDO],
+  description: 'Modo de actualización del saldo (solo con CUENTAS_MODO_SALDO_POR_CABECERA=true)',
+};
 
 @ApiTags('cuentas')
 @Controller('cuentas')
+@UseInterceptors(ServerTimingInterceptor)
 export class CuentasController {
   constructor(private readonly cuentasService: CuentasService) {}
 
@@ -44,6 +65,38 @@ export class CuentasController {
     return this.cuentasService.actualizarCuenta(id, request);
   }
 
+  @Get('cache/estadisticas')
+  @ApiOperation({ summary: 'Contadores de la caché de lecturas (aciertos, fallos, expulsiones)' })
+  obtenerEstadisticasCache(): EstadisticasCache & { habilitada: boolean } {
+    return this.cuentasService.estadisticasCache();
+  }
+
+  // Antes de GET :id, que si no captura 'pagina' y 'stream' como ID
+  @Get('pagina')
+  @ApiOperation({ summary: 'Obtener cuentas activas paginadas por cursor (keyset)' })
+  @ApiResponse({ 
+    status: 200, 
+    description: 'Página de cuentas y cursor de la siguiente',
+    type: CuentasPaginaResponseDto
+  })
+  @ApiResponse({ 
+    status: 400, 
+    description: 'Cursor o límite inválido' 
+  })
+  async obtenerPagina(@Query() query: PaginaCuentasQueryDto): Promise<CuentasPaginaResponseDto> {
+    return this.cuentasService.obtenerPaginaCuentas(query.limite, query.cursor);
+  }
+
+  @Get('stream')
+  @ApiOperation({ summary: 'Exportar las cuentas activas como NDJSON (una cuenta por línea)' })
+  @ApiProduces('application/x-ndjson')
+  async streamCuentas(@Res() respuesta: Response): Promise<void> {
+    const lineas = await this.cuentasService.streamCuentas();
+    respuesta.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+    // Si el cliente se desconecta, pipeline destruye el stream y el servicio libera la conexión
+    pipeline(lineas, respuesta, () => undefined);
+  }
+
   @Get(':id')
   @ApiOperation({ summary: 'Obtener cuenta por ID' })
   async obtenerCuenta(@Param('id') id: string): Promise<CuentaResponseDto> {
@@ -72,19 +125,49 @@ export class CuentasController {
 
   @Post(':id/retiro')
   @ApiOperation({ summary: 'Realizar retiro de cuenta' })
+  @ApiHeader(DOC_CABECERA_MODO_SALDO)
   async realizarRetiro(
     @Param('id') id: string,
     @Body('monto') monto: number,
+    @Headers(CABECERA_MODO_SALDO) cabeceraModo?: string,
+    @Res({ passthrough: true }) respuesta?: Response,
   ): Promise<CuentaResponseDto> {
-    return this.cuentasService.realizarRetiro(id, monto);
+    const modo = modoSaldoSolicitado(cabeceraModo);
+    if (!modo) {
+      return this.cuentasService.realizarRetiro(id, monto);
+    }
+    respuesta?.setHeader('X-Modo-Saldo', modo);
+    return this.cuentasService.realizarRetiro(id, monto, modo);
   }
 
   @Post(':id/deposito')
   @ApiOperation({ summary: 'Realizar depósito a cuenta' })
+  @ApiHeader(DOC_CABECERA_MODO_SALDO)
   async realizarDeposito(
     @Param('id') id: string,
     @Body('monto') monto: number,
+    @Headers(CABECERA_MODO_SALDO) cabeceraModo?: string,
+    @Res({ passthrough: true }) respuesta?: Response,
   ): Promise<CuentaResponseDto> {
-    return this.cuentasService.realizarDeposito(id, monto);
+    const modo = modoSaldoSolicitado(cabeceraModo);
+    if (!modo) {
+      return this.cuentasService.realizarDeposito(id, monto);
+    }
+    respuesta?.setHeader('X-Modo-Saldo', modo);
+    return this.cuentasService.realizarDeposito(id, monto, modo);
+  }
+
+  @Post('operaciones/lote')
+  @HttpCode(HttpStatus.OK)
+  @ApiOperation({ summary: 'Aplicar un lote de depósitos y retiros en una transacción' })
+  @ApiResponse({ 
+    status: 200, 
+    description: 'Resultado por movimiento (los rechazados no detienen al resto)',
+    type: OperacionesLoteResponseDto
+  })
+  async realizarOperacionesLote(
+    @Body() request: OperacionesLoteRequestDto,
+  ): Promise<OperacionesLoteResponseDto> {
+    return this.cuentasService.realizarOperacionesLote(request.operaciones);
   }
 }
\ No newline at end of file
@@ -3,13 +3,28 @@ import { TypeOrmModule } from '@nestjs/typeorm';
 import { CuentasController } from './cuentas.controller';
 import { CuentasService } from './cuentas.service';
 import { Cuenta } from './entities/cuenta.entity';
+import { MODO_SALDO, leerModoSaldo } from './modo-saldo';
+import { CACHE_CUENTAS, crearCacheCuentas } from './cache-cuentas';
+import { SuscriptorTiemposBd } from './server-timing';
 
 @Module({
   imports: [
     TypeOrmModule.forFeature([Cuenta]),
   ],
   controllers: [CuentasController],
-  providers: [CuentasService],
+  providers: [
+    CuentasService,
+    SuscriptorTiemposBd,
+    {
+      provide: MODO_SALDO,
+      useFactory: () => leerModoSaldo(process.env.CUENTAS_MODO_SALDO),
+    },
+    {
+      provide: CACHE_CUENTAS,
+      useFactory: () =>
+        crearCacheCuentas(process.env.CUENTAS_CACHE_TAMANO, process.env.CUENTAS_CACHE_TTL_MS),
+    },
+  ],
   exports: [CuentasService],
 })
 export class CuentasModule {}
\ No newline at end of file
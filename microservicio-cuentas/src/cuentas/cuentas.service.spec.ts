@@ -3,8 +3,11 @@ import { getRepositoryToken } from '@nestjs/typeorm';
 import { Repository } from 'typeorm';
 import { CuentasService } from './cuentas.service';
 import { Cuenta } from './entities/cuenta.entity';
-import { ConflictException, NotFoundException } from '@nestjs/common';
+import { BadRequestException, ConflictException, NotFoundException, Provider } from '@nestjs/common';
+import { Readable } from 'stream';
 import { CuentaRequestDto } from './dto/cuenta-request.dto';
+import { MODO_SALDO, ModoSaldo } from './modo-saldo';
+import { CACHE_CUENTAS, CacheLru } from './cache-cuentas';
 
 describe('CuentasService', () => {
   let service: CuentasService;
@@ -31,24 +34,41 @@ describe('CuentasService', () => {
     tipoCuenta: 'AHORRO',
   };
 
-  // Mock repository
+  // Mock repository (manager y createQueryBuilder los configura cada escenario que los usa)
   const mockRepository = {
     create: jest.fn(),
     save: jest.fn(),
     findOne: jest.fn(),
     find: jest.fn(),
+    createQueryBuilder: jest.fn(),
+    manager: {
+      transaction: jest.fn(),
+      connection: { createQueryRunner: jest.fn() },
+    },
   };
 
+  // Módulo de prueba con el repositorio simulado y, si se indican, el modo de saldo y la caché
+  async function crearModulo(
+    opciones: { modo?: ModoSaldo; cache?: CacheLru<unknown> } = {},
+  ): Promise<TestingModule> {
+    const providers: Provider[] = [
+      CuentasService,
+      {
+        provide: getRepositoryToken(Cuenta),
+        useValue: mockRepository,
+      },
+    ];
+    if (opciones.modo) {
+      providers.push({ provide: MODO_SALDO, useValue: opciones.modo });
+    }
+    if (opciones.cache) {
+      providers.push({ provide: CACHE_CUENTAS, useValue: opciones.cache });
+    }
+    return Test.createTestingModule({ providers }).compile();
+  }
+
   beforeEach(async () => {
-    const module: TestingModule = await Test.createTestingModule({
-      providers: [
-        CuentasService,
-        {
-          provide: getRepositoryToken(Cuenta),
-          useValue: mockRepository,
-        },
-      ],
-    }).compile();
+    const module = await crearModulo();
 
     service = module.get<CuentasService>(CuentasService);
     repository = module.get<Repository<Cuenta>>(getRepositoryToken(Cuenta));
@@ -499,4 +519,408 @@ describe('CuentasService', () => {
       expect(result.saldo).toBe(1000.50);
     });
   });
+
+  describe('modos de saldo', () => {
+    // UPDATE encadenado del query builder: update().set().where().setParameter().execute()
+    const mockUpdate = {
+      update: jest.fn().mockReturnThis(),
+      set: jest.fn().mockReturnThis(),
+      where: jest.fn().mockReturnThis(),
+      setParameter: jest.fn().mockReturnThis(),
+      execute: jest.fn(),
+    };
+
+    const mockManager = {
+      createQueryBuilder: jest.fn(() => mockUpdate),
+      findOne: jest.fn(),
+      save: jest.fn(),
+    };
+
+    const crearServicio = async (modo: ModoSaldo) =>
+      (await crearModulo({ modo })).get<CuentasService>(CuentasService);
+
+    beforeEach(() => {
+      mockRepository.manager.transaction.mockImplementation((trabajo) => trabajo(mockManager));
+    });
+
+    describe('atomico', () => {
+      let service: CuentasService;
+
+      beforeEach(async () => {
+        service = await crearServicio('atomico');
+      });
+
+      it('debería retirar con un UPDATE condicional sin leer antes', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 1 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '700.00' });
+
+        const result = await service.realizarRetiro(mockCuenta.id, 300);
+
+        expect(mockUpdate.where).toHaveBeenCalledWith(
+          expect.stringContaining('saldo >= :monto'),
+          expect.objectContaining({ id: mockCuenta.id, monto: 300 }),
+        );
+        expect(mockUpdate.setParameter).toHaveBeenCalledWith('delta', -300);
+        expect(mockRepository.findOne).not.toHaveBeenCalled();
+        expect(mockRepository.save).not.toHaveBeenCalled();
+        expect(result.saldo).toBe(700);
+      });
+
+      it('debería depositar sin condición de saldo', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 1 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '1500.00' });
+
+        const result = await service.realizarDeposito(mockCuenta.id, 500);
+
+        expect(mockUpdate.where).toHaveBeenCalledWith(
+          expect.not.stringContaining('saldo >='),
+          expect.anything(),
+        );
+        expect(mockUpdate.setParameter).toHaveBeenCalledWith('delta', 500);
+        expect(result.saldo).toBe(1500);
+      });
+
+      it('debería lanzar ConflictException si el UPDATE no afecta filas por saldo', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 0 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '100.00' });
+
+        await expect(service.realizarRetiro(mockCuenta.id, 300)).rejects.toThrow('Saldo insuficiente');
+      });
+
+      it('debería lanzar ConflictException si la cuenta no está activa', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 0 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, estado: 'SUSPENDIDA' });
+
+        await expect(service.realizarRetiro(mockCuenta.id, 300)).rejects.toThrow('La cuenta no está activa');
+      });
+
+      it('no debería devolver éxito si el depósito no afectó filas', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 0 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta });
+
+        await expect(service.realizarDeposito(mockCuenta.id, 100)).rejects.toThrow(ConflictException);
+      });
+
+      it('debería lanzar NotFoundException si la cuenta no existe o fue eliminada', async () => {
+        mockUpdate.execute.mockResolvedValue({ affected: 0 });
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, activo: false });
+
+        await expect(service.realizarDeposito(mockCuenta.id, 100)).rejects.toThrow(NotFoundException);
+
+        mockManager.findOne.mockResolvedValue(null);
+        await expect(service.realizarDeposito(mockCuenta.id, 100)).rejects.toThrow(NotFoundException);
+      });
+    });
+
+    describe('pesimista', () => {
+      let service: CuentasService;
+
+      beforeEach(async () => {
+        service = await crearServicio('pesimista');
+        mockManager.save.mockImplementation(async (cuenta) => cuenta);
+      });
+
+      it('debería bloquear la fila con FOR UPDATE dentro de la transacción', async () => {
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '1000.00' });
+
+        const result = await service.realizarRetiro(mockCuenta.id, 300);
+
+        expect(mockRepository.manager.transaction).toHaveBeenCalled();
+        expect(mockManager.findOne).toHaveBeenCalledWith(Cuenta, {
+          where: { id: mockCuenta.id, activo: true },
+          lock: { mode: 'pessimistic_write' },
+        });
+        expect(result.saldo).toBe(700);
+      });
+
+      it('debería sumar depósitos sobre el saldo DECIMAL devuelto como texto', async () => {
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '100.10' });
+
+        const result = await service.realizarDeposito(mockCuenta.id, 0.2);
+
+        expect(result.saldo).toBe(100.3);
+      });
+
+      it('debería lanzar ConflictException por saldo insuficiente sin guardar', async () => {
+        mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '100.00' });
+
+        await expect(service.realizarRetiro(mockCuenta.id, 300)).rejects.toThrow(ConflictException);
+        expect(mockManager.save).not.toHaveBeenCalled();
+      });
+
+      it('debería lanzar NotFoundException si la cuenta no existe', async () => {
+        mockManager.findOne.mockResolvedValue(null);
+
+        await expect(service.realizarRetiro(mockCuenta.id, 100)).rejects.toThrow(NotFoundException);
+      });
+    });
+
+    it('debería permitir elegir el modo por llamada', async () => {
+      const service = await crearServicio('legacy');
+      mockUpdate.execute.mockResolvedValue({ affected: 1 });
+      mockManager.findOne.mockResolvedValue({ ...mockCuenta, saldo: '1100.00' });
+
+      await service.realizarDeposito(mockCuenta.id, 100, 'atomico');
+
+      expect(mockRepository.findOne).not.toHaveBeenCalled();
+      expect(mockUpdate.execute).toHaveBeenCalled();
+    });
+  });
+
+  describe('operaciones en lote', () => {
+    const cuentaA = '123e4567-e89b-12d3-a456-42661417400a';
+    const cuentaB = '123e4567-e89b-12d3-a456-42661417400b';
+
+    // SELECT ... FOR UPDATE: createQueryBuilder(Cuenta, 'cuenta')...getMany()
+    const mockSelect = {
+      select: jest.fn().mockReturnThis(),
+      where: jest.fn().mockReturnThis(),
+      orderBy: jest.fn().mockReturnThis(),
+      setLock: jest.fn().mockReturnThis(),
+      getMany: jest.fn(),
+    };
+
+    // UPDATE con CASE: createQueryBuilder().update()...execute()
+    const mockUpdate = {
+      update: jest.fn().mockReturnThis(),
+      set: jest.fn().mockReturnThis(),
+      where: jest.fn().mockReturnThis(),
+      setParameters: jest.fn().mockReturnThis(),
+      execute: jest.fn().mockResolvedValue({ affected: 1 }),
+    };
+
+    const mockManager = {
+      createQueryBuilder: jest.fn((entidad?: unknown) => (entidad ? mockSelect : mockUpdate)),
+    };
+
+    beforeEach(() => {
+      mockRepository.manager.transaction.mockImplementation((trabajo) => trabajo(mockManager));
+    });
+
+    it('debería aplicar los movimientos en orden con un SELECT bloqueante y un UPDATE', async () => {
+      mockSelect.getMany.mockResolvedValue([
+        { id: cuentaA, saldo: '100.10', estado: 'ACTIVA', activo: true },
+        { id: cuentaB, saldo: '50.00', estado: 'ACTIVA', activo: true },
+      ]);
+
+      const result = await service.realizarOperacionesLote([
+        { cuentaId: cuentaA, tipo: 'DEPOSITO', monto: 0.2 },
+        { cuentaId: cuentaA, tipo: 'RETIRO', monto: 100.3 },
+        { cuentaId: cuentaB, tipo: 'RETIRO', monto: 20 },
+      ]);
+
+      expect(mockSelect.where).toHaveBeenCalledWith('cuenta.id IN (:...ids)', { ids: [cuentaA, cuentaB] });
+      expect(mockSelect.setLock).toHaveBeenCalledWith('pessimistic_write');
+      expect(mockUpdate.execute).toHaveBeenCalledTimes(1);
+      expect(mockUpdate.setParameters).toHaveBeenCalledWith({
+        id0: cuentaA,
+        saldo0: '0.00',
+        id1: cuentaB,
+        saldo1: '30.00',
+      });
+      expect(result.resultados.map((r) => r.saldo)).toEqual([100.3, 0, 30]);
+      expect(result.exitosas).toBe(3);
+    });
+
+    it('debería rechazar solo los movimientos inválidos del lote', async () => {
+      mockSelect.getMany.mockResolvedValue([
+        { id: cuentaA, saldo: '100.00', estado: 'ACTIVA', activo: true },
+        { id: cuentaB, saldo: '500.00', estado: 'SUSPENDIDA', activo: true },
+      ]);
+
+      const result = await service.realizarOperacionesLote([
+        { cuentaId: cuentaA, tipo: 'RETIRO', monto: 150 },
+        { cuentaId: cuentaB, tipo: 'DEPOSITO', monto: 10 },
+        { cuentaId: 'no-existe', tipo: 'DEPOSITO', monto: 10 },
+        { cuentaId: cuentaA, tipo: 'RETIRO', monto: 40 },
+      ]);
+
+      expect(result.resultados.map((r) => r.error)).toEqual([
+        'Saldo insuficiente',
+        'La cuenta no está activa',
+        'Cuenta no encontrada',
+        undefined,
+      ]);
+      expect(result.resultados[3].saldo).toBe(60);
+      expect(result.fallidas).toBe(3);
+      expect(mockUpdate.where).toHaveBeenCalledWith('id IN (:...modificadas)', { modificadas: [cuentaA] });
+    });
+
+    it('no debería ejecutar el UPDATE si ningún movimiento se aplica', async () => {
+      mockSelect.getMany.mockResolvedValue([]);
+
+      const result = await service.realizarOperacionesLote([
+        { cuentaId: cuentaA, tipo: 'DEPOSITO', monto: 10 },
+      ]);
+
+      expect(result.exitosas).toBe(0);
+      expect(mockUpdate.execute).not.toHaveBeenCalled();
+    });
+  });
+
+  describe('listado paginado y stream', () => {
+    const fila = (n: number) => ({
+      id: `00000000-0000-0000-0000-00000000000${n}`,
+      socioId: '456e7890-e89b-12d3-a456-426614174111',
+      numeroCuenta: `001-00000000${n}`,
+      saldo: '100.50',
+      estado: 'ACTIVA',
+      tipoCuenta: 'AHORRO',
+      fechaCreacion: new Date('2024-01-01'),
+      fechaActualizacion: new Date('2024-01-01'),
+    });
+
+    const mockConsulta = {
+      where: jest.fn().mockReturnThis(),
+      andWhere: jest.fn().mockReturnThis(),
+      orderBy: jest.fn().mockReturnThis(),
+      addOrderBy: jest.fn().mockReturnThis(),
+      select: jest.fn().mockReturnThis(),
+      addSelect: jest.fn().mockReturnThis(),
+      limit: jest.fn().mockReturnThis(),
+      getRawAndEntities: jest.fn(),
+      stream: jest.fn(),
+    };
+
+    const mockQueryRunner = {
+      release: jest.fn().mockResolvedValue(undefined),
+    };
+
+    beforeEach(() => {
+      mockRepository.createQueryBuilder.mockReturnValue(mockConsulta);
+      mockRepository.manager.connection.createQueryRunner.mockReturnValue(mockQueryRunner);
+    });
+
+    it('debería devolver el cursor de la última cuenta cuando hay más páginas', async () => {
+      mockConsulta.getRawAndEntities.mockResolvedValue({
+        entities: [fila(1), fila(2), fila(3)],
+        raw: [
+          { cursor_fecha: '2024-01-01 00:00:00.000001' },
+          { cursor_fecha: '2024-01-01 00:00:00.000002' },
+          { cursor_fecha: '2024-01-01 00:00:00.000003' },
+        ],
+      });
+
+      const result = await service.obtenerPaginaCuentas(2);
+
+      expect(mockConsulta.limit).toHaveBeenCalledWith(3);
+      expect(mockConsulta.andWhere).not.toHaveBeenCalled();
+      expect(result.cuentas).toHaveLength(2);
+      expect(result.cuentas[0].saldo).toBe(100.5);
+      expect(JSON.parse(Buffer.from(result.siguienteCursor, 'base64url').toString())).toEqual([
+        '2024-01-01 00:00:00.000002',
+        fila(2).id,
+      ]);
+    });
+
+    it('debería continuar desde el cursor y terminar con siguienteCursor null', async () => {
+      const cursor = Buffer.from(JSON.stringify(['2024-01-01 00:00:00.000002', fila(2).id])).toString('base64url');
+      mockConsulta.getRawAndEntities.mockResolvedValue({
+        entities: [fila(3)],
+        raw: [{ cursor_fecha: '2024-01-01 00:00:00.000003' }],
+      });
+
+      const result = await service.obtenerPaginaCuentas(2, cursor);
+
+      expect(mockConsulta.andWhere).toHaveBeenCalledWith(expect.stringContaining('cuenta.id > :id'), {
+        fecha: '2024-01-01 00:00:00.000002',
+        id: fila(2).id,
+      });
+      expect(result.siguienteCursor).toBeNull();
+    });
+
+    it('debería limitar el tamaño de página al máximo', async () => {
+      mockConsulta.getRawAndEntities.mockResolvedValue({ entities: [], raw: [] });
+
+      await service.obtenerPaginaCuentas(10000);
+
+      expect(mockConsulta.limit).toHaveBeenCalledWith(501);
+    });
+
+    it('debería rechazar un cursor inválido', async () => {
+      await expect(service.obtenerPaginaCuentas(10, 'no-es-un-cursor')).rejects.toThrow(BadRequestException);
+      await expect(
+        service.obtenerPaginaCuentas(10, Buffer.from('["ayer", "x"]').toString('base64url')),
+      ).rejects.toThrow('Cursor inválido');
+    });
+
+    it('debería emitir una cuenta por línea y liberar la conexión al terminar', async () => {
+      mockConsulta.stream.mockResolvedValue(Readable.from([fila(1), fila(2)]));
+
+      const lineas = await service.streamCuentas();
+      let texto = '';
+      for await (const trozo of lineas) {
+        texto += trozo;
+      }
+      await new Promise((resolve) => setImmediate(resolve));
+
+      const cuentas = texto.trim().split('\n').map((linea) => JSON.parse(linea));
+      expect(cuentas.map((cuenta) => cuenta.id)).toEqual([fila(1).id, fila(2).id]);
+      expect(cuentas[0].saldo).toBe(100.5);
+      expect(mockQueryRunner.release).toHaveBeenCalledTimes(1);
+    });
+  });
+
+  describe('caché de lecturas', () => {
+    let service: CuentasService;
+
+    beforeEach(async () => {
+      const module = await crearModulo({ cache: new CacheLru(100, 60000) });
+      service = module.get<CuentasService>(CuentasService);
+    });
+
+    it('debería leer la cuenta de la base una sola vez', async () => {
+      mockRepository.findOne.mockResolvedValue({ ...mockCuenta });
+
+      await service.obtenerCuenta(mockCuenta.id);
+      const result = await service.obtenerCuenta(mockCuenta.id);
+
+      expect(result.saldo).toBe(1000);
+      expect(mockRepository.findOne).toHaveBeenCalledTimes(1);
+      expect(service.estadisticasCache()).toMatchObject({ habilitada: true, aciertos: 1, fallos: 1 });
+    });
+
+    it('no debería devolver el saldo anterior después de un depósito', async () => {
+      mockRepository.findOne.mockResolvedValueOnce({ ...mockCuenta });
+      await service.obtenerCuenta(mockCuenta.id);
+
+      mockRepository.findOne.mockResolvedValueOnce({ ...mockCuenta, saldo: 1000 });
+      mockRepository.save.mockResolvedValueOnce({ ...mockCuenta, saldo: 1500 });
+      await service.realizarDeposito(mockCuenta.id, 500);
+
+      mockRepository.findOne.mockResolvedValueOnce({ ...mockCuenta, saldo: 1500 });
+      const result = await service.obtenerCuenta(mockCuenta.id);
+
+      expect(result.saldo).toBe(1500);
+    });
+
+    it('debería invalidar el listado del socio anterior y del nuevo al actualizar', async () => {
+      mockRepository.find.mockResolvedValue([{ ...mockCuenta }]);
+      await service.obtenerCuentasPorSocio(mockCuenta.socioId);
+
+      mockRepository.findOne.mockResolvedValueOnce({ ...mockCuenta }).mockResolvedValueOnce(null);
+      mockRepository.save.mockImplementation(async (guardada) => guardada);
+      await service.actualizarCuenta(mockCuenta.id, {
+        socioId: 'otro-socio',
+        numeroCuenta: '001-999999999',
+        saldo: 1000,
+        tipoCuenta: 'AHORRO',
+      });
+
+      mockRepository.find.mockResolvedValue([]);
+      const result = await service.obtenerCuentasPorSocio(mockCuenta.socioId);
+
+      expect(result).toEqual([]);
+      expect(mockRepository.find).toHaveBeenCalledTimes(2);
+    });
+
+    it('no debería cachear cuentas inexistentes', async () => {
+      mockRepository.findOne.mockResolvedValue(null);
+
+      await expect(service.obtenerCuenta('no-existe')).rejects.toThrow(NotFoundException);
+      await expect(service.obtenerCuenta('no-existe')).rejects.toThrow(NotFoundException);
+
+      expect(mockRepository.findOne).toHaveBeenCalledTimes(2);
+    });
+  });
 });
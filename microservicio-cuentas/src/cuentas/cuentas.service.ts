@@ -1,15 +1,42 @@
-import { Injectable, NotFoundException, ConflictException, Inject } from '@nestjs/common';
+import {
+  Injectable,
+  NotFoundException,
+  ConflictException,
+  BadRequestException,
+  Inject,
+  Optional,
+} from '@nestjs/common';
 import { InjectRepository } from '@nestjs/typeorm';
-import { Repository } from 'typeorm';
+import { QueryRunner, Repository, SelectQueryBuilder } from 'typeorm';
+import { Readable, Transform, pipeline } from 'stream';
 import { Cuenta } from './entities/cuenta.entity';
 import { CuentaRequestDto } from './dto/cuenta-request.dto';
 import { CuentaResponseDto } from './dto/cuenta-response.dto';
+import { OperacionLoteDto } from './dto/operaciones-lote-request.dto';
+import {
+  OperacionesLoteResponseDto,
+  ResultadoOperacionLoteDto,
+} from './dto/operaciones-lote-response.dto';
+import { LIMITE_MAXIMO_PAGINA, LIMITE_PAGINA } from './dto/pagina-cuentas-query.dto';
+import { CuentasPaginaResponseDto } from './dto/cuentas-pagina-response.dto';
+import { MODO_SALDO, ModoSaldo } from './modo-saldo';
+import { CACHE_CUENTAS, CacheLru, EstadisticasCache } from './cache-cuentas';
+
+// Fecha del cursor con microsegundos: un Date de JS los perdería y el keyset saltaría filas
+const FORMATO_FECHA_CURSOR = '%Y-%m-%d %H:%i:%s.%f';
+const PATRON_FECHA_CURSOR = /^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?$/;
 
 @Injectable()
 export class CuentasService {
   constructor(
     @InjectRepository(Cuenta)
     private readonly cuentaRepository: Repository<Cuenta>,
+    @Optional()
+    @Inject(MODO_SALDO)
+    private readonly modoSaldo: ModoSaldo = 'legacy',
+    @Optional()
+    @Inject(CACHE_CUENTAS)
+    private readonly cache?: CacheLru<CuentaResponseDto | CuentaResponseDto[]>,
   ) {}
 
   async crearCuenta(request: CuentaRequestDto): Promise<CuentaResponseDto> {
@@ -32,6 +59,7 @@ export class CuentasService {
     });
 
     const cuentaGuardada = await this.cuentaRepository.save(cuenta);
+    this.invalidarCache(cuentaGuardada);
     return this.mapToResponse(cuentaGuardada);
   }
 
@@ -55,15 +83,40 @@ export class CuentasService {
       }
     }
 
+    const socioAnterior = cuenta.socioId;
     cuenta.socioId = request.socioId;
     cuenta.numeroCuenta = request.numeroCuenta;
     cuenta.tipoCuenta = request.tipoCuenta;
 
     const cuentaActualizada = await this.cuentaRepository.save(cuenta);
+    this.invalidarCache(cuentaActualizada, socioAnterior);
     return this.mapToResponse(cuentaActualizada);
   }
 
   async obtenerCuenta(id: string): Promise<CuentaResponseDto> {
+    if (this.cache) {
+      return this.cache.obtener(`cuenta:${id}`, () => this.buscarCuenta(id)) as Promise<CuentaResponseDto>;
+    }
+    return this.buscarCuenta(id);
+  }
+
+  async obtenerCuentasPorSocio(socioId: string): Promise<CuentaResponseDto[]> {
+    if (this.cache) {
+      return this.cache.obtener(`socio:${socioId}`, () => this.buscarCuentasPorSocio(socioId)) as Promise<
+        CuentaResponseDto[]
+      >;
+    }
+    return this.buscarCuentasPorSocio(socioId);
+  }
+
+  estadisticasCache(): EstadisticasCache & { habilitada: boolean } {
+    if (!this.cache) {
+      return { habilitada: false, ...new CacheLru(0, 0).estadisticas() };
+    }
+    return { habilitada: true, ...this.cache.estadisticas() };
+  }
+
+  private async buscarCuenta(id: string): Promise<CuentaResponseDto> {
     const cuenta = await this.cuentaRepository.findOne({
       where: { id, activo: true }
     });
@@ -75,7 +128,7 @@ export class CuentasService {
     return this.mapToResponse(cuenta);
   }
 
-  async obtenerCuentasPorSocio(socioId: string): Promise<CuentaResponseDto[]> {
+  private async buscarCuentasPorSocio(socioId: string): Promise<CuentaResponseDto[]> {
     const cuentas = await this.cuentaRepository.find({
       where: { socioId, activo: true },
       order: { fechaCreacion: 'DESC' }
@@ -92,6 +145,83 @@ export class CuentasService {
     return cuentas.map(cuenta => this.mapToResponse(cuenta));
   }
 
+  /**
+   * Página de cuentas activas por keyset sobre (fechaCreacion, id): cada
+   * página es un rango del índice idx_cuentas_listado, así que cuesta lo
+   * mismo en la primera página que en la millonésima (sin OFFSET).
+   */
+  async obtenerPaginaCuentas(
+    limite: number = LIMITE_PAGINA,
+    cursor?: string,
+  ): Promise<CuentasPaginaResponseDto> {
+    const tamano = Math.min(limite, LIMITE_MAXIMO_PAGINA);
+    const consulta = this.consultaListado()
+      .addSelect(`DATE_FORMAT(cuenta.fecha_creacion, '${FORMATO_FECHA_CURSOR}')`, 'cursor_fecha')
+      .limit(tamano + 1);
+
+    if (cursor) {
+      const [fecha, id] = this.leerCursor(cursor);
+      consulta.andWhere(
+        '(cuenta.fechaCreacion > :fecha OR (cuenta.fechaCreacion = :fecha AND cuenta.id > :id))',
+        { fecha, id }
+      );
+    }
+
+    // Una fila de más indica si hay página siguiente
+    const { entities, raw } = await consulta.getRawAndEntities();
+    const cuentas = entities.slice(0, tamano);
+    const siguienteCursor =
+      entities.length > tamano
+        ? this.crearCursor(raw[tamano - 1].cursor_fecha, cuentas[tamano - 1].id)
+        : null;
+
+    return {
+      cuentas: cuentas.map(cuenta => this.mapToResponse(cuenta)),
+      siguienteCursor,
+    };
+  }
+
+  /**
+   * Cuentas activas como NDJSON (una por línea) a partir del stream de filas
+   * de MySQL: el servicio nunca tiene el resultado completo en memoria. La
+   * conexión es propia del stream y se libera al terminar; si el cliente se
+   * desconecta a mitad, se descarta en lugar de volver al pool con la
+   * consulta en curso.
+   */
+  async streamCuentas(): Promise<Readable> {
+    const queryRunner = this.cuentaRepository.manager.connection.createQueryRunner();
+    let filas: Readable;
+    try {
+      filas = await this.consultaListado(queryRunner)
+        .select('cuenta.id', 'id')
+        .addSelect('cuenta.socio_id', 'socioId')
+        .addSelect('cuenta.numeroCuenta', 'numeroCuenta')
+        .addSelect('cuenta.saldo', 'saldo')
+        .addSelect('cuenta.estado', 'estado')
+        .addSelect('cuenta.tipoCuenta', 'tipoCuenta')
+        .addSelect('cuenta.fecha_creacion', 'fechaCreacion')
+        .addSelect('cuenta.fecha_actualizacion', 'fechaActualizacion')
+        .stream();
+    } catch (error) {
+      await queryRunner.release();
+      throw error;
+    }
+
+    const lineas = new Transform({
+      writableObjectMode: true,
+      transform: (fila, _codificacion, listo) => {
+        listo(null, JSON.stringify(this.mapToResponse(fila)) + '\n');
+      },
+    });
+
+    return pipeline(filas, lineas, (error) => {
+      if (error) {
+        (queryRunner as any).databaseConnection?.destroy();
+      }
+      queryRunner.release();
+    });
+  }
+
   async eliminarCuenta(id: string): Promise<void> {
     const cuenta = await this.cuentaRepository.findOne({
       where: { id, activo: true }
@@ -105,9 +235,17 @@ export class CuentasService {
     cuenta.activo = false;
     cuenta.estado = 'CANCELADA';
     await this.cuentaRepository.save(cuenta);
+    this.invalidarCache(cuenta);
   }
 
-  async realizarRetiro(id: string, monto: number): Promise<CuentaResponseDto> {
+  async realizarRetiro(id: string, monto: number, modo?: ModoSaldo): Promise<CuentaResponseDto> {
+    switch (modo ?? this.modoSaldo) {
+      case 'atomico':
+        return this.conInvalidacion(this.movimientoAtomico(id, -monto));
+      case 'pesimista':
+        return this.conInvalidacion(this.movimientoPesimista(id, -monto));
+    }
+
     const cuenta = await this.cuentaRepository.findOne({
       where: { id, activo: true }
     });
@@ -126,10 +264,18 @@ export class CuentasService {
 
     cuenta.saldo -= monto;
     const cuentaActualizada = await this.cuentaRepository.save(cuenta);
+    this.invalidarCache(cuentaActualizada);
     return this.mapToResponse(cuentaActualizada);
   }
 
-  async realizarDeposito(id: string, monto: number): Promise<CuentaResponseDto> {
+  async realizarDeposito(id: string, monto: number, modo?: ModoSaldo): Promise<CuentaResponseDto> {
+    switch (modo ?? this.modoSaldo) {
+      case 'atomico':
+        return this.conInvalidacion(this.movimientoAtomico(id, monto));
+      case 'pesimista':
+        return this.conInvalidacion(this.movimientoPesimista(id, monto));
+    }
+
     const cuenta = await this.cuentaRepository.findOne({
       where: { id, activo: true }
     });
@@ -144,9 +290,219 @@ export class CuentasService {
 
     cuenta.saldo += monto;
     const cuentaActualizada = await this.cuentaRepository.save(cuenta);
+    this.invalidarCache(cuentaActualizada);
     return this.mapToResponse(cuentaActualizada);
   }
 
+  /**
+   * Lote de depósitos y retiros en una transacción con dos sentencias: un
+   * SELECT ... FOR UPDATE de todas las cuentas del lote y un UPDATE con CASE
+   * para las que cambiaron. Los movimientos se aplican en orden sobre los
+   * saldos bloqueados; uno rechazado (cuenta inexistente, inactiva o sin
+   * saldo) no detiene al resto.
+   */
+  async realizarOperacionesLote(operaciones: OperacionLoteDto[]): Promise<OperacionesLoteResponseDto> {
+    const ids = [...new Set(operaciones.map((operacion) => operacion.cuentaId))];
+    const cambiadas: Cuenta[] = [];
+
+    const respuesta = await this.cuentaRepository.manager.transaction(async (manager) => {
+      const cuentas = await manager
+        .createQueryBuilder(Cuenta, 'cuenta')
+        .select(['cuenta.id', 'cuenta.socioId', 'cuenta.saldo', 'cuenta.estado', 'cuenta.activo'])
+        .where('cuenta.id IN (:...ids)', { ids })
+        .orderBy('cuenta.id')
+        .setLock('pessimistic_write')
+        .getMany();
+      const porId = new Map(cuentas.map((cuenta) => [cuenta.id, cuenta]));
+
+      // Saldos en centavos: sumar cientos de montos en coma flotante acumula error
+      const saldos = new Map(cuentas.map((cuenta) => [cuenta.id, Math.round(Number(cuenta.saldo) * 100)]));
+      const modificadas = new Set<string>();
+
+      const resultados = operaciones.map((operacion, indice): ResultadoOperacionLoteDto => {
+        const resultado = {
+          indice,
+          cuentaId: operacion.cuentaId,
+          tipo: operacion.tipo,
+          monto: operacion.monto,
+        };
+        const cuenta = porId.get(operacion.cuentaId);
+
+        if (!cuenta || !cuenta.activo) {
+          return { ...resultado, exito: false, error: 'Cuenta no encontrada' };
+        }
+
+        if (cuenta.estado !== 'ACTIVA') {
+          return { ...resultado, exito: false, error: 'La cuenta no está activa' };
+        }
+
+        const centavos = Math.round(operacion.monto * 100);
+        const saldo = saldos.get(cuenta.id);
+        if (operacion.tipo === 'RETIRO' && saldo < centavos) {
+          return { ...resultado, exito: false, saldo: saldo / 100, error: 'Saldo insuficiente' };
+        }
+
+        const nuevoSaldo = operacion.tipo === 'RETIRO' ? saldo - centavos : saldo + centavos;
+        saldos.set(cuenta.id, nuevoSaldo);
+        modificadas.add(cuenta.id);
+        return { ...resultado, exito: true, saldo: nuevoSaldo / 100 };
+      });
+
+      if (modificadas.size) {
+        const parametros = {};
+        const casos = [...modificadas].map((id, i) => {
+          parametros[`id${i}`] = id;
+          parametros[`saldo${i}`] = (saldos.get(id) / 100).toFixed(2);
+          return `WHEN :id${i} THEN :saldo${i}`;
+        });
+        await manager
+          .createQueryBuilder()
+          .update(Cuenta)
+          .set({ saldo: () => `CASE id ${casos.join(' ')} END` })
+          .where('id IN (:...modificadas)', { modificadas: [...modificadas] })
+          .setParameters(parametros)
+          .execute();
+        cambiadas.push(...[...modificadas].map((id) => porId.get(id)));
+      }
+
+      const exitosas = resultados.filter((resultado) => resultado.exito).length;
+      return {
+        total: resultados.length,
+        exitosas,
+        fallidas: resultados.length - exitosas,
+        resultados,
+      };
+    });
+
+    // Después del commit: antes, una lectura concurrente podría volver a cachear el saldo viejo
+    cambiadas.forEach((cuenta) => this.invalidarCache(cuenta));
+    return respuesta;
+  }
+
+  /**
+   * Modo atómico: en una transacción, un UPDATE condicional aplica el cambio
+   * de saldo y sus condiciones (MySQL lo serializa por fila, sin lectura
+   * previa que pueda quedar vieja) y un SELECT lee el resultado antes del
+   * COMMIT. Si el UPDATE no afecta filas, la lectura decide el mismo error
+   * que el modo legacy; un movimiento no aplicado nunca se devuelve como éxito.
+   */
+  private async movimientoAtomico(id: string, delta: number): Promise<CuentaResponseDto> {
+    const esRetiro = delta < 0;
+    return this.cuentaRepository.manager.transaction(async (manager) => {
+      const resultado = await manager
+        .createQueryBuilder()
+        .update(Cuenta)
+        .set({ saldo: () => 'saldo + :delta' })
+        .where(
+          'id = :id AND activo = :activo AND estado = :estado' +
+            (esRetiro ? ' AND saldo >= :monto' : ''),
+          { id, activo: true, estado: 'ACTIVA', monto: -delta }
+        )
+        .setParameter('delta', delta)
+        .execute();
+
+      const cuenta = await manager.findOne(Cuenta, { where: { id } });
+
+      if (!resultado.affected) {
+        if (!cuenta || !cuenta.activo) {
+          throw new NotFoundException('Cuenta no encontrada');
+        }
+        if (cuenta.estado !== 'ACTIVA') {
+          throw new ConflictException('La cuenta no está activa');
+        }
+        if (esRetiro) {
+          throw new ConflictException('Saldo insuficiente');
+        }
+        throw new ConflictException('No se pudo aplicar el movimiento');
+      }
+
+      return this.mapToResponse(cuenta);
+    });
+  }
+
+  /**
+   * Modo pesimista: SELECT ... FOR UPDATE dentro de una transacción; las
+   * operaciones concurrentes sobre la misma cuenta esperan el bloqueo de fila.
+   */
+  private async movimientoPesimista(id: string, delta: number): Promise<CuentaResponseDto> {
+    return this.cuentaRepository.manager.transaction(async (manager) => {
+      const cuenta = await manager.findOne(Cuenta, {
+        where: { id, activo: true },
+        lock: { mode: 'pessimistic_write' }
+      });
+
+      if (!cuenta) {
+        throw new NotFoundException('Cuenta no encontrada');
+      }
+
+      if (cuenta.estado !== 'ACTIVA') {
+        throw new ConflictException('La cuenta no está activa');
+      }
+
+      // DECIMAL llega como texto desde mysql2
+      const saldo = Number(cuenta.saldo);
+      if (delta < 0 && saldo < -delta) {
+        throw new ConflictException('Saldo insuficiente');
+      }
+
+      cuenta.saldo = Math.round((saldo + delta) * 100) / 100;
+      const cuentaActualizada = await manager.save(cuenta);
+      return this.mapToResponse(cuentaActualizada);
+    });
+  }
+
+  /**
+   * Invalidar la cuenta y el listado de su socio (y del socio anterior si
+   * cambió). Se llama después de guardar: invalidar antes dejaría que una
+   * lectura concurrente vuelva a cachear el valor previo a la escritura.
+   */
+  private invalidarCache(cuenta: { id: string; socioId: string }, socioAnterior?: string): void {
+    if (!this.cache) {
+      return;
+    }
+    const claves = [`cuenta:${cuenta.id}`, `socio:${cuenta.socioId}`];
+    if (socioAnterior && socioAnterior !== cuenta.socioId) {
+      claves.push(`socio:${socioAnterior}`);
+    }
+    this.cache.invalidar(...claves);
+  }
+
+  private async conInvalidacion(operacion: Promise<CuentaResponseDto>): Promise<CuentaResponseDto> {
+    const cuenta = await operacion;
+    this.invalidarCache(cuenta);
+    return cuenta;
+  }
+
+  private consultaListado(queryRunner?: QueryRunner): SelectQueryBuilder<Cuenta> {
+    return this.cuentaRepository
+      .createQueryBuilder('cuenta', queryRunner)
+      .where('cuenta.activo = :activo AND cuenta.estado = :estado', { activo: true, estado: 'ACTIVA' })
+      .orderBy('cuenta.fechaCreacion', 'ASC')
+      .addOrderBy('cuenta.id', 'ASC');
+  }
+
+  private crearCursor(fecha: string, id: string): string {
+    return Buffer.from(JSON.stringify([fecha, id])).toString('base64url');
+  }
+
+  private leerCursor(cursor: string): [string, string] {
+    try {
+      const valor = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+      if (
+        Array.isArray(valor) &&
+        valor.length === 2 &&
+        typeof valor[0] === 'string' &&
+        PATRON_FECHA_CURSOR.test(valor[0]) &&
+        typeof valor[1] === 'string'
+      ) {
+        return [valor[0], valor[1]];
+      }
+    } catch {
+      // JSON inválido: mismo error que un cursor con forma incorrecta
+    }
+    throw new BadRequestException('Cursor inválido');
+  }
+
   private mapToResponse(cuenta: Cuenta): CuentaResponseDto {
     return {
       id: cuenta.id,
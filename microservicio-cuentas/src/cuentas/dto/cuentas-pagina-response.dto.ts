@@ -0,0 +1,17 @@
+import { ApiProperty } from '@nestjs/swagger';
+import { CuentaResponseDto } from './cuenta-response.dto';
+
+export class CuentasPaginaResponseDto {
+  @ApiProperty({
+    description: 'Cuentas de la página, ordenadas por fecha de creación e ID',
+    type: [CuentaResponseDto]
+  })
+  cuentas: CuentaResponseDto[];
+
+  @ApiProperty({
+    description: 'Cursor de la página siguiente (null en la última)',
+    example: 'WyIyMDI0LTAxLTE1IDEwOjMwOjAwLjAwMDAwMCIsIjEyM2U0NTY3Il0',
+    nullable: true
+  })
+  siguienteCursor: string | null;
+}
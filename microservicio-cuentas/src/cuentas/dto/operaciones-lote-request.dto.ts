@@ -0,0 +1,54 @@
+import { ApiProperty } from '@nestjs/swagger';
+import { Type } from 'class-transformer';
+import {
+  ArrayMaxSize,
+  ArrayMinSize,
+  IsArray,
+  IsEnum,
+  IsNumber,
+  IsPositive,
+  IsString,
+  ValidateNested,
+} from 'class-validator';
+
+// Máximo de movimientos por lote (acota el IN y el CASE del UPDATE)
+export const MAX_OPERACIONES_LOTE = 1000;
+
+export class OperacionLoteDto {
+  @ApiProperty({
+    description: 'ID de la cuenta',
+    example: '123e4567-e89b-12d3-a456-426614174000'
+  })
+  @IsString()
+  cuentaId: string;
+
+  @ApiProperty({
+    description: 'Tipo de movimiento',
+    enum: ['DEPOSITO', 'RETIRO'],
+    example: 'DEPOSITO'
+  })
+  @IsEnum(['DEPOSITO', 'RETIRO'])
+  tipo: 'DEPOSITO' | 'RETIRO';
+
+  @ApiProperty({
+    description: 'Monto del movimiento',
+    example: 250.75,
+    minimum: 0
+  })
+  @IsNumber({ maxDecimalPlaces: 2 })
+  @IsPositive()
+  monto: number;
+}
+
+export class OperacionesLoteRequestDto {
+  @ApiProperty({
+    description: `Movimientos a aplicar, en orden (máximo ${MAX_OPERACIONES_LOTE})`,
+    type: [OperacionLoteDto]
+  })
+  @IsArray()
+  @ArrayMinSize(1)
+  @ArrayMaxSize(MAX_OPERACIONES_LOTE)
+  @ValidateNested({ each: true })
+  @Type(() => OperacionLoteDto)
+  operaciones: OperacionLoteDto[];
+}
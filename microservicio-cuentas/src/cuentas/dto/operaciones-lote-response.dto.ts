@@ -0,0 +1,72 @@
+import { ApiProperty, ApiPropertyOptional } from '@nestjs/swagger';
+
+export class ResultadoOperacionLoteDto {
+  @ApiProperty({
+    description: 'Posición del movimiento en el lote',
+    example: 0
+  })
+  indice: number;
+
+  @ApiProperty({
+    description: 'ID de la cuenta',
+    example: '123e4567-e89b-12d3-a456-426614174000'
+  })
+  cuentaId: string;
+
+  @ApiProperty({
+    description: 'Tipo de movimiento',
+    enum: ['DEPOSITO', 'RETIRO'],
+    example: 'RETIRO'
+  })
+  tipo: string;
+
+  @ApiProperty({
+    description: 'Monto del movimiento',
+    example: 250.75
+  })
+  monto: number;
+
+  @ApiProperty({
+    description: 'Si el movimiento se aplicó',
+    example: true
+  })
+  exito: boolean;
+
+  @ApiPropertyOptional({
+    description: 'Saldo de la cuenta después del movimiento',
+    example: 749.25
+  })
+  saldo?: number;
+
+  @ApiPropertyOptional({
+    description: 'Motivo del rechazo',
+    example: 'Saldo insuficiente'
+  })
+  error?: string;
+}
+
+export class OperacionesLoteResponseDto {
+  @ApiProperty({
+    description: 'Movimientos recibidos',
+    example: 100
+  })
+  total: number;
+
+  @ApiProperty({
+    description: 'Movimientos aplicados',
+    example: 98
+  })
+  exitosas: number;
+
+  @ApiProperty({
+    description: 'Movimientos rechazados',
+    example: 2
+  })
+  fallidas: number;
+
+  @ApiProperty({
+    description: 'Resultado de cada movimiento, en el orden del lote',
+    type: [ResultadoOperacionLoteDto]
+  })
+  resultados: ResultadoOperacionLoteDto[];
+}
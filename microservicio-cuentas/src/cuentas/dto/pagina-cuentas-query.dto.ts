@@ -0,0 +1,30 @@
+import { ApiPropertyOptional } from '@nestjs/swagger';
+import { Type } from 'class-transformer';
+import { IsInt, IsOptional, IsString, Max, Min } from 'class-validator';
+
+// Tamaño de página por defecto y máximo de GET /cuentas/pagina
+export const LIMITE_PAGINA = 100;
+export const LIMITE_MAXIMO_PAGINA = 500;
+
+export class PaginaCuentasQueryDto {
+  @ApiPropertyOptional({
+    description: `Cuentas por página (máximo ${LIMITE_MAXIMO_PAGINA})`,
+    example: LIMITE_PAGINA,
+    minimum: 1,
+    maximum: LIMITE_MAXIMO_PAGINA
+  })
+  @IsOptional()
+  @Type(() => Number)
+  @IsInt()
+  @Min(1)
+  @Max(LIMITE_MAXIMO_PAGINA)
+  limite?: number;
+
+  @ApiPropertyOptional({
+    description: 'Cursor opaco devuelto como siguienteCursor por la página anterior',
+    example: 'WyIyMDI0LTAxLTE1IDEwOjMwOjAwLjAwMDAwMCIsIjEyM2U0NTY3Il0'
+  })
+  @IsOptional()
+  @IsString()
+  cursor?: string;
+}
@@ -1,7 +1,9 @@
-import { Entity, PrimaryGeneratedColumn, Column, CreateDateColumn, UpdateDateColumn, BeforeInsert } from 'typeorm';
+import { Entity, PrimaryGeneratedColumn, Column, CreateDateColumn, UpdateDateColumn, BeforeInsert, Index } from 'typeorm';
 import { v4 as uuidv4 } from 'uuid';
 
 @Entity('cuentas')
+@Index('idx_cuentas_fecha_actualizacion', ['fechaActualizacion'])
+@Index('idx_cuentas_listado', ['activo', 'estado', 'fechaCreacion', 'id'])
 export class Cuenta {
   @PrimaryGeneratedColumn('uuid')
   id: string;
@@ -0,0 +1,50 @@
+import { BadRequestException } from '@nestjs/common';
+
+/**
+ * Cómo se aplican retiros y depósitos:
+ * - legacy: findOne + cálculo en JavaScript + save (puede perder actualizaciones)
+ * - atomico: transacción con un UPDATE condicional (saldo = saldo - monto ...
+ *   AND saldo >= monto) y un SELECT del saldo resultante antes del COMMIT
+ * - pesimista: transacción con SELECT ... FOR UPDATE antes de guardar
+ */
+export const MODOS_SALDO = ['legacy', 'atomico', 'pesimista'] as const;
+
+export type ModoSaldo = (typeof MODOS_SALDO)[number];
+
+// Token de inyección del modo configurado (CUENTAS_MODO_SALDO)
+export const MODO_SALDO = 'MODO_SALDO';
+
+// Cabecera para elegir el modo por solicitud (benchmark de Locust)
+export const CABECERA_MODO_SALDO = 'x-modo-saldo';
+
+export function esModoSaldo(valor: string): valor is ModoSaldo {
+  return (MODOS_SALDO as readonly string[]).includes(valor);
+}
+
+export function leerModoSaldo(valor: string | undefined): ModoSaldo {
+  if (!valor) {
+    return 'legacy';
+  }
+  if (!esModoSaldo(valor)) {
+    throw new Error(
+      `CUENTAS_MODO_SALDO inválido: ${valor} (opciones: ${MODOS_SALDO.join(', ')})`,
+    );
+  }
+  return valor;
+}
+
+/**
+ * Modo pedido en la cabecera X-Modo-Saldo. Solo se respeta con
+ * CUENTAS_MODO_SALDO_POR_CABECERA=true; si no, se usa el modo configurado.
+ */
+export function modoSaldoSolicitado(cabecera?: string): ModoSaldo | undefined {
+  if (!cabecera || process.env.CUENTAS_MODO_SALDO_POR_CABECERA !== 'true') {
+    return undefined;
+  }
+  if (!esModoSaldo(cabecera)) {
+    throw new BadRequestException(
+      `Modo de saldo inválido: ${cabecera} (opciones: ${MODOS_SALDO.join(', ')})`,
+    );
+  }
+  return cabecera;
+}
@@ -0,0 +1,119 @@
+import { NotFoundException } from '@nestjs/common';
+import { defer, lastValueFrom } from 'rxjs';
+import { DataSource, QueryRunner } from 'typeorm';
+import {
+  CABECERA_SERVER_TIMING,
+  ServerTimingInterceptor,
+  SuscriptorTiemposBd,
+  contextoMedicion,
+  formatearServerTiming,
+  nuevaMedicion,
+} from './server-timing';
+
+describe('Server-Timing', () => {
+  const crearSuscriptor = () => {
+    const dataSource = { subscribers: [] } as unknown as DataSource;
+    return { suscriptor: new SuscriptorTiemposBd(dataSource), dataSource };
+  };
+
+  const consultar = (suscriptor: SuscriptorTiemposBd, queryRunner: QueryRunner) => {
+    suscriptor.beforeQuery({ queryRunner } as any);
+    // El final llega fuera del contexto, como el callback de mysql2
+    setImmediate(() =>
+      contextoMedicion.exit(() => suscriptor.afterQuery({ queryRunner, success: true } as any)),
+    );
+    return new Promise((resolve) => setImmediate(resolve));
+  };
+
+  const crearContexto = (respuesta: any) =>
+    ({ switchToHttp: () => ({ getResponse: () => respuesta }) }) as any;
+
+  it('debería formatear bd, consultas y handler', () => {
+    const medicion = { inicio: 100, bdMs: 3.456, consultas: 2 };
+
+    expect(formatearServerTiming(medicion, 110.5)).toBe('bd;dur=3.46, consultas;desc=2, handler;dur=10.50');
+  });
+
+  it('debería registrarse como suscriptor del DataSource', () => {
+    const { suscriptor, dataSource } = crearSuscriptor();
+
+    expect(dataSource.subscribers).toContain(suscriptor);
+  });
+
+  it('debería sumar las consultas a la solicitud que las hizo', async () => {
+    const { suscriptor } = crearSuscriptor();
+    const primera = nuevaMedicion();
+    const segunda = nuevaMedicion();
+
+    await Promise.all([
+      contextoMedicion.run(primera, async () => {
+        await consultar(suscriptor, {} as QueryRunner);
+        await consultar(suscriptor, {} as QueryRunner);
+      }),
+      contextoMedicion.run(segunda, () => consultar(suscriptor, {} as QueryRunner)),
+    ]);
+
+    expect(primera.consultas).toBe(2);
+    expect(segunda.consultas).toBe(1);
+    expect(primera.bdMs).toBeGreaterThanOrEqual(0);
+  });
+
+  it('no debería contar consultas fuera de una solicitud', async () => {
+    const { suscriptor } = crearSuscriptor();
+    const medicion = nuevaMedicion();
+    const queryRunner = {} as QueryRunner;
+
+    await consultar(suscriptor, queryRunner);
+    await contextoMedicion.run(medicion, () => consultar(suscriptor, queryRunner));
+
+    expect(medicion.consultas).toBe(1);
+  });
+
+  it('debería escribir la cabecera con las consultas del handler', async () => {
+    const { suscriptor } = crearSuscriptor();
+    const respuesta = { headersSent: false, setHeader: jest.fn() };
+    const handler = {
+      handle: () =>
+        defer(async () => {
+          await consultar(suscriptor, {} as QueryRunner);
+          return { saldo: 100 };
+        }),
+    };
+
+    const resultado = await lastValueFrom(
+      new ServerTimingInterceptor().intercept(crearContexto(respuesta), handler),
+    );
+
+    expect(resultado).toEqual({ saldo: 100 });
+    expect(respuesta.setHeader).toHaveBeenCalledWith(
+      CABECERA_SERVER_TIMING,
+      expect.stringMatching(/^bd;dur=[\d.]+, consultas;desc=1, handler;dur=[\d.]+$/),
+    );
+  });
+
+  it('debería escribir la cabecera también cuando el handler falla', async () => {
+    const respuesta = { headersSent: false, setHeader: jest.fn() };
+    const handler = {
+      handle: () =>
+        defer(async () => {
+          throw new NotFoundException('Cuenta no encontrada');
+        }),
+    };
+
+    await expect(
+      lastValueFrom(new ServerTimingInterceptor().intercept(crearContexto(respuesta), handler)),
+    ).rejects.toThrow(NotFoundException);
+    expect(respuesta.setHeader).toHaveBeenCalledWith(CABECERA_SERVER_TIMING, expect.any(String));
+  });
+
+  it('no debería tocar una respuesta que ya envió sus cabeceras', async () => {
+    const respuesta = { headersSent: true, setHeader: jest.fn() };
+    const handler = { handle: () => defer(async () => undefined) };
+
+    await lastValueFrom(new ServerTimingInterceptor().intercept(crearContexto(respuesta), handler), {
+      defaultValue: undefined,
+    });
+
+    expect(respuesta.setHeader).not.toHaveBeenCalled();
+  });
+});
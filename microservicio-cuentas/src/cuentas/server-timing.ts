@@ -0,0 +1,99 @@
+import { AsyncLocalStorage } from 'async_hooks';
+import { performance } from 'perf_hooks';
+import { CallHandler, ExecutionContext, Injectable, NestInterceptor } from '@nestjs/common';
+import { Response } from 'express';
+import { Observable, tap } from 'rxjs';
+import {
+  AfterQueryEvent,
+  BeforeQueryEvent,
+  DataSource,
+  EntitySubscriberInterface,
+  QueryRunner,
+} from 'typeorm';
+
+export const CABECERA_SERVER_TIMING = 'Server-Timing';
+
+/** Tiempos de una solicitud, acumulados mientras se atiende */
+export interface MedicionSolicitud {
+  inicio: number;
+  bdMs: number;
+  consultas: number;
+}
+
+// Medición de la solicitud en curso, visible desde el servicio y TypeORM
+export const contextoMedicion = new AsyncLocalStorage<MedicionSolicitud>();
+
+export function nuevaMedicion(): MedicionSolicitud {
+  return { inicio: performance.now(), bdMs: 0, consultas: 0 };
+}
+
+/**
+ * Valor de la cabecera: bd (tiempo en MySQL), consultas (ida y vuelta a la
+ * base, incluidos START TRANSACTION y COMMIT) y handler (desde que el
+ * interceptor recibe la solicitud hasta que el handler responde; incluye
+ * validación, servicio y bd)
+ */
+export function formatearServerTiming(medicion: MedicionSolicitud, fin = performance.now()): string {
+  return [
+    `bd;dur=${medicion.bdMs.toFixed(2)}`,
+    `consultas;desc=${medicion.consultas}`,
+    `handler;dur=${(fin - medicion.inicio).toFixed(2)}`,
+  ].join(', ');
+}
+
+/**
+ * Suma a la solicitud en curso el tiempo de cada consulta. El contexto se
+ * toma en beforeQuery, que corre en la cadena async de quien consulta; el
+ * callback de mysql2 que dispara afterQuery no lo conserva, así que el
+ * final se asocia por queryRunner (una consulta a la vez por conexión).
+ */
+@Injectable()
+export class SuscriptorTiemposBd implements EntitySubscriberInterface {
+  private readonly enCurso = new WeakMap<QueryRunner, { medicion: MedicionSolicitud; inicio: number }>();
+
+  constructor(dataSource: DataSource) {
+    dataSource.subscribers.push(this);
+  }
+
+  beforeQuery(event: BeforeQueryEvent<unknown>): void {
+    const medicion = contextoMedicion.getStore();
+    if (medicion && event.queryRunner) {
+      this.enCurso.set(event.queryRunner, { medicion, inicio: performance.now() });
+    }
+  }
+
+  afterQuery(event: AfterQueryEvent<unknown>): void {
+    const consulta = event.queryRunner && this.enCurso.get(event.queryRunner);
+    if (!consulta) {
+      return;
+    }
+    this.enCurso.delete(event.queryRunner);
+    consulta.medicion.bdMs += performance.now() - consulta.inicio;
+    consulta.medicion.consultas++;
+  }
+}
+
+/**
+ * Abre la medición de cada solicitud y escribe Server-Timing antes de que
+ * Nest envíe la respuesta (también en errores). En las rutas con @Res que
+ * ya enviaron las cabeceras (stream) no se agrega.
+ */
+@Injectable()
+export class ServerTimingInterceptor implements NestInterceptor {
+  intercept(context: ExecutionContext, next: CallHandler): Observable<unknown> {
+    const respuesta = context.switchToHttp().getResponse<Response>();
+    const medicion = nuevaMedicion();
+    const escribir = () => {
+      if (!respuesta.headersSent) {
+        respuesta.setHeader(CABECERA_SERVER_TIMING, formatearServerTiming(medicion));
+      }
+    };
+
+    // El handler corre al suscribirse: dentro de run() hereda la medición
+    return new Observable((suscriptor) =>
+      contextoMedicion.run(medicion, () =>
+        next.handle().pipe(tap({ next: escribir, error: escribir })).subscribe(suscriptor),
+      ),
+    );
+  }
+}